@@ -7,11 +7,6 @@ from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from models import close_client
-
-# Load environment variables
-load_dotenv()
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 def create_app():
   """Application factory pattern for Flask app creation."""
+  # Load environment variables before any service module reads them
+  load_dotenv()
+
   app = Flask(__name__)
 
   # Configuration
@@ -41,14 +39,37 @@ def create_app():
   from app.routes.jobs import jobs_bp
   from app.routes.questions import questions_bp
   from app.routes.feedback import feedback_bp
+  from app.routes.tasks import tasks_bp
+  from app.routes.suggest import suggest_bp
+  from app.routes.debug import debug_bp
+  from app.routes.sessions import sessions_bp
 
   app.register_blueprint(health_bp)
   app.register_blueprint(jobs_bp)
   app.register_blueprint(questions_bp)
   app.register_blueprint(feedback_bp)
+  app.register_blueprint(tasks_bp)
+  app.register_blueprint(suggest_bp)
+  app.register_blueprint(debug_bp)
+  app.register_blueprint(sessions_bp)
+
+  # Sampling profiler for individual requests; registered first so the
+  # admission wait is part of the profile
+  from app.profiling import init_profiling
+  init_profiling(app)
+
+  # Per-blueprint concurrency limits and load shedding
+  from app.admission import init_admission_control
+  init_admission_control(app)
 
-  # Register teardown function
-  app.teardown_appcontext(close_client)
+  # Warm up dependencies and caches before /readyz reports ready
+  _register_warmup_hooks()
+  if os.environ.get('PRELOAD_MODE', 'False').lower() == 'true':
+    # Running in the gunicorn master: load the shared caches once; workers
+    # start their own state after the fork (see gunicorn.conf.py)
+    load_shared_state()
+  else:
+    start_background_services()
 
   # Error handlers
   @app.errorhandler(404)
@@ -64,3 +85,69 @@ def create_app():
   logger.info(f"Debug mode: {app.config['DEBUG']}")
 
   return app
+
+
+def load_shared_state():
+  """Loads the shared read-only caches in this process, before forking."""
+  from app.warmup import WARMUP_ENABLED, run_warmup
+  from models import close_client
+
+  if WARMUP_ENABLED:
+    run_warmup('shared')
+  # MongoClient is not fork-safe; every worker opens its own
+  close_client()
+
+
+def start_background_services(scope: str = None):
+  """
+  Starts warm-up (all hooks, or only the 'worker' ones after a preloaded
+  fork), the readiness checker and the scheduled cache refreshers.
+  """
+  from app.warmup import start_warmup
+  from app.services.readiness import start_readiness_checker
+  from app.services.change_sync import CHANGE_SYNC_ENABLED
+  from app.services.job_catalog import start_catalog_refresher
+  from app.services.suggest_service import start_suggest_refresher
+
+  start_warmup(scope)
+  # Start the background dependency checker behind /readyz
+  start_readiness_checker()
+
+  # Full rebuilds replace the caches a preloaded worker shares with the
+  # master by private copies; rely on the change sync when it is enabled
+  if scope != 'worker' or not CHANGE_SYNC_ENABLED:
+    start_suggest_refresher()
+    start_catalog_refresher()
+
+
+def _register_warmup_hooks():
+  """Registers the startup warm-up steps."""
+  from app.warmup import register_warmup
+  from app.services.ai_service import get_model, initialize_vertex_ai
+  from app.services.question_store import preload_question_sets
+  from app.services.skills import load_vocabulary
+  from app.services.suggest_service import refresh_suggest_index
+  from app.services.job_catalog import JOB_CATALOG_ENABLED, refresh_catalog
+  from app.services.change_sync import capture_sync_start, start_change_sync
+  from models import get_client
+
+  def warm_vertex_ai():
+    if not initialize_vertex_ai():
+      raise RuntimeError("Vertex AI initialization failed")
+    get_model()
+
+  # Per-worker connections and clients
+  register_warmup('mongodb', lambda: get_client().admin.command('ping'))
+  register_warmup('vertex_ai', warm_vertex_ai)
+
+  # Shared read-only caches; the sync position is captured before they
+  # load so changes made in between are replayed
+  register_warmup('change_sync_start', capture_sync_start, shared=True)
+  # Forced so a failed load is reported; requests retry it later
+  register_warmup('skill_vocabulary', lambda: load_vocabulary(force=True), shared=True)
+  register_warmup('question_sets', preload_question_sets, shared=True)
+  register_warmup('suggest_index', refresh_suggest_index, shared=True)
+  if JOB_CATALOG_ENABLED:
+    register_warmup('job_catalog', refresh_catalog, shared=True)
+
+  register_warmup('change_sync', start_change_sync)
@@ -0,0 +1,260 @@
+"""
+Admission control and load shedding.
+
+Every blueprint gets a concurrency limit with a bounded wait queue, and all
+limited requests additionally share a global pool of slots handed out by
+priority, so cheap database searches are admitted ahead of LLM-heavy calls.
+Requests are rejected early instead of piling up:
+- 429 when the blueprint's wait queue is full,
+- 503 when the expected or actual wait exceeds the request's deadline.
+Both carry a Retry-After header. Health probes are never limited. Task
+status polls only use their own limiter: a `?wait=` long-poll can hold its
+slot for up to 30 seconds and must not take global slots from searches.
+The global slots plus the task slots are kept below the gunicorn thread
+count, so a probe always finds a free thread.
+"""
+import os
+import json
+import math
+import time
+import heapq
+import logging
+import itertools
+import threading
+from flask import g, jsonify, request
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ADMISSION_CONTROL_ENABLED = os.environ.get(
+    'ADMISSION_CONTROL_ENABLED', 'True').lower() == 'true'
+# Threads per gunicorn worker (see gunicorn.conf.py)
+ADMISSION_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+# Global slots shared by all limited blueprints. With the task slots, kept
+# below ADMISSION_THREADS so probes always find a free thread.
+ADMISSION_GLOBAL_CONCURRENCY = int(
+    os.environ.get('ADMISSION_GLOBAL_CONCURRENCY', 5))
+ADMISSION_GLOBAL_MAX_QUEUE = int(
+    os.environ.get('ADMISSION_GLOBAL_MAX_QUEUE', 64))
+ADMISSION_GLOBAL_MAX_WAIT = float(
+    os.environ.get('ADMISSION_GLOBAL_MAX_WAIT', 30))
+
+# Per-blueprint limits. Lower priority values are admitted first.
+# Override with ADMISSION_LIMITS, e.g. '{"jobs": {"max_concurrent": 2}}'.
+DEFAULT_ADMISSION_LIMITS = {
+    'jobs': {'max_concurrent': 4, 'max_queue': 16, 'max_wait': 10, 'priority': 1},
+    'questions': {'max_concurrent': 4, 'max_queue': 16, 'max_wait': 15, 'priority': 2},
+    'feedback': {'max_concurrent': 3, 'max_queue': 8, 'max_wait': 15, 'priority': 2},
+    'tasks': {'max_concurrent': 2, 'max_queue': 32, 'max_wait': 5, 'priority': 0},
+    'sessions': {'max_concurrent': 4, 'max_queue': 16, 'max_wait': 10, 'priority': 1},
+    # Called on every keystroke and answered from memory: short waits only
+    'suggest': {'max_concurrent': 4, 'max_queue': 32, 'max_wait': 1, 'priority': 0},
+    'debug': {'max_concurrent': 1, 'max_queue': 2, 'max_wait': 5, 'priority': 3},
+}
+UNLIMITED_BLUEPRINTS = ('health',)
+# Limited by their own limiter only, not the global pool
+GLOBAL_EXEMPT_BLUEPRINTS = ('tasks',)
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
+
+class AdmissionRejected(Exception):
+  """Raised when a request cannot be admitted."""
+
+  def __init__(self, message, status_code, retry_after, reason):
+    super().__init__(message)
+    self.status_code = status_code
+    self.retry_after = retry_after
+    self.reason = reason
+
+
+class AdmissionLimiter:
+  """
+  Concurrency limiter with a bounded, priority-ordered wait queue.
+
+  The expected wait of a new request is estimated from the queue length and
+  a moving average of service times, so requests that could not be served
+  before their deadline are rejected immediately rather than after waiting.
+  """
+
+  def __init__(self, name, max_concurrent, max_queue, max_wait):
+    self.name = name
+    self.max_concurrent = max_concurrent
+    self.max_queue = max_queue
+    self.max_wait = max_wait
+    self._cond = threading.Condition()
+    self._in_flight = 0
+    self._waiters = []
+    self._sequence = itertools.count()
+    self._avg_service_time = 1.0
+
+  def _estimated_wait(self, position: int) -> float:
+    """Estimates how long a request at a queue position will wait."""
+    return self._avg_service_time * math.ceil(position / self.max_concurrent)
+
+  def _publish(self):
+    metrics.set_gauge('admission.in_flight', self._in_flight, limiter=self.name)
+    metrics.set_gauge('admission.queue_depth', len(self._waiters),
+                      limiter=self.name)
+
+  def _reject(self, reason, status_code, retry_after):
+    metrics.increment('admission.rejected', limiter=self.name, reason=reason)
+    raise AdmissionRejected(
+        f"Server busy ({self.name}: {reason}). Please retry later.",
+        status_code, max(1, math.ceil(retry_after)), reason)
+
+  def acquire(self, priority: int = 0, max_wait: float = None):
+    """Blocks until a slot is free or raises AdmissionRejected."""
+    max_wait = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+    with self._cond:
+      if self._in_flight < self.max_concurrent and not self._waiters:
+        self._in_flight += 1
+        self._publish()
+        return
+
+      position = len(self._waiters) + 1
+      estimate = self._estimated_wait(position)
+      if len(self._waiters) >= self.max_queue:
+        self._reject('queue_full', 429, estimate)
+      if estimate > max_wait:
+        self._reject('deadline', 503, estimate)
+
+      entry = (priority, next(self._sequence))
+      heapq.heappush(self._waiters, entry)
+      self._publish()
+      deadline = time.monotonic() + max_wait
+      try:
+        while not (self._waiters[0] == entry
+                   and self._in_flight < self.max_concurrent):
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._reject('timeout', 503, self._estimated_wait(position))
+          self._cond.wait(remaining)
+        heapq.heappop(self._waiters)
+        self._in_flight += 1
+      finally:
+        self._publish()
+        self._cond.notify_all()
+
+  def release(self, service_time: float):
+    """Frees a slot and updates the service time average."""
+    with self._cond:
+      self._in_flight -= 1
+      self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+      self._publish()
+      self._cond.notify_all()
+
+  def stats(self) -> dict:
+    with self._cond:
+      return {
+          'in_flight': self._in_flight,
+          'queue_depth': len(self._waiters),
+          'max_concurrent': self.max_concurrent,
+          'max_queue': self.max_queue,
+          'avg_service_time': round(self._avg_service_time, 3),
+      }
+
+
+_limiters = {}
+_priorities = {}
+_global_limiter = None
+
+
+def _load_limits() -> dict:
+  limits = {name: dict(cfg) for name, cfg in DEFAULT_ADMISSION_LIMITS.items()}
+  overrides = os.environ.get('ADMISSION_LIMITS')
+  if overrides:
+    try:
+      for name, cfg in json.loads(overrides).items():
+        limits.setdefault(name, dict(DEFAULT_ADMISSION_LIMITS['jobs'])).update(cfg)
+    except (ValueError, AttributeError) as e:
+      logger.error(f"Ignoring invalid ADMISSION_LIMITS: {str(e)}")
+  return limits
+
+
+def _global_concurrency(limits: dict) -> int:
+  """
+  Returns the global slot count, reduced if needed so that it and the
+  slots of the global-exempt limiters stay below ADMISSION_THREADS.
+  """
+  exempt = sum(limits[name]['max_concurrent']
+               for name in GLOBAL_EXEMPT_BLUEPRINTS if name in limits)
+  available = max(1, ADMISSION_THREADS - 1 - exempt)
+  if ADMISSION_GLOBAL_CONCURRENCY > available:
+    logger.warning(
+        f"ADMISSION_GLOBAL_CONCURRENCY={ADMISSION_GLOBAL_CONCURRENCY} plus "
+        f"{exempt} task slots would use every one of {ADMISSION_THREADS} "
+        f"threads; using {available} global slots")
+    return available
+  return ADMISSION_GLOBAL_CONCURRENCY
+
+
+def get_admission_stats() -> dict:
+  """Returns live limiter statistics keyed by limiter name."""
+  stats = {name: limiter.stats() for name, limiter in _limiters.items()}
+  if _global_limiter is not None:
+    stats['global'] = _global_limiter.stats()
+  return stats
+
+
+def _request_max_wait():
+  """Returns the client's deadline in seconds, if it sent one."""
+  value = request.headers.get(DEADLINE_HEADER)
+  try:
+    return float(value) / 1000 if value else None
+  except ValueError:
+    return None
+
+
+def _admit():
+  blueprint = request.blueprint
+  limiter = _limiters.get(blueprint)
+  if limiter is None:
+    return None
+
+  g.admission = []
+  max_wait = _request_max_wait()
+  try:
+    limiter.acquire(max_wait=max_wait)
+    g.admission.append((limiter, time.monotonic()))
+    if blueprint not in GLOBAL_EXEMPT_BLUEPRINTS:
+      _global_limiter.acquire(_priorities[blueprint], max_wait=max_wait)
+      g.admission.append((_global_limiter, time.monotonic()))
+  except AdmissionRejected as e:
+    _release()
+    logger.warning(f"Rejected request to {request.path}: {e.reason}")
+    response = jsonify({'error': str(e), 'success': False})
+    response.status_code = e.status_code
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+  return None
+
+
+def _release(error=None):
+  for limiter, started_at in reversed(g.pop('admission', [])):
+    limiter.release(time.monotonic() - started_at)
+
+
+def init_admission_control(app):
+  """Creates the limiters and registers the request hooks on the app."""
+  global _global_limiter
+  if not ADMISSION_CONTROL_ENABLED:
+    logger.info("Admission control disabled")
+    return
+
+  limits = _load_limits()
+  _global_limiter = AdmissionLimiter(
+      'global', _global_concurrency(limits), ADMISSION_GLOBAL_MAX_QUEUE,
+      ADMISSION_GLOBAL_MAX_WAIT)
+  for name, cfg in limits.items():
+    if name in UNLIMITED_BLUEPRINTS:
+      continue
+    _limiters[name] = AdmissionLimiter(
+        name, cfg['max_concurrent'], cfg['max_queue'], cfg['max_wait'])
+    _priorities[name] = cfg['priority']
+
+  app.before_request(_admit)
+  app.teardown_request(_release)
+  logger.info(f"Admission control enabled for: {', '.join(_limiters)}")
@@ -0,0 +1,284 @@
+"""
+On-demand request profiling.
+
+A profiled request is sampled by a statistical profiler: a single background
+thread records the request thread's Python stack every PROFILE_INTERVAL_MS.
+Wall-clock samples include time blocked on I/O (MongoDB, Vertex AI), which
+shows up under the waiting call. Stacks are stored in folded format
+(`frame;frame;frame count`), ready for flamegraph.pl or speedscope, under
+PROFILE_DIR so every worker of a host shares them, and are browsable at
+/debug/profiles.
+
+A request is profiled when it sends `X-Profile: 1` together with a valid
+`X-Admin-Token`, or at random with probability PROFILE_SAMPLE_RATE. Without
+PROFILING_ADMIN_TOKEN and a sample rate, no request hooks are registered at
+all.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import hmac
+import random
+import logging
+import tempfile
+import threading
+from collections import Counter
+from flask import g, request
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PROFILING_ADMIN_TOKEN = os.environ.get('PROFILING_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.environ.get(
+    'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'quickq-profiles'))
+PROFILE_MAX_STORED = int(os.environ.get('PROFILE_MAX_STORED', 100))
+PROFILE_MAX_DEPTH = 128
+PROFILE_HEADER = 'X-Profile'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+
+class ProfileSession:
+  """Samples collected for one thread."""
+
+  def __init__(self, thread_id: int):
+    self.thread_id = thread_id
+    self.stacks = Counter()
+    self.samples = 0
+
+
+class SamplingProfiler:
+  """
+  Background sampler shared by all profiled requests of the process. It
+  only wakes up while at least one session is active.
+  """
+
+  def __init__(self, interval: float):
+    self._interval = interval
+    self._sessions = {}
+    self._lock = threading.Lock()
+    self._active = threading.Event()
+    self._thread = None
+
+  def start(self, thread_id: int) -> ProfileSession:
+    session = ProfileSession(thread_id)
+    with self._lock:
+      self._sessions[thread_id] = session
+      if self._thread is None:
+        self._thread = threading.Thread(
+            target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+    self._active.set()
+    return session
+
+  def stop(self, session: ProfileSession) -> ProfileSession:
+    with self._lock:
+      self._sessions.pop(session.thread_id, None)
+      if not self._sessions:
+        self._active.clear()
+    return session
+
+  def _run(self):
+    next_sample = time.monotonic()
+    while True:
+      if not self._active.is_set():
+        self._active.wait()
+        next_sample = time.monotonic()
+      self._sample()
+      # Keep a fixed schedule: waiting for the GIL behind CPU-bound request
+      # threads would otherwise under-sample them
+      next_sample += self._interval
+      time.sleep(max(0.0, next_sample - time.monotonic()))
+
+  def _sample(self):
+    with self._lock:
+      sessions = list(self._sessions.values())
+    if not sessions:
+      return
+    frames = sys._current_frames()
+    for session in sessions:
+      frame = frames.get(session.thread_id)
+      if frame is not None:
+        session.stacks[_fold(frame)] += 1
+        session.samples += 1
+
+
+def _fold(frame) -> str:
+  """Returns the stack as `root;...;leaf` frame labels."""
+  labels = []
+  while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+    code = frame.f_code
+    labels.append(
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+    frame = frame.f_back
+  return ';'.join(reversed(labels))
+
+
+_profiler = None
+
+
+def _reset_after_fork():
+  global _profiler
+  _profiler = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_profiler() -> SamplingProfiler:
+  global _profiler
+  if _profiler is None:
+    _profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
+  return _profiler
+
+
+def is_admin(token: str) -> bool:
+  """Checks an admin token against PROFILING_ADMIN_TOKEN."""
+  return bool(PROFILING_ADMIN_TOKEN) and hmac.compare_digest(
+      (token or '').encode('utf-8'), PROFILING_ADMIN_TOKEN.encode('utf-8'))
+
+
+def _trigger():
+  """Returns why the current request should be profiled, or None."""
+  if request.headers.get(PROFILE_HEADER) == '1':
+    if is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+      return 'header'
+    return None
+  if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+    return 'sampled'
+  return None
+
+
+def _start_profile():
+  if request.blueprint == 'debug':
+    return None
+  trigger = _trigger()
+  if trigger is None:
+    return None
+  g.profile = {
+      'trigger': trigger,
+      'started_at': time.time(),
+      'started': time.perf_counter(),
+      'cpu_started': time.thread_time(),
+      'session': _get_profiler().start(threading.get_ident()),
+      'profile_id': uuid.uuid4().hex[:16],
+  }
+  return None
+
+
+def _tag_response(response):
+  profile = g.get('profile')
+  if profile is not None:
+    profile['status'] = response.status_code
+    response.headers[PROFILE_ID_HEADER] = profile['profile_id']
+  return response
+
+
+def _finish_profile(error=None):
+  profile = g.pop('profile', None)
+  if profile is None:
+    return
+  session = _get_profiler().stop(profile['session'])
+  record = {
+      'profile_id': profile['profile_id'],
+      'method': request.method,
+      'path': request.full_path.rstrip('?'),
+      'endpoint': request.endpoint,
+      'status': profile.get('status', 500),
+      'trigger': profile['trigger'],
+      'started_at': profile['started_at'],
+      'duration_ms': round((time.perf_counter() - profile['started']) * 1000, 2),
+      'cpu_ms': round((time.thread_time() - profile['cpu_started']) * 1000, 2),
+      'interval_ms': PROFILE_INTERVAL_MS,
+      'samples': session.samples,
+      'pid': os.getpid(),
+      'stacks': dict(session.stacks),
+  }
+  try:
+    save_profile(record)
+    metrics.increment('profiling.captured', trigger=profile['trigger'])
+  except OSError as e:
+    logger.warning(f"Could not store profile {record['profile_id']}: {str(e)}")
+
+
+def save_profile(record: dict):
+  """Writes a profile to PROFILE_DIR and prunes the oldest ones."""
+  os.makedirs(PROFILE_DIR, exist_ok=True)
+  path = os.path.join(PROFILE_DIR, f"{record['profile_id']}.json")
+  tmp_path = f"{path}.tmp"
+  with open(tmp_path, 'w') as f:
+    json.dump(record, f)
+  os.replace(tmp_path, path)
+
+  paths = _profile_paths()
+  for stale in paths[:max(0, len(paths) - PROFILE_MAX_STORED)]:
+    try:
+      os.remove(stale)
+    except OSError:
+      pass
+
+
+def _profile_paths() -> list:
+  """Returns stored profile files, oldest first."""
+  try:
+    names = [n for n in os.listdir(PROFILE_DIR) if n.endswith('.json')]
+  except FileNotFoundError:
+    return []
+  paths = [os.path.join(PROFILE_DIR, n) for n in names]
+  mtimes = {}
+  for path in paths:
+    try:
+      mtimes[path] = os.path.getmtime(path)
+    except OSError:
+      pass
+  return sorted(mtimes, key=mtimes.get)
+
+
+def list_profiles() -> list:
+  """Returns the stored profiles without their stacks, newest first."""
+  profiles = []
+  for path in reversed(_profile_paths()):
+    try:
+      with open(path) as f:
+        record = json.load(f)
+    except (OSError, ValueError):
+      continue
+    record.pop('stacks', None)
+    profiles.append(record)
+  return profiles
+
+
+def load_profile(profile_id: str):
+  """Returns a stored profile, or None if it does not exist."""
+  if not profile_id.isalnum():
+    return None
+  try:
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json")) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return None
+
+
+def folded_stacks(record: dict) -> str:
+  """Renders a profile in folded format, heaviest stacks first."""
+  stacks = sorted(record['stacks'].items(), key=lambda item: -item[1])
+  return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+def init_profiling(app):
+  """Registers the profiling request hooks when profiling can be triggered."""
+  if not PROFILING_ADMIN_TOKEN and not PROFILE_SAMPLE_RATE:
+    logger.info("Request profiling disabled")
+    return
+
+  app.before_request(_start_profile)
+  app.after_request(_tag_response)
+  app.teardown_request(_finish_profile)
+  logger.info(
+      f"Request profiling enabled (sample rate {PROFILE_SAMPLE_RATE}, "
+      f"header trigger {'on' if PROFILING_ADMIN_TOKEN else 'off'})")
@@ -0,0 +1,51 @@
+"""
+Debug routes for browsing request profiles. Admin only.
+"""
+import logging
+from flask import Blueprint, Response, jsonify, request
+from app.profiling import (
+    ADMIN_TOKEN_HEADER, PROFILING_ADMIN_TOKEN, folded_stacks, is_admin,
+    list_profiles, load_profile)
+
+logger = logging.getLogger(__name__)
+
+# Create Blueprint
+debug_bp = Blueprint('debug', __name__)
+
+
+@debug_bp.before_request
+def require_admin():
+  """Rejects requests without the admin token; hides the routes if unset."""
+  if not PROFILING_ADMIN_TOKEN:
+    return jsonify({'error': 'Endpoint not found'}), 404
+  if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+    return jsonify({'error': 'Forbidden', 'success': False}), 403
+  return None
+
+
+@debug_bp.route('/debug/profiles', methods=['GET'])
+def list_profiles_endpoint():
+  """Lists stored request profiles, newest first."""
+  profiles = list_profiles()
+  return jsonify({
+      'success': True,
+      'profiles': profiles,
+      'total': len(profiles)
+  })
+
+
+@debug_bp.route('/debug/profiles/<profile_id>', methods=['GET'])
+def get_profile_endpoint(profile_id):
+  """
+  Returns a profile's stacks in folded format (flamegraph.pl, speedscope).
+
+  Query parameters:
+      format: "folded" (default) or "json" for the stacks with metadata
+  """
+  record = load_profile(profile_id)
+  if record is None:
+    return jsonify({'error': 'Profile not found', 'success': False}), 404
+
+  if request.args.get('format') == 'json':
+    return jsonify({'success': True, 'profile': record})
+  return Response(folded_stacks(record), mimetype='text/plain')
@@ -3,8 +3,11 @@ Feedback routes.
 """
 import logging
 from flask import Blueprint, jsonify, request
-from app.services.feedback_service import generate_feedback_for_answers
+from app.services.feedback_service import (
+    check_qa_pairs, generate_feedback_for_answers)
 from app.services.exceptions import ServiceError
+from app.services.session_service import get_session, session_answers
+from app.routes.tasks import accepted_task_response
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +38,15 @@ def generate_feedback_endpoint():
       "questions": [
           { "question": "...", "answer": "..." },
           { "question": "...", "answer": "..." }
-      ]
+      ],
+      "mode": "map_reduce",  // optional: "narrative" (default) or "map_reduce"
+      "async": true,         // optional: queue the work and return 202
+      "callback_url": "..."  // optional: webhook for async results
   }
+  With an interview session (see POST /sessions), `session_id` replaces
+  `job`, and `answers` (in the order of the session's questions) can
+  replace `questions`:
+  { "session_id": "...", "answers": ["...", "..."] }
   """
   if not request.is_json:
     return _json_error('Request must be JSON', 400)
@@ -44,13 +54,33 @@ def generate_feedback_endpoint():
   data = request.get_json()
   job = data.get('job')
   questions = data.get('questions')
+  session_id = data.get('session_id')
 
-  if not job or not questions:
+  if not session_id and (not job or not questions):
     return _json_error(
         '`job` and `questions` are required in request body', 400)
+  if session_id and not questions and not data.get('answers'):
+    return _json_error(
+        '`questions` or `answers` is required in request body', 400)
 
   try:
-    result = generate_feedback_for_answers(job, questions)
+    preamble = None
+    if session_id:
+      session = get_session(session_id)
+      job = session['job']
+      preamble = session['context']['preamble']
+      if not questions:
+        questions = session_answers(session, data.get('answers'))
+    check_qa_pairs(questions)
+
+    if data.get('async'):
+      return accepted_task_response(
+          'feedback',
+          {'job': job, 'questions': questions, 'mode': data.get('mode')},
+          data.get('callback_url'))
+
+    result = generate_feedback_for_answers(
+        job, questions, data.get('mode'), preamble)
 
     response_data = {
         'success': True,
@@ -4,9 +4,11 @@ Health check routes.
 import os
 import logging
 from flask import Blueprint, jsonify
-import vertexai
-from vertexai.preview.generative_models import GenerativeModel
-from models import get_db
+from app.admission import get_admission_stats
+from app.services import metrics
+from app.services.cache import get_cache_stats
+from app.services.readiness import get_dependency_status
+from app.warmup import get_warmup_status
 
 logger = logging.getLogger(__name__)
 
@@ -20,35 +22,31 @@ DATABASE_NAME = os.environ.get('DATABASE_NAME', 'job_postings_db')
 DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', 'gemini-2.0-flash')
 
 
-def initialize_vertex_ai():
-  """Initialize Vertex AI with project configuration."""
-  try:
-    vertexai.init(
-        project=GOOGLE_CLOUD_PROJECT_ID,
-        location=GOOGLE_CLOUD_REGION)
-    logger.info(
-        f"Vertex AI initialized for project: {GOOGLE_CLOUD_PROJECT_ID}")
-    return True
-  except Exception as e:
-    logger.error(f"Failed to initialize Vertex AI: {str(e)}")
-    return False
+@health_bp.route('/livez', methods=['GET'])
+def liveness_check():
+  """Liveness probe. Only confirms the process is serving requests."""
+  return jsonify({'status': 'alive'})
+
+
+@health_bp.route('/readyz', methods=['GET'])
+def readiness_check():
+  """Readiness probe backed by the cached dependency status."""
+  status = get_dependency_status()
+  status_code = 200 if status['ready'] else 503
+  return jsonify(status), status_code
 
 
 @health_bp.route('/health', methods=['GET'])
 def health_check():
-  """Health check endpoint."""
-  mongo_status = 'connected'
-  try:
-    get_db()
-  except Exception:
-    mongo_status = 'failed'
-
-  vertex_initialized = initialize_vertex_ai()
+  """Health check endpoint, served from the cached dependency status."""
+  status = get_dependency_status()
 
   health_status = {
-      'status': 'healthy' if vertex_initialized and mongo_status == 'connected' else 'unhealthy',
-      'vertex_ai': 'connected' if vertex_initialized else 'failed',
-      'mongodb': mongo_status,
+      'status': 'healthy' if status['ready'] else 'unhealthy',
+      'vertex_ai': status['vertex_ai'],
+      'mongodb': status['mongodb'],
+      'checked_at': status['checked_at'],
+      'warmup': get_warmup_status(),
       'project_id': GOOGLE_CLOUD_PROJECT_ID,
       'region': GOOGLE_CLOUD_REGION}
 
@@ -57,6 +55,17 @@ def health_check():
   return jsonify(health_status), status_code
 
 
+@health_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+  """Get a snapshot of in-process metrics."""
+  return jsonify({
+      'success': True,
+      **metrics.snapshot(),
+      'admission': get_admission_stats(),
+      'cache': get_cache_stats()
+  })
+
+
 @health_bp.route('/models', methods=['GET'])
 def get_available_models():
   """Get list of available Vertex AI models."""
@@ -1,15 +1,71 @@
 """
 Job search routes.
 """
+import json
 import logging
-from flask import Blueprint, jsonify, request
-from app.services.job_service import search_jobs
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.services.job_service import (
+    JOB_BATCH_MAX_SEARCHES, JOB_SEARCH_MAX_LIMIT, search_jobs, search_jobs_batch,
+    stream_search_jobs)
+from app.services.exceptions import ServiceError
+from app.routes.tasks import accepted_task_response
 
 logger = logging.getLogger(__name__)
 
 # Create Blueprint
 jobs_bp = Blueprint('jobs', __name__)
 
+# Streaming formats of /jobs and their content types
+STREAM_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+def _stream_format(data: dict):
+  """Returns the requested streaming format from the body or Accept header."""
+  stream = data.get('stream')
+  if stream:
+    return stream
+  for stream, mimetype in STREAM_MIMETYPES.items():
+    if request.accept_mimetypes.best == mimetype:
+      return stream
+  return None
+
+
+def _parse_facets(data: dict) -> bool:
+  """Returns the `facets` flag; only booleans and "true"/"false" are accepted."""
+  facets = data.get('facets', False)
+  if isinstance(facets, str) and facets.lower() in ('true', 'false'):
+    return facets.lower() == 'true'
+  if not isinstance(facets, bool):
+    raise ServiceError('`facets` must be true or false', 400)
+  return facets
+
+
+def _parse_limit(value) -> int:
+  """Returns a search `limit` clamped to 1-JOB_SEARCH_MAX_LIMIT."""
+  if isinstance(value, bool) or not isinstance(value, int):
+    raise ServiceError('`limit` must be an integer', 400)
+  return max(1, min(value, JOB_SEARCH_MAX_LIMIT))
+
+
+def _stream_response(events, stream: str) -> Response:
+  """Sends search events as NDJSON lines or server-sent events."""
+  def generate():
+    for event in events:
+      if stream == 'sse':
+        yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+      else:
+        yield json.dumps(event, default=str) + "\n"
+
+  response = Response(stream_with_context(generate()),
+                      mimetype=STREAM_MIMETYPES[stream])
+  response.headers['Cache-Control'] = 'no-cache'
+  # Keep reverse proxies from buffering the stream
+  response.headers['X-Accel-Buffering'] = 'no'
+  return response
+
 
 @jobs_bp.route('/jobs', methods=['POST'])
 def search_jobs_endpoint():
@@ -21,8 +77,16 @@ def search_jobs_endpoint():
       "query": "mobile developer",
       "tech_skills": ["Java", "Kotlin"],
       "job_level": "senior",
-      "limit": 10
+      "limit": 10,           // optional: 1-JOB_SEARCH_MAX_LIMIT
+      "facets": false,       // optional: include job level/type/location/skill counts
+      "stream": "ndjson",    // optional: "ndjson" or "sse" to stream descriptions
+      "async": false,        // optional: queue the search and return 202
+      "callback_url": "..."  // optional: webhook for async results
   }
+
+  A streamed response (also selected with `Accept: application/x-ndjson`
+  or `text/event-stream`) sends the job cards as soon as the postings are
+  found, then each job's description as it is generated.
   """
   try:
     # Validate request
@@ -43,10 +107,38 @@ def search_jobs_endpoint():
 
     tech_skills = data.get('tech_skills')
     job_level = data.get('job_level')
-    limit = data.get('limit', 10)
+    limit = _parse_limit(data.get('limit', 10))
+    facets = _parse_facets(data)
+    stream = _stream_format(data)
+
+    if stream and (not isinstance(stream, str) or stream not in STREAM_MIMETYPES):
+      return jsonify({
+          'error': '`stream` must be "ndjson" or "sse"',
+          'success': False
+      }), 400
+    if stream and data.get('async'):
+      return jsonify({
+          'error': '`stream` and `async` cannot be combined',
+          'success': False
+      }), 400
+
+    if stream:
+      return _stream_response(
+          stream_search_jobs(query, tech_skills=tech_skills,
+                             job_level=job_level, limit=limit, facets=facets),
+          stream)
+
+    if data.get('async'):
+      return accepted_task_response(
+          'jobs',
+          {'query': query, 'tech_skills': tech_skills,
+           'job_level': job_level, 'limit': limit, 'facets': facets},
+          data.get('callback_url'))
 
     # Search for jobs
-    result = search_jobs(query, tech_skills=tech_skills, job_level=job_level, limit=limit)
+    result = search_jobs(
+        query, tech_skills=tech_skills, job_level=job_level, limit=limit,
+        facets=facets)
 
     if 'error' in result:
       return jsonify({
@@ -63,14 +155,109 @@ def search_jobs_endpoint():
         'total': result['total'],
         'ai_generated': result.get('ai_generated', True)
     }
+    if 'facets' in result:
+      response_data['facets'] = result['facets']
 
     logger.info(
         f"Jobs search completed for query: '{query}', returned {len(result['jobs'])} jobs")
     return jsonify(response_data)
 
+  except ServiceError as e:
+    logger.error(f"Service error in jobs endpoint: {str(e)}")
+    return jsonify({
+        'error': str(e),
+        'success': False
+    }), e.status_code
   except Exception as e:
     logger.error(f"Unexpected error in jobs endpoint: {str(e)}")
     return jsonify({
         'error': f'Internal server error: {str(e)}',
         'success': False
     }), 500
+
+
+@jobs_bp.route('/jobs/batch', methods=['POST'])
+def search_jobs_batch_endpoint():
+  """
+  Runs several job searches in one request.
+
+  Expected JSON payload:
+  {
+      "searches": [
+          {"query": "mobile developer", "tech_skills": ["Kotlin"], "limit": 5},
+          {"query": "data engineer", "job_level": "senior"}
+      ]
+  }
+
+  Results are returned in the same order; a posting found by several
+  searches has its description generated once.
+  """
+  try:
+    if not request.is_json:
+      return jsonify({
+          'error': 'Request must be JSON',
+          'success': False
+      }), 400
+
+    searches = request.get_json().get('searches')
+    if not isinstance(searches, list) or not searches:
+      return jsonify({
+          'error': '`searches` must be a non-empty list',
+          'success': False
+      }), 400
+    if len(searches) > JOB_BATCH_MAX_SEARCHES:
+      return jsonify({
+          'error': f'At most {JOB_BATCH_MAX_SEARCHES} searches per batch',
+          'success': False
+      }), 400
+    if not all(isinstance(s, dict) and s.get('query') for s in searches):
+      return jsonify({
+          'error': 'Every search needs a query',
+          'success': False
+      }), 400
+
+    batch = search_jobs_batch([{
+        'query': s['query'],
+        'tech_skills': s.get('tech_skills'),
+        'job_level': s.get('job_level'),
+        'limit': _parse_limit(s.get('limit', 10)),
+    } for s in searches])
+
+    results = []
+    for result in batch['results']:
+      if 'error' in result:
+        results.append({
+            'success': False,
+            'error': result['error'],
+            'query': result['query']
+        })
+      else:
+        results.append({
+            'success': True,
+            'query': result['query'],
+            'jobs': result['jobs'],
+            'total': result['total'],
+            'ai_generated': result['ai_generated']
+        })
+
+    logger.info(
+        f"Batch job search completed for {len(searches)} searches, "
+        f"{batch['unique_jobs']} unique postings")
+    return jsonify({
+        'success': True,
+        'results': results,
+        'unique_jobs': batch['unique_jobs']
+    })
+
+  except ServiceError as e:
+    logger.error(f"Service error in batch jobs endpoint: {str(e)}")
+    return jsonify({
+        'error': str(e),
+        'success': False
+    }), e.status_code
+  except Exception as e:
+    logger.error(f"Unexpected error in batch jobs endpoint: {str(e)}")
+    return jsonify({
+        'error': f'Internal server error: {str(e)}',
+        'success': False
+    }), 500
@@ -4,6 +4,7 @@ Questions search routes.
 import logging
 from flask import Blueprint, jsonify, request
 from app.services.questions_service import generate_interview_questions
+from app.services.session_service import get_session, save_questions
 from app.services.exceptions import ServiceError
 
 logger = logging.getLogger(__name__)
@@ -33,18 +34,25 @@ def generate_questions_endpoint():
           "skills": ["Python", "Django", "AWS"]
       }
   }
+  or, for an interview session (see POST /sessions):
+  { "session_id": "..." }
+  A session's questions are generated once and returned on later calls.
   """
   if not request.is_json:
     return _json_error('Request must be JSON', 400)
 
   data = request.get_json()
   job = data.get('job')
+  session_id = data.get('session_id')
 
-  if not job:
+  if not job and not session_id:
     return _json_error('Job object is required in request body', 400)
 
   try:
-    result = generate_interview_questions(job)
+    if session_id:
+      result = _session_questions(get_session(session_id))
+    else:
+      result = generate_interview_questions(job)
 
     response_data = {
         'success': True,
@@ -61,3 +69,20 @@ def generate_questions_endpoint():
   except Exception as e:
     logger.error(f"Unexpected error in questions endpoint: {str(e)}")
     return _json_error(f'Internal server error: {str(e)}', 500)
+
+
+def _session_questions(session: dict) -> dict:
+  """Returns the session's questions, generating them from its context once."""
+  job = session['job']
+  if session['questions'] is None:
+    result = generate_interview_questions(job, session['context'])
+    save_questions(session, result['questions'], result['precomputed'])
+  else:
+    result = {
+        "questions": session['questions'],
+        "total": len(session['questions']),
+        "job_title": job['title'],
+        "tech_skills": job['skills'],
+        "precomputed": session['precomputed'],
+    }
+  return {**result, "session_id": session['session_id']}
@@ -0,0 +1,78 @@
+"""
+Interview session routes.
+"""
+import logging
+from flask import Blueprint, jsonify, request
+from app.services.session_service import (
+    create_session, delete_session, get_session, public_session)
+from app.services.exceptions import ServiceError
+
+logger = logging.getLogger(__name__)
+
+# Create Blueprint
+sessions_bp = Blueprint('sessions', __name__)
+
+
+def _json_error(message, status_code):
+  """Creates a JSON error response."""
+  return jsonify({
+      'error': message,
+      'success': False
+  }), status_code
+
+
+@sessions_bp.route('/sessions', methods=['POST'])
+def create_session_endpoint():
+  """
+  Creates an interview session for a job.
+
+  Expected JSON payload, either:
+  { "job_link": "https://www.linkedin.com/jobs/view/..." }
+  or a job object, e.g. for an AI fallback listing:
+  { "job": { "title": "...", "description": "...", "skills": [...] } }
+  """
+  if not request.is_json:
+    return _json_error('Request must be JSON', 400)
+
+  data = request.get_json()
+  if not isinstance(data, dict):
+    return _json_error('Request body must be a JSON object', 400)
+  if not data.get('job_link') and not data.get('job'):
+    return _json_error('`job_link` or `job` is required in request body', 400)
+  if data.get('job_link') and not isinstance(data['job_link'], str):
+    return _json_error('`job_link` must be a string', 400)
+
+  try:
+    session = create_session(data.get('job_link'), data.get('job'))
+    response = jsonify({
+        'success': True,
+        **public_session(session)
+    })
+    response.status_code = 201
+    return response
+
+  except ServiceError as e:
+    logger.error(f"Service error in sessions endpoint: {str(e)}")
+    return _json_error(str(e), e.status_code)
+  except Exception as e:
+    logger.error(f"Unexpected error in sessions endpoint: {str(e)}")
+    return _json_error(f'Internal server error: {str(e)}', 500)
+
+
+@sessions_bp.route('/sessions/<session_id>', methods=['GET'])
+def get_session_endpoint(session_id):
+  """Returns a session's job and questions."""
+  try:
+    return jsonify({
+        'success': True,
+        **public_session(get_session(session_id))
+    })
+  except ServiceError as e:
+    return _json_error(str(e), e.status_code)
+
+
+@sessions_bp.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session_endpoint(session_id):
+  """Ends a session before it expires."""
+  delete_session(session_id)
+  return jsonify({'success': True})
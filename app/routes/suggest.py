@@ -0,0 +1,50 @@
+"""
+Search autocomplete routes.
+"""
+import logging
+from flask import Blueprint, jsonify, request
+from app.services.suggest_service import (
+    SUGGEST_MAX_LIMIT, SUGGEST_TYPES, get_suggest_index)
+
+logger = logging.getLogger(__name__)
+
+# Create Blueprint
+suggest_bp = Blueprint('suggest', __name__)
+
+
+@suggest_bp.route('/suggest', methods=['GET'])
+def suggest_endpoint():
+  """
+  Suggests job titles and skills that match real postings.
+
+  Query parameters:
+      prefix: the text typed so far (required)
+      limit:  number of suggestions, 1-20 (default 10)
+      type:   "title" or "skill" to restrict suggestions (optional)
+  """
+  prefix = request.args.get('prefix', '').strip()
+  if not prefix:
+    return jsonify({
+        'error': 'prefix query parameter is required',
+        'success': False
+    }), 400
+
+  kind = request.args.get('type') or None
+  if kind is not None and kind not in SUGGEST_TYPES:
+    return jsonify({
+        'error': f"type must be one of: {', '.join(SUGGEST_TYPES)}",
+        'success': False
+    }), 400
+
+  limit = request.args.get('limit', 10, type=int)
+  limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+  # Empty until the index is built (in the background, never here)
+  index = get_suggest_index()
+  suggestions = index.suggest(prefix, limit, kind) if index is not None else []
+  return jsonify({
+      'success': True,
+      'prefix': prefix,
+      'suggestions': suggestions,
+      'total': len(suggestions)
+  })
@@ -0,0 +1,57 @@
+"""
+Asynchronous task routes.
+"""
+import logging
+from flask import Blueprint, jsonify, request, url_for
+from app.services.task_queue import enqueue_task, get_task
+
+logger = logging.getLogger(__name__)
+
+# Create Blueprint
+tasks_bp = Blueprint('tasks', __name__)
+
+
+def _json_error(message, status_code):
+  """Creates a JSON error response."""
+  return jsonify({
+      'error': message,
+      'success': False
+  }), status_code
+
+
+def accepted_task_response(name: str, kwargs: dict, callback_url: str = None):
+  """Queues a task and returns a 202 response pointing at its status URL."""
+  task = enqueue_task(name, kwargs, callback_url)
+  status_url = url_for('tasks.get_task_endpoint', task_id=task['task_id'])
+  response = jsonify({
+      'success': True,
+      'task_id': task['task_id'],
+      'status': task['status'],
+      'status_url': status_url
+  })
+  response.status_code = 202
+  response.headers['Location'] = status_url
+  return response
+
+
+@tasks_bp.route('/tasks/<task_id>', methods=['GET'])
+def get_task_endpoint(task_id):
+  """
+  Returns the status, and once finished the result, of an async task.
+
+  Query parameters:
+      wait: seconds to long-poll for completion (max 30)
+  """
+  try:
+    wait = float(request.args.get('wait', 0))
+  except ValueError:
+    return _json_error('`wait` must be a number of seconds', 400)
+
+  task = get_task(task_id, wait)
+  if task is None:
+    return _json_error('Task not found', 404)
+
+  return jsonify({
+      'success': True,
+      **task
+  })
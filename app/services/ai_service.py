@@ -1,10 +1,30 @@
 """
 AI service for Vertex AI integration.
+
+The Vertex AI SDK is imported lazily on first use; importing it takes well
+over a second and would otherwise be paid by every cold start.
+
+Prompts that share a long preamble (the job profile used by both question
+generation and feedback) can register it once as a cached context and
+reference it by key in later calls. With CONTEXT_CACHE_BACKEND=local (the
+default) the preamble is prepended inline. With `vertex`, preambles of at
+least CONTEXT_CACHE_MIN_TOKENS are stored with Vertex AI context caching;
+smaller ones, or ones Vertex rejects, are sent inline. Contexts are evicted
+least recently used first.
 """
 import os
+import time
+import hashlib
 import logging
-import vertexai
-from vertexai.preview.generative_models import GenerativeModel
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from app.services import metrics
+from app.services.hedging import hedged_call
+from app.services.skills import normalize_skill_list
+from app.services.token_budget import (
+    LLM_DESCRIPTION_TOKEN_BUDGET, estimate_tokens, truncate_to_tokens)
 
 logger = logging.getLogger(__name__)
 
@@ -12,30 +32,219 @@ logger = logging.getLogger(__name__)
 GOOGLE_CLOUD_PROJECT_ID = os.environ.get('GOOGLE_CLOUD_PROJECT_ID')
 GOOGLE_CLOUD_REGION = os.environ.get('GOOGLE_CLOUD_REGION', 'us-central1')
 DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', 'gemini-2.0-flash')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+CONTEXT_CACHE_BACKEND = os.environ.get('CONTEXT_CACHE_BACKEND', 'local')
+# Vertex AI rejects cached contents below its minimum size (2048 tokens for
+# current Gemini models); preambles are capped near LLM_DESCRIPTION_TOKEN_BUDGET
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get('CONTEXT_CACHE_MIN_TOKENS', 2048))
+CONTEXT_CACHE_TTL = int(os.environ.get('CONTEXT_CACHE_TTL', 3600))
+CONTEXT_CACHE_MAX_ENTRIES = int(os.environ.get('CONTEXT_CACHE_MAX_ENTRIES', 1000))
+
+_vertex_initialized = False
+_init_lock = threading.Lock()
+# Model registry: model name -> GenerativeModel instance
+_models = {}
+_models_lock = threading.Lock()
+_llm_executor = None
+_llm_executor_lock = threading.Lock()
+# Registered contexts, least recently used first:
+# key -> {'preamble', 'model_name', 'cached_model', 'expires_at'}
+_contexts = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  """Per-worker state: each forked worker initializes its own SDK clients."""
+  global _vertex_initialized, _init_lock, _models, _models_lock
+  global _llm_executor, _llm_executor_lock, _contexts, _contexts_lock
+  _vertex_initialized = False
+  _init_lock = threading.Lock()
+  _models = {}
+  _models_lock = threading.Lock()
+  _llm_executor = None
+  _llm_executor_lock = threading.Lock()
+  _contexts = OrderedDict()
+  _contexts_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def initialize_vertex_ai():
-  """Initialize Vertex AI with project configuration."""
-  try:
-    vertexai.init(
-        project=GOOGLE_CLOUD_PROJECT_ID,
-        location=GOOGLE_CLOUD_REGION)
-    logger.info(
-        f"Vertex AI initialized for project: {GOOGLE_CLOUD_PROJECT_ID}")
+  """Initialize Vertex AI with project configuration (once per process)."""
+  global _vertex_initialized
+  if _vertex_initialized:
     return True
-  except Exception as e:
-    logger.error(f"Failed to initialize Vertex AI: {str(e)}")
-    return False
 
+  with _init_lock:
+    if _vertex_initialized:
+      return True
+    try:
+      import vertexai
+      vertexai.init(
+          project=GOOGLE_CLOUD_PROJECT_ID,
+          location=GOOGLE_CLOUD_REGION)
+      _vertex_initialized = True
+      logger.info(
+          f"Vertex AI initialized for project: {GOOGLE_CLOUD_PROJECT_ID}")
+      return True
+    except Exception as e:
+      logger.error(f"Failed to initialize Vertex AI: {str(e)}")
+      return False
+
+
+def get_model(model_name: str = DEFAULT_MODEL):
+  """Returns a cached GenerativeModel instance for the given model name."""
+  model = _models.get(model_name)
+  if model is None:
+    with _models_lock:
+      model = _models.get(model_name)
+      if model is None:
+        from vertexai.preview.generative_models import GenerativeModel
+        model = GenerativeModel(model_name)
+        _models[model_name] = model
+  return model
+
+
+def build_job_preamble(job_title: str, job_description: str, skills: list) -> str:
+  """
+  Builds the job profile shared by question and feedback prompts. Skills are
+  canonicalized and the description is capped at LLM_DESCRIPTION_TOKEN_BUDGET
+  so both flows produce the same text for the same job.
+  """
+  job_description = truncate_to_tokens(
+      job_description, LLM_DESCRIPTION_TOKEN_BUDGET)
+  skills = normalize_skill_list(skills)
+  return f"""Job profile for the role of "{job_title}":
+
+- Title: {job_title}
+- Description: {job_description}
+- Key Skills: {', '.join(skills)}
+"""
+
+
+def _create_vertex_cached_model(preamble: str, model_name: str):
+  """Stores the preamble with Vertex AI context caching and returns a model bound to it."""
+  from vertexai.preview import caching
+  from vertexai.preview.generative_models import Content, GenerativeModel, Part
+
+  cached_content = caching.CachedContent.create(
+      model_name=model_name,
+      contents=[Content(role='user', parts=[Part.from_text(preamble)])],
+      ttl=timedelta(seconds=CONTEXT_CACHE_TTL))
+  return GenerativeModel.from_cached_content(cached_content=cached_content)
+
+
+def register_context(preamble: str, model_name: str = DEFAULT_MODEL) -> str:
+  """
+  Registers a shared prompt preamble and returns its key.
 
-def generate_llm_response(prompt: str, model_name: str = DEFAULT_MODEL) -> str:
-  """Generate LLM response using Vertex AI Gemini model."""
+  Registering the same preamble again is a cheap lookup. Preambles below
+  CONTEXT_CACHE_MIN_TOKENS, or ones Vertex AI refuses to cache, are kept
+  locally and sent inline.
+  """
+  key = hashlib.sha256(f"{model_name}\n{preamble}".encode('utf-8')).hexdigest()
+  now = time.monotonic()
+  with _contexts_lock:
+    context = _contexts.get(key)
+    if context and context['expires_at'] > now:
+      _contexts.move_to_end(key)
+      return key
+
+  cached_model = None
+  if (CONTEXT_CACHE_BACKEND == 'vertex'
+          and estimate_tokens(preamble) < CONTEXT_CACHE_MIN_TOKENS):
+    metrics.increment('llm.context_cache', outcome='below_minimum')
+  elif CONTEXT_CACHE_BACKEND == 'vertex' and initialize_vertex_ai():
+    try:
+      cached_model = _create_vertex_cached_model(preamble, model_name)
+      metrics.increment('llm.context_cache', outcome='created')
+    except Exception as e:
+      metrics.increment('llm.context_cache', outcome='create_failed')
+      logger.info(f"Context caching unavailable, sending preamble inline: {str(e)}")
+
+  with _contexts_lock:
+    _contexts.pop(key, None)
+    # Evict the least recently registered or used: a context a request has
+    # just registered is the last to go
+    while len(_contexts) >= CONTEXT_CACHE_MAX_ENTRIES:
+      _contexts.popitem(last=False)
+    _contexts[key] = {
+        'preamble': preamble,
+        'model_name': model_name,
+        'cached_model': cached_model,
+        # Expire locally a little before Vertex AI does
+        'expires_at': now + CONTEXT_CACHE_TTL * 0.9,
+    }
+  return key
+
+
+def register_job_context(job_title: str, job_description: str, skills: list) -> str:
+  """Registers the shared job profile preamble and returns its key."""
+  return register_context(build_job_preamble(job_title, job_description, skills))
+
+
+def _record_usage(response, call_site: str, prompt: str):
+  """Records token usage for a call from the response usage metadata."""
+  usage = getattr(response, 'usage_metadata', None)
+  prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+  output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+  cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+  if not prompt_tokens:
+    # No usage metadata (e.g. a stubbed model): fall back to an estimate
+    prompt_tokens = estimate_tokens(prompt)
+
+  metrics.increment('llm.calls', call_site=call_site)
+  metrics.increment('llm.tokens', prompt_tokens, call_site=call_site, kind='input')
+  metrics.increment('llm.tokens', output_tokens, call_site=call_site, kind='output')
+  if cached_tokens:
+    metrics.increment('llm.tokens', cached_tokens, call_site=call_site, kind='cached')
+
+
+def _resolve_context(context_key: str, prompt: str, model_name: str):
+  """Returns the model and prompt to use for a call referencing a context."""
+  with _contexts_lock:
+    context = _contexts.get(context_key)
+    if context is not None:
+      _contexts.move_to_end(context_key)
+
+  if context is None:
+    raise ValueError(f"Unknown or expired prompt context: {context_key}")
+  # Past its local expiry the Vertex AI cache may be gone: send inline
+  if (context['cached_model'] is not None and context['model_name'] == model_name
+          and context['expires_at'] > time.monotonic()):
+    metrics.increment('llm.context_cache', outcome='hit')
+    return context['cached_model'], prompt
+
+  metrics.increment('llm.context_cache', outcome='inline')
+  return get_model(model_name), f"{context['preamble']}\n{prompt}"
+
+
+def generate_llm_response(
+        prompt: str,
+        model_name: str = DEFAULT_MODEL,
+        context_key: str = None,
+        call_site: str = 'default') -> str:
+  """
+  Generate LLM response using Vertex AI Gemini model.
+  `context_key` references a preamble registered with register_context;
+  `call_site` labels the token usage metrics recorded for the call.
+  """
   try:
     if not initialize_vertex_ai():
       return "Error: Failed to initialize Vertex AI"
 
-    model = GenerativeModel(model_name)
-    response = model.generate_content(prompt)
+    if context_key:
+      model, prompt = _resolve_context(context_key, prompt, model_name)
+    else:
+      model = get_model(model_name)
+    # Every attempt, including a discarded hedge, counts towards usage
+    def generate():
+      response = model.generate_content(prompt)
+      _record_usage(response, call_site, prompt)
+      return response
+
+    response = hedged_call(generate, call_site)
 
     if response and response.text:
       return response.text.strip()
@@ -45,3 +254,31 @@ def generate_llm_response(prompt: str, model_name: str = DEFAULT_MODEL) -> str:
   except Exception as e:
     logger.error(f"Error generating LLM response: {str(e)}")
     return f"Error generating response: {str(e)}"
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+  """Returns the shared executor used for concurrent LLM calls."""
+  global _llm_executor
+  if _llm_executor is None:
+    with _llm_executor_lock:
+      if _llm_executor is None:
+        _llm_executor = ThreadPoolExecutor(
+            max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix='llm')
+  return _llm_executor
+
+
+def generate_llm_responses(
+        prompts: list,
+        model_name: str = DEFAULT_MODEL,
+        call_site: str = 'default') -> list:
+  """
+  Generates responses for several prompts concurrently.
+  Responses are returned in the same order as the prompts.
+  """
+  executor = get_llm_executor()
+  futures = [
+      executor.submit(generate_llm_response, prompt, model_name,
+                      call_site=call_site)
+      for prompt in prompts
+  ]
+  return [future.result() for future in futures]
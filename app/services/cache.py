@@ -0,0 +1,444 @@
+"""
+Shared cache for expensive results (mostly LLM outputs).
+
+Services get a namespaced cache with `get_cache(namespace, ttl, max_entries)`.
+The backend is chosen with CACHE_BACKEND:
+- `memory`: a per-process LRU per namespace (default);
+- `sqlite`: a local on-disk store at CACHE_SQLITE_PATH that survives
+  restarts and is shared by the workers of one host;
+- `redis`: any Redis-protocol server at REDIS_URL, shared by all instances.
+Shared backends store values as JSON, zlib-compressed above
+CACHE_COMPRESS_MIN_BYTES. `get_or_compute` protects against stampedes: one
+caller per key computes the value (per process, and across processes with a
+short-lived lock key on shared backends) while the others wait for it.
+Backend errors are logged and treated as misses.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'quickq')
+CACHE_SQLITE_PATH = os.environ.get(
+    'CACHE_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'quickq-cache.sqlite3'))
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get('CACHE_COMPRESS_MIN_BYTES', 1024))
+CACHE_DEFAULT_MAX_ENTRIES = int(os.environ.get('CACHE_DEFAULT_MAX_ENTRIES', 10000))
+CACHE_LOCK_TTL = 30
+CACHE_LOCK_POLL_INTERVAL = 0.05
+SQLITE_PRUNE_EVERY = 100
+MAX_KEY_LENGTH = 200
+
+_RAW, _COMPRESSED = b'j', b'z'
+
+
+def encode(value) -> bytes:
+  """Serializes a value to JSON, compressing large payloads."""
+  data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+  if len(data) >= CACHE_COMPRESS_MIN_BYTES:
+    return _COMPRESSED + zlib.compress(data)
+  return _RAW + data
+
+
+def decode(payload: bytes):
+  """Reverses `encode`."""
+  data = payload[1:]
+  if payload[:1] == _COMPRESSED:
+    data = zlib.decompress(data)
+  return json.loads(data)
+
+
+def make_key(*parts) -> str:
+  """Builds a stable cache key from JSON-serializable parts."""
+  raw = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+  if len(raw) <= MAX_KEY_LENGTH and all(isinstance(p, str) for p in parts):
+    return '|'.join(parts)
+  return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class MemoryBackend:
+  """Per-process LRU per namespace. Values are stored as-is."""
+  name = 'memory'
+  shared = False
+
+  def __init__(self):
+    self._namespaces = {}
+    self._lock = threading.Lock()
+
+  def get(self, namespace: str, key: str):
+    with self._lock:
+      entries = self._namespaces.get(namespace)
+      item = entries.get(key) if entries is not None else None
+      if item is None:
+        return None
+      expires_at, value = item
+      if expires_at is not None and expires_at <= time.time():
+        del entries[key]
+        return None
+      entries.move_to_end(key)
+      return value
+
+  def set(self, namespace: str, key: str, value, ttl: float, max_entries: int):
+    expires_at = time.time() + ttl if ttl else None
+    with self._lock:
+      entries = self._namespaces.setdefault(namespace, OrderedDict())
+      entries[key] = (expires_at, value)
+      entries.move_to_end(key)
+      while len(entries) > max_entries:
+        entries.popitem(last=False)
+
+  def add(self, namespace: str, key: str, value, ttl: float) -> bool:
+    with self._lock:
+      entries = self._namespaces.setdefault(namespace, OrderedDict())
+      item = entries.get(key)
+      if item is not None and (item[0] is None or item[0] > time.time()):
+        return False
+      entries[key] = (time.time() + ttl, value)
+      return True
+
+  def delete(self, namespace: str, key: str):
+    with self._lock:
+      self._namespaces.get(namespace, {}).pop(key, None)
+
+  def clear(self, namespace: str):
+    with self._lock:
+      self._namespaces.pop(namespace, None)
+
+  def size(self, namespace: str) -> int:
+    with self._lock:
+      return len(self._namespaces.get(namespace, ()))
+
+
+class SQLiteBackend:
+  """On-disk store shared by the processes of one host."""
+  name = 'sqlite'
+  shared = True
+
+  def __init__(self, path: str = CACHE_SQLITE_PATH):
+    self._path = path
+    self._local = threading.local()
+    self._writes = 0
+    self._writes_lock = threading.Lock()
+    with self._connection() as conn:
+      conn.execute(
+          "CREATE TABLE IF NOT EXISTS cache ("
+          " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+          " expires_at REAL, created_at REAL NOT NULL,"
+          " PRIMARY KEY (namespace, key))")
+      conn.execute(
+          "CREATE INDEX IF NOT EXISTS cache_created ON cache (namespace, created_at)")
+
+  def _connection(self) -> sqlite3.Connection:
+    # One connection per thread and process
+    conn = getattr(self._local, 'conn', None)
+    if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+      conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute("PRAGMA synchronous=NORMAL")
+      self._local.conn, self._local.pid = conn, os.getpid()
+    return conn
+
+  def get(self, namespace: str, key: str):
+    row = self._connection().execute(
+        "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+        (namespace, key)).fetchone()
+    if row is None or (row[1] is not None and row[1] <= time.time()):
+      return None
+    return decode(row[0])
+
+  def set(self, namespace: str, key: str, value, ttl: float, max_entries: int):
+    now = time.time()
+    self._connection().execute(
+        "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+        (namespace, key, encode(value), now + ttl if ttl else None, now))
+    with self._writes_lock:
+      self._writes += 1
+      prune = self._writes % SQLITE_PRUNE_EVERY == 0
+    if prune:
+      self._prune(namespace, max_entries)
+
+  def _prune(self, namespace: str, max_entries: int):
+    """Drops expired entries and the oldest ones beyond `max_entries`."""
+    conn = self._connection()
+    conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+    conn.execute(
+        "DELETE FROM cache WHERE namespace = ? AND key IN ("
+        " SELECT key FROM cache WHERE namespace = ?"
+        " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (namespace, namespace, max_entries))
+
+  def add(self, namespace: str, key: str, value, ttl: float) -> bool:
+    now = time.time()
+    conn = self._connection()
+    conn.execute(
+        "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at <= ?",
+        (namespace, key, now))
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)",
+        (namespace, key, encode(value), now + ttl, now))
+    return cursor.rowcount == 1
+
+  def delete(self, namespace: str, key: str):
+    self._connection().execute(
+        "DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+  def clear(self, namespace: str):
+    self._connection().execute(
+        "DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+  def size(self, namespace: str) -> int:
+    return self._connection().execute(
+        "SELECT COUNT(*) FROM cache WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+
+class RedisBackend:
+  """
+  Redis-protocol store shared by every instance. Size limits are left to
+  the server's `maxmemory` policy; entries always carry a TTL.
+  """
+  name = 'redis'
+  shared = True
+
+  def __init__(self, url: str = REDIS_URL):
+    import redis
+    self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+  def _key(self, namespace: str, key: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:{namespace}:{key}"
+
+  def get(self, namespace: str, key: str):
+    payload = self._client.get(self._key(namespace, key))
+    return decode(payload) if payload is not None else None
+
+  def set(self, namespace: str, key: str, value, ttl: float, max_entries: int):
+    self._client.set(
+        self._key(namespace, key), encode(value),
+        px=int(ttl * 1000) if ttl else None)
+
+  def add(self, namespace: str, key: str, value, ttl: float) -> bool:
+    return bool(self._client.set(
+        self._key(namespace, key), encode(value), px=int(ttl * 1000), nx=True))
+
+  def delete(self, namespace: str, key: str):
+    self._client.delete(self._key(namespace, key))
+
+  def clear(self, namespace: str):
+    batch = []
+    for redis_key in self._client.scan_iter(
+            match=f"{CACHE_KEY_PREFIX}:{namespace}:*", count=500):
+      batch.append(redis_key)
+      if len(batch) >= 500:
+        self._client.delete(*batch)
+        batch = []
+    if batch:
+      self._client.delete(*batch)
+
+  def size(self, namespace: str) -> int:
+    return sum(1 for _ in self._client.scan_iter(
+        match=f"{CACHE_KEY_PREFIX}:{namespace}:*", count=500))
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'sqlite': SQLiteBackend,
+    'redis': RedisBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+_caches = {}
+
+
+def _reset_after_fork():
+  global _backend_lock
+  _backend_lock = threading.Lock()
+  if isinstance(_backend, MemoryBackend):
+    _backend._lock = threading.Lock()
+  for cache in _caches.values():
+    cache._key_locks = {}
+    cache._key_locks_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_backend():
+  """Returns the configured backend, falling back to memory if it fails."""
+  global _backend
+  if _backend is None:
+    with _backend_lock:
+      if _backend is None:
+        try:
+          _backend = BACKENDS[CACHE_BACKEND]()
+        except Exception as e:
+          logger.error(
+              f"Cache backend '{CACHE_BACKEND}' unavailable, using memory: {str(e)}")
+          _backend = MemoryBackend()
+        logger.info(f"Using '{_backend.name}' cache backend")
+  return _backend
+
+
+class Cache:
+  """A namespace of the shared cache with its own TTL and size limit."""
+
+  def __init__(self, namespace: str, ttl: float, max_entries: int):
+    self.namespace = namespace
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self._key_locks = {}
+    self._key_locks_lock = threading.Lock()
+
+  def _count(self, name: str, **labels):
+    metrics.increment(name, namespace=self.namespace, **labels)
+
+  def get(self, key: str):
+    """Returns the cached value, or None on a miss."""
+    try:
+      value = get_backend().get(self.namespace, key)
+    except Exception as e:
+      self._count('cache.errors')
+      logger.warning(f"Cache get failed in '{self.namespace}': {str(e)}")
+      value = None
+    self._count('cache.requests', outcome='miss' if value is None else 'hit')
+    return value
+
+  def set(self, key: str, value, ttl: float = None):
+    """Stores a value (None values are not cached)."""
+    if value is None:
+      return
+    try:
+      get_backend().set(
+          self.namespace, key, value, ttl or self.ttl, self.max_entries)
+      self._count('cache.sets')
+    except Exception as e:
+      self._count('cache.errors')
+      logger.warning(f"Cache set failed in '{self.namespace}': {str(e)}")
+
+  def delete(self, *keys) -> None:
+    for key in keys:
+      try:
+        get_backend().delete(self.namespace, key)
+      except Exception as e:
+        self._count('cache.errors')
+        logger.warning(f"Cache delete failed in '{self.namespace}': {str(e)}")
+
+  def clear(self):
+    """Drops every entry of the namespace."""
+    try:
+      get_backend().clear(self.namespace)
+    except Exception as e:
+      self._count('cache.errors')
+      logger.warning(f"Cache clear failed in '{self.namespace}': {str(e)}")
+
+  def _key_lock(self, key: str):
+    with self._key_locks_lock:
+      entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+      entry[1] += 1
+    return entry
+
+  def _release_key_lock(self, key: str, entry):
+    with self._key_locks_lock:
+      entry[1] -= 1
+      if entry[1] == 0:
+        self._key_locks.pop(key, None)
+
+  def get_or_compute(self, key: str, compute, ttl: float = None, should_cache=None):
+    """
+    Returns the cached value or computes, caches and returns it. Only one
+    caller per key computes at a time; `should_cache(value)` can veto
+    caching a result (e.g. an error message).
+    """
+    value = self.get(key)
+    if value is not None:
+      return value
+
+    entry = self._key_lock(key)
+    try:
+      with entry[0]:
+        # Another thread may have filled it while we waited
+        try:
+          value = get_backend().get(self.namespace, key)
+        except Exception:
+          value = None
+        if value is not None:
+          self._count('cache.stampede_waits')
+          return value
+        value = self._compute_once(key, compute)
+        if value is not None and (should_cache is None or should_cache(value)):
+          self.set(key, value, ttl)
+        return value
+    finally:
+      self._release_key_lock(key, entry)
+
+  def _compute_once(self, key: str, compute):
+    """Computes a value, coordinating with other processes on shared backends."""
+    backend = get_backend()
+    if not backend.shared:
+      self._count('cache.computes')
+      return compute()
+
+    lock_key = f"{key}:lock"
+    try:
+      acquired = backend.add(self.namespace, lock_key, 1, CACHE_LOCK_TTL)
+    except Exception:
+      acquired = True
+    if not acquired:
+      # Another process is computing it: wait for its result
+      self._count('cache.stampede_waits')
+      deadline = time.monotonic() + CACHE_LOCK_TTL
+      while time.monotonic() < deadline:
+        time.sleep(CACHE_LOCK_POLL_INTERVAL)
+        try:
+          value = backend.get(self.namespace, key)
+        except Exception:
+          break
+        if value is not None:
+          return value
+
+    try:
+      self._count('cache.computes')
+      return compute()
+    finally:
+      if acquired:
+        try:
+          backend.delete(self.namespace, lock_key)
+        except Exception:
+          pass
+
+
+def get_cache(namespace: str, ttl: float,
+              max_entries: int = CACHE_DEFAULT_MAX_ENTRIES) -> Cache:
+  """Returns the cache for a namespace, creating it on first use."""
+  cache = _caches.get(namespace)
+  if cache is None:
+    cache = _caches.setdefault(namespace, Cache(namespace, ttl, max_entries))
+  return cache
+
+
+def get_cache_stats() -> dict:
+  """Returns hit/miss statistics per namespace."""
+  backend = _backend.name if _backend is not None else CACHE_BACKEND
+  stats = {'backend': backend, 'namespaces': {}}
+  for namespace in list(_caches):
+    hits = metrics.get_counter('cache.requests', namespace=namespace, outcome='hit')
+    misses = metrics.get_counter('cache.requests', namespace=namespace, outcome='miss')
+    stats['namespaces'][namespace] = {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+        'computes': metrics.get_counter('cache.computes', namespace=namespace),
+        'stampede_waits': metrics.get_counter('cache.stampede_waits', namespace=namespace),
+        'errors': metrics.get_counter('cache.errors', namespace=namespace),
+    }
+  return stats
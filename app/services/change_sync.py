@@ -0,0 +1,410 @@
+"""
+Incremental sync of MongoDB changes into in-process caches.
+
+A background watcher per collection follows MongoDB change streams and
+applies every insert, update and delete to the caches built from it:
+- `linkedin_jobs`: the in-memory job catalog is patched in place, cached job
+  descriptions of changed postings are dropped and the counts of the
+  suggestion index are adjusted (without a catalog, which holds the previous
+  version of a posting, the index is rebuilt at most every
+  CHANGE_SYNC_SUGGEST_REBUILD_INTERVAL seconds);
+- `software_questions_db.questions`: cached question bank lookups are dropped.
+
+The start point is captured before the caches load (in the gunicorn master
+in preload mode), so changes made while loading are replayed. Progress is
+kept in memory and mirrored to the `sync_state` collection, whose resume
+token is used when no start point was captured. Every process follows the
+same stream, so only the process holding a short lease on a collection's
+`sync_state` document writes it. Where change streams are not available (a
+standalone mongod without a replica set), the watcher polls for new `_id`s
+and pages through `updated_at` changes in `(updated_at, _id)` order, starting
+from the newest `updated_at` in the collection rather than the local clock,
+and reconciles deletes by comparing posting ids with the catalog.
+"""
+import os
+import time
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from models import get_db
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CHANGE_SYNC_ENABLED = os.environ.get(
+    'CHANGE_SYNC_ENABLED', 'False').lower() == 'true'
+CHANGE_SYNC_POLL_INTERVAL = int(os.environ.get('CHANGE_SYNC_POLL_INTERVAL', 30))
+CHANGE_SYNC_RECONCILE_INTERVAL = int(
+    os.environ.get('CHANGE_SYNC_RECONCILE_INTERVAL', 600))
+CHANGE_SYNC_SUGGEST_REBUILD_INTERVAL = int(
+    os.environ.get('CHANGE_SYNC_SUGGEST_REBUILD_INTERVAL', 60))
+CHANGE_SYNC_BATCH_SIZE = 500
+# How long a process keeps writing `sync_state` after its last write before
+# another process may take over
+SYNC_STATE_LEASE_SECONDS = max(120, 4 * CHANGE_SYNC_POLL_INTERVAL)
+CHANGE_STREAM_MAX_AWAIT_MS = 1000
+RETRY_DELAY_SECONDS = 5
+
+# Database configuration
+SYNC_STATE_COLLECTION_NAME = 'sync_state'
+QUESTIONS_DATABASE_NAME = 'software_questions_db'
+
+# Server errors meaning change streams are unsupported or the token expired
+CHANGE_STREAMS_UNSUPPORTED_CODES = (40573, 40324)
+CHANGE_STREAM_HISTORY_LOST_CODES = (280, 286)
+
+_threads = {}
+_threads_lock = threading.Lock()
+# Per-process sync progress: name -> {'resume_token'} or
+# {'last_id', 'last_updated_at', 'last_updated_id'}
+_progress = {}
+_suggest_state = {'pending': False, 'rebuilt_at': 0.0}
+_suggest_lock = threading.Lock()
+
+
+def _apply_posting_changes(changes: list):
+  """
+  Applies posting changes to the catalog, the description cache and the
+  suggestion index.
+  """
+  from app.services.job_catalog import get_catalog
+  from app.services.job_service import invalidate_job_descriptions, posting_skills
+  from app.services.suggest_service import update_suggest_index
+
+  catalog = get_catalog()
+  changed_links = set()
+  catalog_changes = []
+  # Suggestion counts of the versions replaced and added: (title, skills)
+  removed, added = [], []
+  # job_id -> latest version within this batch, or None once deleted
+  latest = {}
+  for change in changes:
+    job_id = str(change['_id'])
+    if catalog is not None:
+      if job_id in latest:
+        previous = latest[job_id]
+      else:
+        record = catalog.get(job_id)
+        previous = record and (record.job_title, record.skills, record.job_link)
+      if previous is not None:
+        removed.append(previous[:2])
+        if previous[2]:
+          changed_links.add(previous[2])
+    if change['op'] == 'upsert':
+      doc = change['doc']
+      if doc.get('job_link'):
+        changed_links.add(doc['job_link'])
+      latest[job_id] = (doc.get('job_title'), posting_skills(doc, limit=None),
+                        doc.get('job_link'))
+      added.append(latest[job_id][:2])
+      catalog_changes.append(('upsert', doc))
+    else:
+      latest[job_id] = None
+      catalog_changes.append(('remove', job_id))
+  if catalog is not None and catalog_changes:
+    # One copy-on-write swap per batch
+    catalog.apply(catalog_changes)
+
+  invalidate_job_descriptions(changed_links)
+  if catalog is not None:
+    update_suggest_index(removed, added)
+  else:
+    # The previous versions are unknown, so only a rebuild gets counts right
+    with _suggest_lock:
+      _suggest_state['pending'] = True
+
+
+def _apply_question_changes(changes: list):
+  """Drops cached question bank lookups, which may include changed questions."""
+  from app.services.questions_service import invalidate_context_cache
+  invalidate_context_cache()
+
+
+def _posting_ids_in_memory():
+  from app.services.job_catalog import get_catalog
+  catalog = get_catalog()
+  return None if catalog is None else catalog.ids()
+
+
+# Watched collections: name -> (database name or None for default, collection,
+# apply function, function returning the ids held in memory or None)
+WATCHED_COLLECTIONS = {
+    'linkedin_jobs': (None, 'linkedin_jobs', _apply_posting_changes,
+                      _posting_ids_in_memory),
+    'questions': (QUESTIONS_DATABASE_NAME, 'questions', _apply_question_changes,
+                  None),
+}
+
+
+def _collection(name: str):
+  database_name, collection_name, _, _ = WATCHED_COLLECTIONS[name]
+  return get_db(database_name)[collection_name]
+
+
+def _load_state(name: str) -> dict:
+  return get_db()[SYNC_STATE_COLLECTION_NAME].find_one({'_id': name}) or {}
+
+
+def _worker_id() -> str:
+  # Evaluated per call: preloaded workers are forked after import
+  return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _save_state(name: str, **fields):
+  """
+  Records the progress in memory and mirrors it to `sync_state` if this
+  process holds the collection's lease there or the lease has expired.
+  """
+  _progress[name] = dict(fields)
+  now = datetime.now(timezone.utc)
+  worker_id = _worker_id()
+  fields.update(
+      updated_at=now, owner=worker_id,
+      lease_expires_at=now + timedelta(seconds=SYNC_STATE_LEASE_SECONDS))
+  try:
+    get_db()[SYNC_STATE_COLLECTION_NAME].update_one(
+        {'_id': name, '$or': [
+            {'owner': worker_id},
+            {'lease_expires_at': {'$lt': now}},
+            {'lease_expires_at': {'$exists': False}},
+        ]},
+        {'$set': fields}, upsert=True)
+  except DuplicateKeyError:
+    # Another process holds the lease and records the same stream
+    pass
+
+
+def _apply(name: str, changes: list):
+  if not changes:
+    return
+  _, _, apply_changes, _ = WATCHED_COLLECTIONS[name]
+  apply_changes(changes)
+  metrics.increment('change_sync.changes', len(changes), collection=name)
+  logger.info(f"Applied {len(changes)} changes from '{name}'")
+
+
+def _maybe_rebuild_suggest_index():
+  """Rebuilds the suggestion index once postings changed and enough time passed."""
+  from app.services.suggest_service import refresh_suggest_index
+
+  with _suggest_lock:
+    due = (_suggest_state['pending'] and time.monotonic() - _suggest_state['rebuilt_at']
+           >= CHANGE_SYNC_SUGGEST_REBUILD_INTERVAL)
+    if due:
+      _suggest_state['pending'] = False
+      _suggest_state['rebuilt_at'] = time.monotonic()
+  if due:
+    try:
+      refresh_suggest_index()
+    except Exception as e:
+      logger.error(f"Suggestion index rebuild after sync failed: {str(e)}")
+
+
+def _to_change(event: dict):
+  """Converts a change stream event to {'op', '_id', 'doc'}, or None."""
+  operation = event.get('operationType')
+  document_id = event.get('documentKey', {}).get('_id')
+  if operation in ('insert', 'update', 'replace'):
+    doc = event.get('fullDocument')
+    if doc is None:
+      # Deleted again before the update lookup ran
+      return {'op': 'delete', '_id': document_id, 'doc': None}
+    return {'op': 'upsert', '_id': document_id, 'doc': doc}
+  if operation == 'delete':
+    return {'op': 'delete', '_id': document_id, 'doc': None}
+  return None
+
+
+def _watch_change_stream(name: str):
+  """Follows the collection's change stream until it fails."""
+  token = (_progress.get(name) or _load_state(name)).get('resume_token')
+  with _collection(name).watch(
+      full_document='updateLookup', resume_after=token,
+      max_await_time_ms=CHANGE_STREAM_MAX_AWAIT_MS) as stream:
+    logger.info(f"Watching change stream of '{name}'")
+    while stream.alive:
+      # try_next waits up to max_await_time_ms when there are no new events
+      changes = []
+      while len(changes) < CHANGE_SYNC_BATCH_SIZE:
+        event = stream.try_next()
+        if event is None:
+          break
+        change = _to_change(event)
+        if change is not None:
+          changes.append(change)
+      _apply(name, changes)
+      if stream.resume_token is not None and stream.resume_token != token:
+        token = stream.resume_token
+        _save_state(name, resume_token=token, mode='change_stream')
+      _maybe_rebuild_suggest_index()
+
+
+def _newest_id(collection):
+  newest = list(collection.find({}, {'_id': 1}).sort('_id', -1).limit(1))
+  return newest[0]['_id'] if newest else None
+
+
+def _newest_update(collection) -> tuple:
+  """Returns `(updated_at, _id)` of the last document in update order."""
+  newest = list(collection.find(
+      {'updated_at': {'$type': 'date'}}, {'updated_at': 1}).sort(
+      [('updated_at', -1), ('_id', -1)]).limit(1))
+  return (newest[0]['updated_at'], newest[0]['_id']) if newest else (None, None)
+
+
+def _updated_after(last_updated_at, last_updated_id) -> dict:
+  """Query for documents after `(last_updated_at, last_updated_id)` in update order."""
+  if last_updated_at is None:
+    return {'updated_at': {'$type': 'date'}}
+  if last_updated_id is None:
+    return {'updated_at': {'$gt': last_updated_at}}
+  return {'$or': [
+      {'updated_at': {'$gt': last_updated_at}},
+      {'updated_at': last_updated_at, '_id': {'$gt': last_updated_id}},
+  ]}
+
+
+def _poll_once(collection, position: dict) -> list:
+  """
+  Returns upserts of the documents inserted or updated after `position`
+  ({'last_id', 'last_updated_at', 'last_updated_id'}) and advances it by at
+  most one batch of each.
+  """
+  changes = {}
+  last_id = position['last_id']
+  query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+  for doc in collection.find(query).sort('_id', 1).limit(CHANGE_SYNC_BATCH_SIZE):
+    changes[doc['_id']] = {'op': 'upsert', '_id': doc['_id'], 'doc': doc}
+    position['last_id'] = doc['_id']
+
+  # Paged on (updated_at, _id), so documents sharing a timestamp across the
+  # batch edge are read by the next poll
+  updated = collection.find(
+      _updated_after(position['last_updated_at'], position['last_updated_id'])
+  ).sort([('updated_at', 1), ('_id', 1)]).limit(CHANGE_SYNC_BATCH_SIZE)
+  for doc in updated:
+    changes[doc['_id']] = {'op': 'upsert', '_id': doc['_id'], 'doc': doc}
+    position['last_updated_at'] = doc['updated_at']
+    position['last_updated_id'] = doc['_id']
+  return list(changes.values())
+
+
+def _poll_changes(name: str):
+  """Polls for changes by `_id` and `updated_at` when change streams are unavailable."""
+  collection = _collection(name)
+  _, _, _, ids_in_memory = WATCHED_COLLECTIONS[name]
+  state = _progress.get(name) or _load_state(name)
+
+  position = {
+      'last_id': state.get('last_id'),
+      'last_updated_at': state.get('last_updated_at'),
+      'last_updated_id': state.get('last_updated_id'),
+  }
+  if position['last_id'] is None:
+    position['last_id'] = _newest_id(collection)
+  if position['last_updated_at'] is None:
+    position['last_updated_at'], position['last_updated_id'] = _newest_update(
+        collection)
+  reconciled_at = time.monotonic()
+  logger.info(f"Polling '{name}' for changes every {CHANGE_SYNC_POLL_INTERVAL}s")
+
+  while True:
+    changes = _poll_once(collection, position)
+
+    if ids_in_memory is not None and (
+            time.monotonic() - reconciled_at >= CHANGE_SYNC_RECONCILE_INTERVAL):
+      known = ids_in_memory()
+      if known is not None:
+        current = {str(doc['_id']) for doc in collection.find({}, {'_id': 1})}
+        changes.extend(
+            {'op': 'delete', '_id': job_id, 'doc': None}
+            for job_id in known - current)
+      reconciled_at = time.monotonic()
+
+    _apply(name, changes)
+    _save_state(name, mode='polling', **position)
+    _maybe_rebuild_suggest_index()
+    time.sleep(CHANGE_SYNC_POLL_INTERVAL)
+
+
+def _run_watcher(name: str):
+  """Watches one collection, falling back to polling and retrying on errors."""
+  use_change_stream = True
+  while True:
+    try:
+      if use_change_stream:
+        _watch_change_stream(name)
+      else:
+        _poll_changes(name)
+    except OperationFailure as e:
+      if e.code in CHANGE_STREAMS_UNSUPPORTED_CODES:
+        logger.info(f"Change streams unavailable for '{name}', polling instead")
+        use_change_stream = False
+        continue
+      if e.code in CHANGE_STREAM_HISTORY_LOST_CODES:
+        logger.warning(f"Resume token for '{name}' expired, resyncing")
+        _save_state(name, resume_token=None)
+        _resync(name)
+        continue
+      logger.error(f"Change sync for '{name}' failed: {str(e)}")
+    except PyMongoError as e:
+      logger.error(f"Change sync for '{name}' failed: {str(e)}")
+    except Exception as e:
+      logger.error(f"Unexpected error in change sync for '{name}': {str(e)}")
+    metrics.increment('change_sync.errors', collection=name)
+    time.sleep(RETRY_DELAY_SECONDS)
+
+
+def _resync(name: str):
+  """Rebuilds the caches of a collection after changes may have been missed."""
+  if name == 'linkedin_jobs':
+    from app.services.job_catalog import get_catalog, refresh_catalog
+    from app.services.job_service import invalidate_job_descriptions
+    if get_catalog() is not None:
+      refresh_catalog(force=True)
+    invalidate_job_descriptions()
+    with _suggest_lock:
+      _suggest_state['pending'] = True
+  else:
+    _apply_question_changes([])
+
+
+def capture_sync_start():
+  """
+  Records the current position of every watched collection. Run before the
+  caches load so the watchers replay anything that changes meanwhile.
+  """
+  if not CHANGE_SYNC_ENABLED:
+    return
+  for name in WATCHED_COLLECTIONS:
+    collection = _collection(name)
+    try:
+      with collection.watch(max_await_time_ms=1) as stream:
+        stream.try_next()
+        _progress[name] = {'resume_token': stream.resume_token}
+    except OperationFailure as e:
+      if e.code not in CHANGE_STREAMS_UNSUPPORTED_CODES:
+        raise
+      last_updated_at, last_updated_id = _newest_update(collection)
+      _progress[name] = {'last_id': _newest_id(collection),
+                         'last_updated_at': last_updated_at,
+                         'last_updated_id': last_updated_id}
+
+
+def start_change_sync():
+  """Starts one watcher thread per watched collection if sync is enabled."""
+  if not CHANGE_SYNC_ENABLED:
+    return
+  with _threads_lock:
+    for name in WATCHED_COLLECTIONS:
+      thread = _threads.get(name)
+      if thread is not None and thread.is_alive():
+        continue
+      thread = threading.Thread(
+          target=_run_watcher, args=(name,),
+          name=f'change-sync-{name}', daemon=True)
+      thread.start()
+      _threads[name] = thread
@@ -1,33 +1,128 @@
 """
 Feedback service for providing feedback on interview answers.
 """
+import os
 import logging
 import json
-from app.services.ai_service import generate_llm_response
+from app.services import metrics
+from app.services.ai_service import (
+    build_job_preamble, generate_llm_response, generate_llm_responses,
+    register_context)
+from app.services.cache import get_cache, make_key
 from app.services.exceptions import ServiceError
+from app.services.token_budget import remaining_budget, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+# Feedback modes: 'narrative' (one prompt for the whole interview) or
+# 'map_reduce' (one short prompt per answer plus a short summary call)
+FEEDBACK_MODES = ('narrative', 'map_reduce')
+DEFAULT_FEEDBACK_MODE = os.environ.get('FEEDBACK_MODE', 'narrative')
+FEEDBACK_CACHE_TTL = int(os.environ.get('FEEDBACK_CACHE_TTL', 24 * 3600))
+# Map-reduce mode makes one LLM call per question/answer pair
+FEEDBACK_MAX_QA_PAIRS = int(os.environ.get('FEEDBACK_MAX_QA_PAIRS', 20))
 
-def generate_feedback_for_answers(job: dict, qa_pairs: list):
+# Feedback for identical interviews (same job, questions and answers)
+_feedback_cache = get_cache('feedback', FEEDBACK_CACHE_TTL)
+
+# Token limits applied to user-supplied text before budgeting
+QUESTION_TOKEN_LIMIT = 200
+MIN_ANSWER_TOKENS = 50
+_EMPTY_QA = {'question': '', 'answer': ''}
+
+
+def _fit_answers(qa_pairs: list, *fixed_parts: str) -> list:
+  """
+  Truncates questions and answers so that the prompt, together with its
+  fixed parts, fits the LLM input token budget. The remaining budget is
+  split evenly between the answers.
+  """
+  remaining = remaining_budget(*fixed_parts)
+  if remaining < len(qa_pairs) * (QUESTION_TOKEN_LIMIT + MIN_ANSWER_TOKENS):
+    raise ServiceError(
+        "Too many questions and answers to fit the input token budget.", 400)
+  answer_limit = max(MIN_ANSWER_TOKENS, remaining // len(qa_pairs)
+                     - QUESTION_TOKEN_LIMIT)
+
+  fitted = [{
+      'question': truncate_to_tokens(qa['question'], QUESTION_TOKEN_LIMIT),
+      'answer': truncate_to_tokens(qa['answer'], answer_limit),
+  } for qa in qa_pairs]
+
+  if any(f['answer'] != qa['answer'] or f['question'] != qa['question']
+         for f, qa in zip(fitted, qa_pairs)):
+    metrics.increment('llm.prompt_trimmed', call_site='feedback')
+    logger.info("Truncated interview answers to fit the input token budget")
+  return fitted
+
+
+def _is_ai_error(ai_response: str) -> bool:
+  """Checks whether the AI service returned an error message."""
+  return "Error:" in ai_response or "Unable to generate response" in ai_response
+
+
+def check_qa_pairs(qa_pairs):
+  """
+  Raises ServiceError (400) unless `qa_pairs` is a non-empty list of at
+  most FEEDBACK_MAX_QA_PAIRS `{"question": str, "answer": str}` objects.
+  """
+  if (not qa_pairs or not isinstance(qa_pairs, list) or not all(
+      isinstance(qa, dict) and isinstance(qa.get('question'), str)
+      and isinstance(qa.get('answer'), str) for qa in qa_pairs)):
+    raise ServiceError("Invalid questions and answers provided.", 400)
+  if len(qa_pairs) > FEEDBACK_MAX_QA_PAIRS:
+    raise ServiceError(
+        f"At most {FEEDBACK_MAX_QA_PAIRS} questions and answers are accepted.", 400)
+
+
+def generate_feedback_for_answers(job: dict, qa_pairs: list, mode: str = None,
+                                  preamble: str = None):
   """
   Generates feedback on a list of questions and answers using AI.
+  `preamble` is the job's prebuilt profile, e.g. from an interview session.
   """
   if not job or not isinstance(job, dict):
     raise ServiceError("Invalid job object provided.", 400)
 
-  if not qa_pairs or not isinstance(qa_pairs, list):
-    raise ServiceError("Invalid questions and answers provided.", 400)
+  check_qa_pairs(qa_pairs)
+
+  mode = mode or DEFAULT_FEEDBACK_MODE
+  if mode not in FEEDBACK_MODES:
+    raise ServiceError(
+        f"Invalid feedback mode '{mode}'. Expected one of: {', '.join(FEEDBACK_MODES)}.", 400)
+
+  key = make_key(
+      mode, job.get('title', 'N/A'), job.get('description', ''),
+      job.get('skills', []), qa_pairs)
+  return _feedback_cache.get_or_compute(
+      key, lambda: _generate_feedback(job, qa_pairs, mode, preamble))
+
 
+def _generate_feedback(job: dict, qa_pairs: list, mode: str,
+                       preamble: str = None) -> dict:
+  """Generates feedback in the given mode, bypassing the cache."""
   job_title = job.get('title', 'N/A')
 
+  if mode == 'map_reduce' and len(qa_pairs) > 1:
+    return _generate_map_reduce_feedback(job, qa_pairs)
+
   try:
-    # Construct the prompt for the AI
+    # The job profile is shared with question prompts and cached once
+    if preamble is None:
+      preamble = build_job_preamble(
+          job_title, job.get('description', ''), job.get('skills', []))
+    context_key = register_context(preamble)
+
+    # Construct the prompt for the AI within the input token budget
+    prompt_base = _create_feedback_generation_prompt(
+        job, [_EMPTY_QA] * len(qa_pairs))
+    qa_pairs = _fit_answers(qa_pairs, preamble, prompt_base)
     prompt = _create_feedback_generation_prompt(job, qa_pairs)
 
     # Generate feedback using the AI service
-    ai_response = generate_llm_response(prompt)
-    if "Error:" in ai_response or "Unable to generate response" in ai_response:
+    ai_response = generate_llm_response(
+        prompt, context_key=context_key, call_site='feedback')
+    if _is_ai_error(ai_response):
       logger.error(f"AI service returned an error: {ai_response}")
       raise ServiceError("Failed to generate feedback from AI service.", 502)
 
@@ -37,6 +132,7 @@ def generate_feedback_for_answers(job: dict, qa_pairs: list):
     result = {
         "feedback": parsed_response["feedback"],
         "job_title": job_title,
+        "mode": "narrative",
     }
 
     return result
@@ -48,12 +144,99 @@ def generate_feedback_for_answers(job: dict, qa_pairs: list):
         "An unexpected error occurred while generating feedback.", 500)
 
 
-def _create_feedback_generation_prompt(job: dict, qa_pairs: list) -> str:
-  """Creates a detailed prompt for the AI to generate feedback."""
+def _generate_map_reduce_feedback(job: dict, qa_pairs: list) -> dict:
+  """
+  Evaluates every answer concurrently with a short prompt, then synthesizes
+  the overall assessment from the per-question results in one small call.
+  Latency is bounded by the slowest single answer plus the summary call.
+  """
+  job_title = job.get('title', 'N/A')
+
+  try:
+    # Map: one short evaluation per question/answer pair, each within budget
+    prompt_base = _create_answer_feedback_prompt(job, _EMPTY_QA)
+    prompts = [
+        _create_answer_feedback_prompt(job, _fit_answers([qa], prompt_base)[0])
+        for qa in qa_pairs
+    ]
+    answer_responses = generate_llm_responses(
+        prompts, call_site='feedback_answer')
+
+    question_feedback = []
+    for qa, ai_response in zip(qa_pairs, answer_responses):
+      failed = _is_ai_error(ai_response)
+      if failed:
+        logger.error(f"AI service returned an error: {ai_response}")
+      question_feedback.append({
+          "question": qa['question'],
+          "feedback": None if failed else ai_response,
+      })
+
+    evaluated = [qf for qf in question_feedback if qf['feedback']]
+    if not evaluated:
+      raise ServiceError("Failed to generate feedback from AI service.", 502)
+
+    # Reduce: short overall verdict from the per-question evaluations
+    summary_response = generate_llm_response(
+        _create_overall_feedback_prompt(job, evaluated),
+        call_site='feedback_summary')
+    if _is_ai_error(summary_response):
+      logger.error(f"AI service returned an error: {summary_response}")
+      raise ServiceError("Failed to generate feedback from AI service.", 502)
 
+    return {
+        "feedback": _parse_ai_feedback_response(summary_response)["feedback"],
+        "question_feedback": question_feedback,
+        "job_title": job_title,
+        "mode": "map_reduce",
+    }
+  except ServiceError:
+    raise
+  except Exception as e:
+    logger.error(f"Error generating feedback for job '{job_title}': {str(e)}")
+    raise ServiceError(
+        "An unexpected error occurred while generating feedback.", 500)
+
+
+def _create_answer_feedback_prompt(job: dict, qa: dict) -> str:
+  """Creates a short prompt evaluating a single answer."""
   job_title = job.get('title', 'N/A')
-  job_description = job.get('description', '')
   job_skills = ", ".join(job.get('skills', []))
+
+  return f"""
+You are an expert interviewer for the role of "{job_title}" (key skills: {job_skills}).
+
+Question: {qa['question']}
+Answer: {qa['answer']}
+
+In at most 4 sentences, assess this answer's correctness, depth and clarity, and give one specific improvement. Write plain prose without headings or lists.
+"""
+
+
+def _create_overall_feedback_prompt(job: dict, question_feedback: list) -> str:
+  """Creates a short prompt synthesizing the overall interview verdict."""
+  job_title = job.get('title', 'N/A')
+
+  evaluations = ""
+  for i, qf in enumerate(question_feedback):
+    evaluations += f"Question {i + 1}: {qf['question']}\n"
+    evaluations += f"Evaluation {i + 1}: {qf['feedback']}\n\n"
+
+  return f"""
+You are an expert interviewer for the role of "{job_title}". Below are your evaluations of each of the candidate's answers.
+
+{evaluations}
+In one short paragraph, summarize the candidate's overall performance and fit for the role, and finish with a brief hiring recommendation. Do not repeat the per-question evaluations or use headings.
+"""
+
+
+def _create_feedback_generation_prompt(job: dict, qa_pairs: list) -> str:
+  """
+  Creates a detailed prompt for the AI to generate feedback.
+  The job profile itself is supplied through the registered job context.
+  """
+
+  job_title = job.get('title', 'N/A')
   num_questions = len(qa_pairs)
 
   questions_and_answers = ""
@@ -64,15 +247,7 @@ def _create_feedback_generation_prompt(job: dict, qa_pairs: list) -> str:
   if num_questions == 1:
     # Single question feedback
     prompt = f"""
-As a highly 10x expert experienced interviewer evaluating a candidate for the role of "{job_title}", review the following interview answer in depth.
-
-Job Overview:
-
-    Title: {job_title}
-
-    Summary: {job_description}
-
-    Key Skills Required: {job_skills}
+As a highly 10x expert experienced interviewer evaluating a candidate for the role of "{job_title}" described in the job profile above, review the following interview answer in depth.
 
 Interview Response:
 {questions_and_answers}
@@ -84,15 +259,7 @@ Focus your evaluation on relevance, clarity, technical depth, alignment with the
   else:
     # 5 questions - feedback for each question + overall interview feedback
     prompt = f"""
-You are a 10x expert experienced interviewer assessing a candidate for the role of "{job_title}".
-
-Role Overview:
-
-    Title: {job_title}
-
-    Description: {job_description}
-
-    Key Skills: {job_skills}
+You are a 10x expert experienced interviewer assessing a candidate for the role of "{job_title}" described in the job profile above.
 
 Candidate’s Responses to 5 Interview Questions:
 {questions_and_answers}
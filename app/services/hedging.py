@@ -0,0 +1,155 @@
+"""
+Hedged requests for slow LLM calls.
+
+When hedging is enabled, a call that has not returned by the rolling
+LLM_HEDGE_PERCENTILE latency of its call site is issued a second time; the
+first response wins and the other is cancelled (or, if already running,
+its result is discarded). Hedges are paid for from a token bucket that
+earns LLM_HEDGE_BUDGET tokens per call, so they stay within that share of
+extra calls.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError,
+    wait)
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_HEDGING_ENABLED = os.environ.get(
+    'LLM_HEDGING_ENABLED', 'False').lower() == 'true'
+LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', 90))
+LLM_HEDGE_BUDGET = float(os.environ.get('LLM_HEDGE_BUDGET', 0.05))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get('LLM_HEDGE_MIN_SAMPLES', 20))
+LLM_HEDGE_WINDOW = int(os.environ.get('LLM_HEDGE_WINDOW', 200))
+LLM_HEDGE_WORKERS = int(os.environ.get('LLM_HEDGE_WORKERS', 16))
+# Unspent budget is capped so a quiet period cannot fund a burst of hedges
+MAX_HEDGE_TOKENS = 10.0
+
+
+class LatencyTracker:
+  """Rolling window of call latencies per call site."""
+
+  def __init__(self, window: int = LLM_HEDGE_WINDOW):
+    self._window = window
+    self._samples = {}
+    self._lock = threading.Lock()
+
+  def record(self, call_site: str, seconds: float):
+    with self._lock:
+      samples = self._samples.get(call_site)
+      if samples is None:
+        samples = self._samples[call_site] = deque(maxlen=self._window)
+      samples.append(seconds)
+
+  def percentile(self, call_site: str, percentile: float = LLM_HEDGE_PERCENTILE,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+    """Returns the latency percentile in seconds, or None without enough samples."""
+    with self._lock:
+      samples = sorted(self._samples.get(call_site, ()))
+    if len(samples) < max(min_samples, 1):
+      return None
+    index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+    return samples[index]
+
+
+class HedgeBudget:
+  """Token bucket limiting hedges to a fraction of all calls."""
+
+  def __init__(self, ratio: float = LLM_HEDGE_BUDGET, max_tokens: float = MAX_HEDGE_TOKENS):
+    self._ratio = ratio
+    self._max_tokens = max_tokens
+    self._tokens = 0.0
+    self._lock = threading.Lock()
+
+  def deposit(self):
+    """Called for every call; earns `ratio` of a hedge."""
+    with self._lock:
+      self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+  def try_acquire(self) -> bool:
+    """Spends one hedge if the budget allows it."""
+    with self._lock:
+      if self._tokens >= 1.0:
+        self._tokens -= 1.0
+        return True
+      return False
+
+
+_tracker = LatencyTracker()
+_budget = HedgeBudget()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  global _executor, _executor_lock
+  _executor = None
+  _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+  # Separate from the LLM executor: hedged calls may start from its threads
+  global _executor
+  if _executor is None:
+    with _executor_lock:
+      if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=LLM_HEDGE_WORKERS, thread_name_prefix='llm-hedge')
+  return _executor
+
+
+def _timed(fn, call_site: str):
+  start = time.monotonic()
+  result = fn()
+  _tracker.record(call_site, time.monotonic() - start)
+  return result
+
+
+def hedged_call(fn, call_site: str = 'default'):
+  """
+  Calls `fn` and returns its result, issuing one identical hedge call if
+  it is slower than the call site's rolling percentile and the budget
+  allows. Runs `fn` directly when hedging is disabled.
+  """
+  if not LLM_HEDGING_ENABLED:
+    return fn()
+
+  _budget.deposit()
+  executor = _get_executor()
+  primary = executor.submit(_timed, fn, call_site)
+  delay = _tracker.percentile(call_site)
+  if delay is None:
+    return primary.result()
+  try:
+    return primary.result(timeout=delay)
+  except FutureTimeoutError:
+    pass
+
+  if not _budget.try_acquire():
+    metrics.increment('llm.hedges', call_site=call_site, outcome='denied')
+    return primary.result()
+
+  metrics.increment('llm.hedges', call_site=call_site, outcome='issued')
+  hedge = executor.submit(_timed, fn, call_site)
+  pending = {primary, hedge}
+  error = None
+  while pending:
+    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+      if future.exception() is None:
+        for loser in pending:
+          loser.cancel()
+        outcome = 'won' if future is hedge else 'lost'
+        metrics.increment('llm.hedges', call_site=call_site, outcome=outcome)
+        return future.result()
+      error = future.exception()
+  raise error
@@ -0,0 +1,412 @@
+"""
+Compact in-memory catalog of LinkedIn postings.
+
+The postings corpus (~9,300 rows) is small enough to keep in process. Each
+posting is a `__slots__` record with interned categorical strings, and the
+catalog keeps bitset indexes (Python ints, one bit per record) for:
+- query tokens in the job title and skills (inverted index),
+- skills, over a skill vocabulary,
+- job levels.
+A search intersects these bitsets, so steady-state searches never touch the
+network. The catalog is rebuilt from MongoDB on a schedule and swapped in
+atomically; in between, `app/services/change_sync.py` applies individual
+inserts, updates and deletes to a copy of the indexes that then replaces
+them, so searches running concurrently keep the version they started with.
+
+With CATALOG_SNAPSHOT_DIR set, the catalog is loaded from the memory-mapped
+snapshot written by the ingestion pipeline (`app/services/snapshot.py`)
+whenever it matches the collection, and a rebuild is skipped entirely when
+the collection has not changed since the last load.
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from models import get_db
+from app.services.skills import normalize_skill_list
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+JOB_CATALOG_ENABLED = os.environ.get(
+    'JOB_CATALOG_ENABLED', 'False').lower() == 'true'
+JOB_CATALOG_REFRESH_INTERVAL = int(
+    os.environ.get('JOB_CATALOG_REFRESH_INTERVAL', 900))
+
+# Database configuration
+COLLECTION_NAME = 'linkedin_jobs'
+CATALOG_PROJECTION = {
+    "job_title": 1, "company": 1, "job_location": 1, "job_skills": 1,
+    "skills_normalized": 1, "job level": 1, "job_type": 1, "job_link": 1,
+    "first_seen": 1,
+}
+
+TITLE_TOKEN_WEIGHT = 1.0
+SKILL_TOKEN_WEIGHT = 0.5
+# Bitset indexes of a catalog, as stored in snapshots
+INDEX_NAMES = ('title_index', 'skill_token_index', 'skill_index', 'level_index')
+# Fields counted by search_with_facets
+FACET_FIELDS = ('job_level', 'job_type', 'location', 'skills')
+_TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+_catalog = None
+_refresher_thread = None
+_refresher_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list:
+  """Lowercases and splits text into search tokens."""
+  return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _intern(value) -> str:
+  return sys.intern(str(value)) if value is not None else None
+
+
+def _bit_indexes(bits: int) -> list:
+  """Returns the indexes of the set bits, lowest first."""
+  binary = bin(bits)[:1:-1]
+  indexes = []
+  index = binary.find('1')
+  while index != -1:
+    indexes.append(index)
+    index = binary.find('1', index + 1)
+  return indexes
+
+
+class JobRecord:
+  """A single posting in the catalog."""
+  __slots__ = ('job_id', 'job_title', 'company', 'job_location', 'job_level',
+               'job_type', 'job_link', 'first_seen', 'skills')
+
+  def __init__(self, doc: dict, skills: tuple):
+    self.job_id = str(doc.get('_id')) if doc.get('_id') is not None else None
+    self.job_title = doc.get('job_title', 'N/A')
+    self.company = _intern(doc.get('company', 'N/A'))
+    self.job_location = _intern(doc.get('job_location', 'N/A'))
+    self.job_level = _intern(doc.get('job level', 'N/A'))
+    self.job_type = _intern(doc.get('job_type', 'N/A'))
+    self.job_link = doc.get('job_link')
+    self.first_seen = doc.get('first_seen')
+    self.skills = skills
+
+  def to_document(self, score: float = None) -> dict:
+    """Returns the posting in the shape of a `linkedin_jobs` document."""
+    doc = {
+        "job_title": self.job_title,
+        "company": self.company,
+        "job_location": self.job_location,
+        "job_skills": ', '.join(self.skills),
+        "skills_normalized": list(self.skills),
+        "job level": self.job_level,
+        "job_type": self.job_type,
+        "first_seen": self.first_seen,
+    }
+    if self.job_link:
+      doc["job_link"] = self.job_link
+    if score is not None:
+      doc["score"] = score
+    return doc
+
+
+class CatalogIndexes:
+  """
+  Records and bitset indexes of one catalog version. Published versions are
+  never modified: writers change a copy and swap it in, so a reader that
+  took a version keeps a consistent view of it.
+  """
+  __slots__ = ('records', 'title_index', 'skill_token_index', 'skill_index',
+               'level_index', 'positions', 'all_bits', 'substring_cache')
+
+  def __init__(self):
+    self.records = []
+    self.title_index = {}
+    self.skill_token_index = {}
+    self.skill_index = {}
+    self.level_index = {}
+    self.positions = {}
+    self.all_bits = 0
+    # (index name, needle) -> bits; only valid for this version
+    self.substring_cache = {}
+
+  def copy(self):
+    indexes = CatalogIndexes()
+    indexes.records = list(self.records)
+    for name in INDEX_NAMES:
+      setattr(indexes, name, dict(getattr(self, name)))
+    indexes.positions = dict(self.positions)
+    indexes.all_bits = self.all_bits
+    return indexes
+
+  def _record_keys(self, record: JobRecord):
+    """Yields (index, key) for every index entry of a record."""
+    for token in set(tokenize(record.job_title)):
+      yield self.title_index, token
+    for token in set(tokenize(' '.join(record.skills))):
+      yield self.skill_token_index, token
+    for skill in {s.lower() for s in record.skills}:
+      yield self.skill_index, skill
+    yield self.level_index, (record.job_level or '').lower()
+
+  def append(self, record: JobRecord):
+    position = len(self.records)
+    self.records.append(record)
+    self.set_bits(position, record)
+
+  def set_bits(self, position: int, record: JobRecord):
+    bit = 1 << position
+    for index, key in self._record_keys(record):
+      index[key] = index.get(key, 0) | bit
+    self.all_bits |= bit
+    if record.job_id is not None:
+      self.positions[record.job_id] = position
+
+  def clear_bits(self, position: int, record: JobRecord):
+    mask = ~(1 << position)
+    for index, key in self._record_keys(record):
+      bits = index.get(key, 0) & mask
+      if bits:
+        index[key] = bits
+      else:
+        index.pop(key, None)
+    self.all_bits &= mask
+
+
+class JobCatalog:
+  """
+  Catalog of postings with bitset indexes. Built in one pass from MongoDB;
+  `apply` (and `upsert`/`remove`) apply changes from the change sync
+  copy-on-write, so searches never see a partly applied change.
+  """
+
+  def __init__(self, docs, posting_skills):
+    self.loaded_at = time.time()
+    # Source version of the postings (see snapshot.collection_version)
+    self.version = None
+    self._posting_skills = posting_skills
+    self._write_lock = threading.Lock()
+
+    indexes = CatalogIndexes()
+    for doc in docs:
+      indexes.append(self._make_record(doc))
+    self._indexes = indexes
+
+  @classmethod
+  def from_parts(cls, records: list, indexes: dict, posting_skills):
+    """Builds a catalog from prebuilt records and bitset indexes (snapshots)."""
+    catalog = cls((), posting_skills)
+    loaded = CatalogIndexes()
+    loaded.records = records
+    for name in INDEX_NAMES:
+      setattr(loaded, name, indexes[name])
+    loaded.all_bits = (1 << len(records)) - 1
+    loaded.positions = {
+        record.job_id: position for position, record in enumerate(records)
+        if record.job_id is not None
+    }
+    catalog._indexes = loaded
+    return catalog
+
+  def __len__(self):
+    return len(self._indexes.positions)
+
+  @property
+  def records(self) -> list:
+    return self._indexes.records
+
+  def index(self, name: str) -> dict:
+    """Returns one of the INDEX_NAMES bitset indexes of the current version."""
+    return getattr(self._indexes, name)
+
+  def _make_record(self, doc: dict) -> JobRecord:
+    skills = tuple(_intern(s) for s in self._posting_skills(doc, limit=None))
+    return JobRecord(doc, skills)
+
+  def ids(self) -> set:
+    """Returns the ids of all postings in the catalog."""
+    return set(self._indexes.positions)
+
+  def get(self, job_id: str):
+    """Returns the record of a posting, or None."""
+    indexes = self._indexes
+    position = indexes.positions.get(job_id)
+    return indexes.records[position] if position is not None else None
+
+  def upsert(self, doc: dict):
+    """Adds a posting or replaces the indexed version of it."""
+    self.apply([('upsert', doc)])
+
+  def remove(self, job_id: str):
+    """Removes a posting. Its slot stays empty until the next full rebuild."""
+    self.apply([('remove', job_id)])
+
+  def apply(self, changes: list):
+    """
+    Applies `('upsert', doc)` and `('remove', job_id)` changes in order to a
+    copy of the indexes and swaps it in once.
+    """
+    records = [(op, self._make_record(value) if op == 'upsert' else value)
+               for op, value in changes]
+    with self._write_lock:
+      indexes = self._indexes.copy()
+      for op, value in records:
+        if op == 'upsert':
+          position = indexes.positions.get(value.job_id)
+          if position is None:
+            indexes.append(value)
+          else:
+            indexes.clear_bits(position, indexes.records[position])
+            indexes.records[position] = value
+            indexes.set_bits(position, value)
+        else:
+          position = indexes.positions.pop(value, None)
+          if position is not None:
+            indexes.clear_bits(position, indexes.records[position])
+            indexes.records[position] = None
+      self._indexes = indexes
+
+  @staticmethod
+  def _substring_bits(indexes: CatalogIndexes, index_name: str, needle: str) -> int:
+    """OR of all index entries containing `needle` (regex-like matching)."""
+    cache_key = (index_name, needle)
+    bits = indexes.substring_cache.get(cache_key)
+    if bits is None:
+      bits = 0
+      for key, key_bits in getattr(indexes, index_name).items():
+        if needle in key:
+          bits |= key_bits
+      indexes.substring_cache[cache_key] = bits
+    return bits
+
+  def search(self, query: str, tech_skills: list = None,
+             job_level: str = None, limit: int = 10) -> list:
+    """
+    Returns up to `limit` matching postings as documents, best match first.
+    Every query token must appear in the title or skills; tech_skills match
+    canonical skills exactly and job_level by case-insensitive substring,
+    like the MongoDB query.
+    """
+    indexes = self._indexes
+    ranked = self._rank(indexes, query, tech_skills, job_level)
+    return [indexes.records[index].to_document(score)
+            for index, score in ranked[:limit]]
+
+  def search_with_facets(self, query: str, tech_skills: list = None,
+                         job_level: str = None, limit: int = 10,
+                         facet_candidates: int = 1000):
+    """
+    Like `search`, and also counts the job level, job type, location and
+    skill values of the best `facet_candidates` matches. Returns
+    `(documents, counters, candidates, capped)`.
+    """
+    indexes = self._indexes
+    ranked = self._rank(indexes, query, tech_skills, job_level)
+    counted = ranked[:facet_candidates]
+    counters = {field: Counter() for field in FACET_FIELDS}
+    for index, _ in counted:
+      record = indexes.records[index]
+      counters['job_level'][record.job_level] += 1
+      counters['job_type'][record.job_type] += 1
+      counters['location'][record.job_location] += 1
+      counters['skills'].update(record.skills)
+    documents = [indexes.records[index].to_document(score)
+                 for index, score in ranked[:limit]]
+    return documents, counters, len(counted), len(ranked) > len(counted)
+
+  def _rank(self, indexes: CatalogIndexes, query: str, tech_skills: list = None,
+            job_level: str = None) -> list:
+    """Returns `(record index, score)` of every match, best match first."""
+    tokens = tokenize(query)
+    if not tokens:
+      return []
+
+    candidates = indexes.all_bits
+    for token in tokens:
+      candidates &= (indexes.title_index.get(token, 0)
+                     | indexes.skill_token_index.get(token, 0))
+      if not candidates:
+        return []
+
+    if tech_skills:
+      skill_bits = 0
+      for skill in normalize_skill_list(tech_skills, limit=None):
+        skill_bits |= indexes.skill_index.get(skill.lower(), 0)
+      candidates &= skill_bits
+    if job_level:
+      candidates &= self._substring_bits(
+          indexes, 'level_index', job_level.strip().lower())
+
+    if not candidates:
+      return []
+
+    # Every token matches in the skills at least; title matches add the rest
+    scores = dict.fromkeys(_bit_indexes(candidates), SKILL_TOKEN_WEIGHT * len(tokens))
+    for token in tokens:
+      for index in _bit_indexes(candidates & indexes.title_index.get(token, 0)):
+        scores[index] += TITLE_TOKEN_WEIGHT - SKILL_TOKEN_WEIGHT
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def get_catalog():
+  """Returns the loaded catalog, or None when disabled or not loaded yet."""
+  return _catalog if JOB_CATALOG_ENABLED else None
+
+
+def refresh_catalog(force: bool = False) -> int:
+  """
+  Loads the catalog and swaps it in. Returns its size. The current catalog
+  is kept when the collection has not changed since it was loaded; a
+  matching snapshot is used instead of reading every posting.
+  """
+  global _catalog
+  from app.services import snapshot
+  from app.services.job_service import posting_skills
+
+  def postings():
+    return get_db()[COLLECTION_NAME]
+
+  start = time.perf_counter()
+  current, version = snapshot.usable_snapshot('postings', postings)
+  if (not force and version is not None and _catalog is not None
+      and _catalog.version == version):
+    logger.debug("Job catalog is up to date")
+    return len(_catalog)
+
+  if current is not None:
+    catalog = current.load_catalog(posting_skills)
+    source = f"snapshot {current.version}"
+  else:
+    catalog = JobCatalog(postings().find({}, CATALOG_PROJECTION), posting_skills)
+    source = "MongoDB"
+  catalog.version = version
+  _catalog = catalog
+  logger.info(
+      f"Loaded {len(catalog)} postings into the job catalog from {source} in "
+      f"{(time.perf_counter() - start) * 1000:.0f}ms")
+  return len(catalog)
+
+
+def _run_refresher(interval: int):
+  while True:
+    time.sleep(interval)
+    try:
+      refresh_catalog()
+    except Exception as e:
+      logger.error(f"Job catalog refresh failed: {str(e)}")
+
+
+def start_catalog_refresher(interval: int = JOB_CATALOG_REFRESH_INTERVAL):
+  """Starts the scheduled catalog refresh thread if the catalog is enabled."""
+  global _refresher_thread
+  if not JOB_CATALOG_ENABLED:
+    return
+  with _refresher_lock:
+    if _refresher_thread is not None and _refresher_thread.is_alive():
+      return
+    _refresher_thread = threading.Thread(
+        target=_run_refresher, args=(interval,),
+        name='job-catalog-refresher', daemon=True)
+    _refresher_thread.start()
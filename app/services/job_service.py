@@ -5,9 +5,16 @@ import os
 import logging
 import re
 import json
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from models import get_db
-from app.services.ai_service import generate_llm_response
+from app.services.ai_service import generate_llm_response, get_llm_executor
+from app.services.cache import get_cache, make_key
+from app.services.ranking import candidate_limit, rank_jobs
+from app.services.job_catalog import FACET_FIELDS, get_catalog
+from app.services.skills import normalize_skill_list, split_skill_string
+from app.services.slow_queries import find_logged
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,115 @@ MONGODB_URI = os.environ.get('MONGODB_URI')
 DATABASE_NAME = os.environ.get('DATABASE_NAME', 'job_postings_db')
 COLLECTION_NAME = 'linkedin_jobs'
 
+# Cache configuration
+JOB_DESCRIPTION_CACHE_SIZE = int(
+    os.environ.get('JOB_DESCRIPTION_CACHE_SIZE', 1000))
+JOB_DESCRIPTION_CACHE_TTL = int(
+    os.environ.get('JOB_DESCRIPTION_CACHE_TTL', 7 * 24 * 3600))
+JOB_LISTINGS_CACHE_TTL = int(os.environ.get('JOB_LISTINGS_CACHE_TTL', 3600))
+
+# Generated descriptions of real postings, keyed by job_link
+_description_cache = get_cache(
+    'job_descriptions', JOB_DESCRIPTION_CACHE_TTL, JOB_DESCRIPTION_CACHE_SIZE)
+# AI fallback listings, keyed by the search parameters
+_listings_cache = get_cache('job_listings', JOB_LISTINGS_CACHE_TTL)
+_AI_ERROR_PREFIXES = ('Error', 'Unable to generate response')
+
+# Facet counts are taken over the best JOB_FACET_CANDIDATES matches
+JOB_FACET_CANDIDATES = int(os.environ.get('JOB_FACET_CANDIDATES', 1000))
+JOB_FACET_SIZE = int(os.environ.get('JOB_FACET_SIZE', 10))
+# Posting field (or array of values) counted for each facet
+FACET_SOURCES = {
+    'job_level': 'job level',
+    'job_type': 'job_type',
+    'location': 'job_location',
+    'skills': 'skills_normalized',
+}
+
+# Lowercased `job level`, written at ingestion by data/normalize_skills.py
+LEVEL_FIELD = 'job_level_normalized'
+JOB_LEVELS_CACHE_TTL = int(os.environ.get('JOB_LEVELS_CACHE_TTL', 600))
+# Distinct normalized job levels of the postings
+_levels_cache = get_cache('job_levels', JOB_LEVELS_CACHE_TTL, 1)
+# Whether any posting has `skills_normalized` yet, rechecked as often
+_skills_field_cache = get_cache('skills_normalized', JOB_LEVELS_CACHE_TTL, 1)
+
+# Only the fields needed for ranking and formatting
+SEARCH_PROJECTION = {
+    "job_title": 1, "company": 1, "job_location": 1,
+    "job_skills": 1, "skills_normalized": 1, "job level": 1,
+    "job_type": 1, "job_link": 1, "first_seen": 1, "_id": 0,
+}
+
+# Batch search configuration
+JOB_BATCH_MAX_SEARCHES = int(os.environ.get('JOB_BATCH_MAX_SEARCHES', 10))
+# Largest `limit` of a search; every result may need a generated description
+JOB_SEARCH_MAX_LIMIT = int(os.environ.get('JOB_SEARCH_MAX_LIMIT', 20))
+JOB_SEARCH_WORKERS = int(os.environ.get('JOB_SEARCH_WORKERS', 4))
+
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  global _search_executor, _search_executor_lock
+  _search_executor = None
+  _search_executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+  """Returns the executor used for the searches of a batch."""
+  global _search_executor
+  if _search_executor is None:
+    with _search_executor_lock:
+      if _search_executor is None:
+        _search_executor = ThreadPoolExecutor(
+            max_workers=JOB_SEARCH_WORKERS, thread_name_prefix='job-search')
+  return _search_executor
+
+
+def level_key(job_level) -> str:
+  """Normalizes a job level to the form stored in LEVEL_FIELD."""
+  return ' '.join(str(job_level or '').split()).lower()
+
+
+def _matching_levels(job_level: str):
+  """
+  Returns the stored normalized levels containing the requested one (the
+  level filter matches by substring, e.g. "senior" finds "mid senior"), or
+  None when no posting has LEVEL_FIELD yet.
+  """
+  levels = _levels_cache.get_or_compute(
+      'all', lambda: sorted(
+          level for level in get_db()[COLLECTION_NAME].distinct(LEVEL_FIELD)
+          if level))
+  if not levels:
+    return None
+  wanted = level_key(job_level)
+  return [level for level in levels if wanted in level]
+
+
+def _skills_normalized() -> bool:
+  """Whether the postings carry `skills_normalized` (data/normalize_skills.py)."""
+  return _skills_field_cache.get_or_compute(
+      'any', lambda: get_db()[COLLECTION_NAME].find_one(
+          {"skills_normalized": {"$exists": True}}, {"_id": 1}) is not None)
+
+
+def _skills_regex(tech_skills: list) -> str:
+  """
+  Matches any requested skill, raw or canonical, as a whole word of the
+  raw `job_skills` string (so 'ts' does not match 'Reports').
+  """
+  spellings = set(normalize_skill_list(tech_skills, limit=None))
+  spellings.update(' '.join(s.split()) for s in tech_skills
+                   if isinstance(s, str) and len(s.strip()) > 1)
+  alternatives = "|".join(re.escape(s) for s in sorted(spellings))
+  return rf"(?<![\w])(?:{alternatives})(?![\w])"
+
 
 def _build_search_query(
         query: str,
@@ -24,13 +140,24 @@ def _build_search_query(
   """Builds the MongoDB search query."""
   search_conditions = [{"$text": {"$search": f'"{query}"'}}]
   if job_level:
-    search_conditions.append(
-        {"job level": {"$regex": job_level, "$options": "i"}})
-
-  if tech_skills:
-    skills_regex = "|".join(re.escape(skill) for skill in tech_skills)
-    search_conditions.append(
-        {"job_skills": {"$regex": skills_regex, "$options": "i"}})
+    levels = _matching_levels(job_level)
+    if levels is None:
+      # Postings not normalized yet: match the raw field
+      search_conditions.append(
+          {"job level": {"$regex": re.escape(job_level.strip()), "$options": "i"}})
+    else:
+      # Equality on an indexed field, resolved against the few known levels
+      search_conditions.append({LEVEL_FIELD: {"$in": levels}})
+
+  skills = normalize_skill_list(tech_skills, limit=None)
+  if skills:
+    if _skills_normalized():
+      # Postings store their canonical skills at ingestion (indexed field)
+      search_conditions.append({"skills_normalized": {"$in": skills}})
+    else:
+      # Postings not normalized yet: match the raw field
+      search_conditions.append(
+          {"job_skills": {"$regex": _skills_regex(tech_skills), "$options": "i"}})
 
   return {"$and": search_conditions} if len(
       search_conditions) > 1 else search_conditions[0]
@@ -56,101 +183,417 @@ Return only the formatted description. DO NOT INLCUDE markdown backticks."""
 
   try:
     logger.info(f"Generating job description for {job_title} at {company}")
-    response = generate_llm_response(prompt)
+    response = generate_llm_response(prompt, call_site='job_description')
     return response.strip()
   except Exception as e:
     logger.error(f"Failed to generate job description: {str(e)}")
     return f"## {job_title}\n\n**Company:** {company}\n\n**Location:** {location}\n\nWe are looking for a talented {job_title} to join our team."
 
 
+def invalidate_job_descriptions(job_links=None):
+  """Drops cached descriptions of changed postings, or all of them when no links are given."""
+  if job_links is None:
+    _description_cache.clear()
+  else:
+    _description_cache.delete(*job_links)
+
+
+def _is_generated_description(description: str) -> bool:
+  return not description.startswith(_AI_ERROR_PREFIXES)
+
+
+def _describe_job(job: dict) -> str:
+  """Returns the AI-powered markdown description of a posting, reused until it changes."""
+  job_title = job.get('job_title', 'N/A')
+  company = job.get('company', 'N/A')
+
+  def describe():
+    return generate_job_description(
+        job_title, company, posting_skills(job), job.get('job level', 'N/A'),
+        job.get('job_type', 'N/A'), job.get('job_location', 'N/A'))
+
+  job_link = job.get('job_link')
+  if job_link:
+    return _description_cache.get_or_compute(
+        job_link, describe, should_cache=_is_generated_description)
+  return describe()
+
+
+def _job_card(job: dict, description: str = None) -> dict:
+  """Formats a raw posting for the API, with the given description."""
+  return {
+      "title": job.get('job_title', 'N/A'),
+      "company": job.get('company', 'N/A'),
+      "location": job.get('job_location', 'N/A'),
+      "description": description,
+      "skills": posting_skills(job),
+      "job_level": job.get('job level', 'N/A'),
+      "job_type": job.get('job_type', 'N/A'),
+      "job_link": job.get('job_link', "https://www.linkedin.com/jobs/search"),
+      "first_seen": job.get('first_seen', datetime.now().strftime('%Y-%m-%d'))
+  }
+
+
 def _format_job_results(raw_jobs: list) -> list:
   """Formats raw job data from the database."""
-  formatted_jobs = []
-  
-  for job in raw_jobs:
-    job_title = job.get('job_title', 'N/A')
-    company = job.get('company', 'N/A')
-    location = job.get('job_location', 'N/A')
-    skills = parse_skills(job.get('job_skills', ''))
-    job_level = job.get('job level', 'N/A')
-    job_type = job.get('job_type', 'N/A')
-    
-    # Generate AI-powered markdown description
-    description = generate_job_description(job_title, company, skills, job_level, job_type, location)
-    
-    formatted_job = {
-        "title": job_title,
-        "company": company,
-        "location": location,
-        "description": description,
-        "skills": skills,
-        "job_level": job_level,
-        "job_type": job_type,
-        "job_link": job.get('job_link', "https://www.linkedin.com/jobs/search"),
-        "first_seen": job.get('first_seen', datetime.now().strftime('%Y-%m-%d'))
-    }
-    formatted_jobs.append(formatted_job)
-  
-  return formatted_jobs
+  return [_job_card(job, _describe_job(job)) for job in raw_jobs]
 
 
-def search_jobs(
+def get_job(job_link: str):
+  """Returns a posting formatted like a search result, or None if unknown."""
+  posting = get_db()[COLLECTION_NAME].find_one(
+      {"job_link": job_link}, SEARCH_PROJECTION)
+  if posting is None:
+    return None
+  return _format_job_results([posting])[0]
+
+
+def _find_candidates(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10) -> list:
+  """Overfetches search candidates from MongoDB ordered by textScore."""
+  db = get_db()
+  collection = db[COLLECTION_NAME]
+
+  mongodb_query = _build_search_query(query, tech_skills, job_level)
+
+  projection = {**SEARCH_PROJECTION, "score": {"$meta": "textScore"}}
+  sort = [("score", {"$meta": "textScore"})]
+
+  return find_logged(collection, mongodb_query, projection, sort,
+                     candidate_limit(limit), source='search_jobs')
+
+
+def _find_candidates_with_facets(
         query: str,
         tech_skills: list = None,
         job_level: str = None,
         limit: int = 10):
   """
-  Search for jobs from MongoDB, with an AI-powered fallback.
+  Fetches the search candidates and the facet counts in one aggregation.
+  The best JOB_FACET_CANDIDATES matches by textScore are counted, and the
+  candidate page is taken from the top of the same set.
   """
-  try:
-    db = get_db()
-    collection = db[COLLECTION_NAME]
-
-    mongodb_query = _build_search_query(query, tech_skills, job_level)
+  collection = get_db()[COLLECTION_NAME]
+
+  facet_stages = {
+      "page": [
+          {"$limit": candidate_limit(limit)},
+          {"$project": {**SEARCH_PROJECTION, "score": 1}},
+      ],
+      "candidates": [{"$count": "count"}],
+  }
+  for facet, field in FACET_SOURCES.items():
+    stages = [{"$limit": JOB_FACET_CANDIDATES}]
+    if facet == 'skills':
+      stages.append({"$unwind": f"${field}"})
+    facet_stages[facet] = stages + [
+        {"$match": {field: {"$nin": [None, '', 'N/A']}}},
+        {"$sortByCount": f"${field}"},
+        {"$limit": JOB_FACET_SIZE},
+    ]
+
+  pipeline = [
+      {"$match": _build_search_query(query, tech_skills, job_level)},
+      {"$addFields": {"score": {"$meta": "textScore"}}},
+      {"$sort": {"score": -1}},
+      # One more than the cap tells whether the counts were truncated
+      {"$limit": JOB_FACET_CANDIDATES + 1},
+      {"$facet": facet_stages},
+  ]
+  result = next(collection.aggregate(pipeline), {})
+
+  candidates = (result.get("candidates") or [{"count": 0}])[0]["count"]
+  counters = {
+      facet: {bucket["_id"]: bucket["count"] for bucket in result.get(facet, [])}
+      for facet in FACET_SOURCES
+  }
+  # The extra candidate is only counted, to detect truncation
+  capped = candidates > JOB_FACET_CANDIDATES
+  return result.get("page", []), counters, min(candidates, JOB_FACET_CANDIDATES), capped
+
+
+def _format_facets(counters: dict, candidates: int, capped: bool) -> dict:
+  """Returns the JOB_FACET_SIZE most frequent values of every facet."""
+  facets = {}
+  for facet in FACET_FIELDS:
+    values = [(value, count) for value, count in counters[facet].items()
+              if value not in (None, '', 'N/A')]
+    values.sort(key=lambda item: (-item[1], str(item[0])))
+    facets[facet] = [{"value": value, "count": count}
+                     for value, count in values[:JOB_FACET_SIZE]]
+  facets["candidates"] = candidates
+  facets["capped"] = capped
+  return facets
 
-    projection = {
-        "job_title": 1, "company": 1, "job_location": 1,
-        "job_summary": 1, "job_skills": 1, "job level": 1,
-        "job_type": 1, "job_link": 1, "first_seen": 1, "_id": 0,
-    }
-    sort = [("score", {"$meta": "textScore"})]
 
-    cursor = collection.find(mongodb_query, projection).sort(sort).limit(limit)
-    raw_jobs = list(cursor)
+def search_jobs(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10,
+        facets: bool = False):
+  """
+  Search for jobs from the in-memory catalog or MongoDB, with an AI-powered
+  fallback. With `facets`, the result also carries the job level, job
+  type, location and skill counts of the matching postings.
+  """
+  try:
+    facet_counts = None
+    if facets:
+      raw_jobs, facet_counts = _find_ranked_jobs_with_facets(
+          query, tech_skills, job_level, limit)
+    else:
+      raw_jobs = _find_ranked_jobs(query, tech_skills, job_level, limit)
 
     if raw_jobs:
       formatted_jobs = _format_job_results(raw_jobs)
-      return {
+      result = {
           "jobs": formatted_jobs,
           "total": len(formatted_jobs),
           "query": query,
           "ai_generated": False
       }
+    else:
+      ai_jobs = _fallback_job_listings(query, tech_skills, job_level, limit)
+      result = {
+          "jobs": ai_jobs,
+          "total": len(ai_jobs),
+          "query": query,
+          "ai_generated": True
+      }
 
-    logger.info(
-        f"No jobs found for query '{query}'. Generating fallback jobs with AI.")
-    ai_jobs = generate_enhanced_job_listings(query, tech_skills, job_level, limit)
-
-    return {
-        "jobs": ai_jobs,
-        "total": len(ai_jobs),
-        "query": query,
-        "ai_generated": True
-    }
+    if facet_counts is not None:
+      result["facets"] = facet_counts
+    return result
 
   except Exception as e:
     logger.error(f"Error searching jobs: {str(e)}")
     return {"jobs": [], "total": 0, "error": str(e), "query": query}
 
 
-def parse_skills(skills_string: str) -> list:
-  """Parse skills string into a clean list."""
-  if not skills_string:
-    return []
-  skills = re.split(r'[,;|]', skills_string)
-  cleaned_skills = [skill.strip()
-                    for skill in skills if skill and len(skill.strip()) > 1]
-  return cleaned_skills[:10]
+def stream_search_jobs(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10,
+        facets: bool = False):
+  """
+  Like `search_jobs`, as a generator of events for a streaming response:
+  - `search`: the job cards as soon as the postings are found. Cached
+    descriptions are included; the others are null,
+  - `description`: one per remaining job as soon as its description is
+    generated, in completion order, keyed by the job's `index` in `jobs`,
+  - `done`, or `error` if the search failed.
+  AI fallback listings come with their descriptions in the `search` event.
+  """
+  try:
+    facet_counts = None
+    if facets:
+      raw_jobs, facet_counts = _find_ranked_jobs_with_facets(
+          query, tech_skills, job_level, limit)
+    else:
+      raw_jobs = _find_ranked_jobs(query, tech_skills, job_level, limit)
+
+    if raw_jobs:
+      jobs, pending = [], {}
+      for index, job in enumerate(raw_jobs):
+        job_link = job.get('job_link')
+        description = _description_cache.get(job_link) if job_link else None
+        if description is None:
+          pending[index] = job
+        jobs.append(_job_card(job, description))
+      ai_generated = False
+    else:
+      jobs, pending = _fallback_job_listings(query, tech_skills, job_level, limit), {}
+      ai_generated = True
+  except Exception as e:
+    logger.error(f"Error searching jobs: {str(e)}")
+    yield {"event": "error", "error": str(e), "query": query}
+    return
+
+  # Start generating before the cards are sent
+  llm_executor = get_llm_executor()
+  futures = {llm_executor.submit(_describe_job, job): index
+             for index, job in pending.items()}
+
+  event = {
+      "event": "search",
+      "query": query,
+      "jobs": jobs,
+      "total": len(jobs),
+      "pending": sorted(pending),
+      "ai_generated": ai_generated
+  }
+  if facet_counts is not None:
+    event["facets"] = facet_counts
+
+  try:
+    yield event
+    for future in as_completed(futures):
+      index = futures[future]
+      try:
+        description = future.result()
+      except Exception as e:
+        logger.error(f"Failed to describe job {index} for '{query}': {str(e)}")
+        yield {"event": "description", "index": index, "description": None,
+               "error": str(e)}
+        continue
+      yield {"event": "description", "index": index,
+             "job_link": jobs[index]["job_link"], "description": description}
+    yield {"event": "done", "total": len(jobs)}
+  finally:
+    # The client went away: drop descriptions that have not started
+    for future in futures:
+      future.cancel()
+
+
+def _find_ranked_jobs(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10) -> list:
+  """Finds candidates in the catalog or MongoDB and returns the top ranked ones."""
+  catalog = get_catalog()
+  if catalog is not None:
+    # Serve from the in-memory catalog without a database round trip
+    candidates = catalog.search(
+        query, tech_skills, job_level, candidate_limit(limit))
+  else:
+    candidates = _find_candidates(query, tech_skills, job_level, limit)
+
+  # Re-rank the overfetched candidates in-process
+  return rank_jobs(
+      candidates,
+      [posting_skills(job) for job in candidates],
+      tech_skills, job_level, limit)
+
+
+def _find_ranked_jobs_with_facets(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10):
+  """Like `_find_ranked_jobs`, also returning the facet counts."""
+  catalog = get_catalog()
+  if catalog is not None:
+    candidates, counters, counted, capped = catalog.search_with_facets(
+        query, tech_skills, job_level, candidate_limit(limit),
+        JOB_FACET_CANDIDATES)
+  else:
+    candidates, counters, counted, capped = _find_candidates_with_facets(
+        query, tech_skills, job_level, limit)
+
+  raw_jobs = rank_jobs(
+      candidates,
+      [posting_skills(job) for job in candidates],
+      tech_skills, job_level, limit)
+  return raw_jobs, _format_facets(counters, counted, capped)
+
+
+def _fallback_job_listings(
+        query: str,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10) -> list:
+  """Generates (or reuses cached) AI listings for a search without results."""
+  logger.info(
+      f"No jobs found for query '{query}'. Generating fallback jobs with AI.")
+  return _listings_cache.get_or_compute(
+      make_key(query, tech_skills, job_level, limit),
+      lambda: generate_enhanced_job_listings(query, tech_skills, job_level, limit),
+      should_cache=lambda jobs: bool(jobs) and not jobs[0]['title'].startswith('Fallback:'))
+
+
+def search_jobs_batch(searches: list) -> dict:
+  """
+  Runs several searches together. The database lookups run concurrently,
+  and a posting found by more than one search is formatted (and its
+  description generated) once and shared by all of them. Results are
+  returned in the order of `searches`; a failed search carries an `error`.
+  """
+  search_executor = _get_search_executor()
+  lookups = [
+      search_executor.submit(
+          _find_ranked_jobs, s['query'], s.get('tech_skills'),
+          s.get('job_level'), s.get('limit', 10))
+      for s in searches
+  ]
+
+  ranked = []
+  for search, lookup in zip(searches, lookups):
+    try:
+      ranked.append(lookup.result())
+    except Exception as e:
+      logger.error(f"Error searching jobs for '{search['query']}': {str(e)}")
+      ranked.append(e)
+
+  # Unique postings across all result sets, keyed by job_link
+  unique_jobs = {}
+  for raw_jobs in ranked:
+    if isinstance(raw_jobs, list):
+      for job in raw_jobs:
+        unique_jobs.setdefault(_posting_key(job), job)
+
+  # Descriptions and fallback listings are generated concurrently
+  llm_executor = get_llm_executor()
+  formatted = {
+      key: llm_executor.submit(lambda job: _format_job_results([job])[0], job)
+      for key, job in unique_jobs.items()
+  }
+  fallbacks = {
+      i: llm_executor.submit(
+          _fallback_job_listings, s['query'], s.get('tech_skills'),
+          s.get('job_level'), s.get('limit', 10))
+      for i, (s, raw_jobs) in enumerate(zip(searches, ranked)) if raw_jobs == []
+  }
+
+  results = []
+  for i, (search, raw_jobs) in enumerate(zip(searches, ranked)):
+    query = search['query']
+    try:
+      if isinstance(raw_jobs, Exception):
+        raise raw_jobs
+      if raw_jobs:
+        jobs = [formatted[_posting_key(job)].result() for job in raw_jobs]
+        ai_generated = False
+      else:
+        jobs = fallbacks[i].result()
+        ai_generated = True
+      results.append({
+          "jobs": jobs,
+          "total": len(jobs),
+          "query": query,
+          "ai_generated": ai_generated
+      })
+    except Exception as e:
+      results.append({"jobs": [], "total": 0, "error": str(e), "query": query})
+
+  return {"results": results, "unique_jobs": len(unique_jobs)}
+
+
+def _posting_key(job: dict):
+  """Identifies a posting across result sets."""
+  return job.get('job_link') or (
+      job.get('job_title'), job.get('company'), job.get('job_location'))
+
+
+def parse_skills(skills_string: str, limit: int = 10) -> list:
+  """Parse a raw skills string into at most `limit` canonical skills."""
+  return normalize_skill_list(split_skill_string(skills_string), limit)
+
+
+def posting_skills(job: dict, limit: int = 10) -> list:
+  """
+  Returns a posting's canonical skills. Postings normalized at ingestion
+  carry `skills_normalized`; older documents are parsed from `job_skills`.
+  """
+  normalized = job.get('skills_normalized')
+  if normalized is not None:
+    return normalized[:limit] if limit is not None else list(normalized)
+  return parse_skills(job.get('job_skills', ''), limit)
 
 
 def generate_enhanced_job_listings(
@@ -186,7 +629,7 @@ Return only the JSON array."""
 
   try:
     logger.info(f"Generating {limit} AI job listings for query: {query}")
-    response = generate_llm_response(prompt)
+    response = generate_llm_response(prompt, call_site='job_listings')
 
     start_idx = response.find('[')
     end_idx = response.rfind(']') + 1
@@ -0,0 +1,49 @@
+"""
+In-process metrics registry.
+
+Services record counters and gauges here; the `/metrics` endpoint returns
+a JSON snapshot. Metric names are dotted strings and may carry labels,
+e.g. `increment('questions.context', outcome='in_time')`.
+"""
+import threading
+
+_counters = {}
+_gauges = {}
+_lock = threading.Lock()
+
+
+def _metric_key(name: str, labels: dict) -> str:
+  """Builds a flat metric key such as `name{label=value}`."""
+  if not labels:
+    return name
+  label_str = ','.join(f"{k}={v}" for k, v in sorted(labels.items()))
+  return f"{name}{{{label_str}}}"
+
+
+def increment(name: str, value: float = 1, **labels):
+  """Increments a counter."""
+  key = _metric_key(name, labels)
+  with _lock:
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+  """Sets a gauge to the given value."""
+  key = _metric_key(name, labels)
+  with _lock:
+    _gauges[key] = value
+
+
+def get_counter(name: str, **labels) -> float:
+  """Returns the current value of a counter."""
+  with _lock:
+    return _counters.get(_metric_key(name, labels), 0)
+
+
+def snapshot() -> dict:
+  """Returns a copy of all metrics."""
+  with _lock:
+    return {
+        'counters': dict(_counters),
+        'gauges': dict(_gauges),
+    }
@@ -0,0 +1,208 @@
+"""
+Precomputed interview question store.
+
+Question sets are generated offline (see `data/precompute_question_sets.py`)
+either per LinkedIn posting or per canonical (role, skill-set) cluster and
+stored with a version number. Each stored set holds several variants so
+repeated requests for the same job rotate between them.
+"""
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from app.services.cache import get_cache
+from models import get_db
+
+logger = logging.getLogger(__name__)
+
+# Database configuration
+QUESTIONS_DATABASE_NAME = 'software_questions_db'
+QUESTION_SETS_COLLECTION_NAME = 'question_sets'
+
+# Store configuration
+PRECOMPUTED_QUESTIONS_ENABLED = os.environ.get(
+    'PRECOMPUTED_QUESTIONS_ENABLED', 'True').lower() == 'true'
+QUESTION_SETS_CACHE_TTL = int(os.environ.get('QUESTION_SETS_CACHE_TTL', 300))
+QUESTION_SETS_CACHE_MAX_ENTRIES = int(
+    os.environ.get('QUESTION_SETS_CACHE_MAX_ENTRIES', 10000))
+QUESTION_SETS_KEEP_VERSIONS = int(
+    os.environ.get('QUESTION_SETS_KEEP_VERSIONS', 2))
+QUESTION_SETS_PRELOAD_LIMIT = int(
+    os.environ.get('QUESTION_SETS_PRELOAD_LIMIT', 5000))
+
+GENERATED_JOB_LINK_PREFIX = 'https://www.linkedin.com/jobs/generated'
+_SENIORITY_WORDS = {
+    'senior', 'sr', 'junior', 'jr', 'lead', 'principal', 'staff', 'entry',
+    'associate', 'mid', 'level', 'intern', 'i', 'ii', 'iii', 'iv'
+}
+_MAX_CLUSTER_SKILLS = 5
+
+# Latest question set per key; keys without a set are cached as an empty set
+_sets = get_cache(
+    'question_sets', QUESTION_SETS_CACHE_TTL, QUESTION_SETS_CACHE_MAX_ENTRIES)
+# Rotation counters per key (LRU, same bound as the cache), used to cycle
+# through variants; a key's counter is dropped when its set is reloaded
+_rotation = OrderedDict()
+_rotation_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  global _rotation_lock
+  _rotation_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _empty_set(key: str) -> dict:
+  return {'key': key, 'version': None, 'variants': []}
+
+
+def _drop_rotation(key: str):
+  with _rotation_lock:
+    _rotation.pop(key, None)
+
+
+def posting_key(job_link: str):
+  """Returns the store key for a real LinkedIn posting, or None."""
+  if not job_link or job_link.startswith(GENERATED_JOB_LINK_PREFIX):
+    return None
+  return f"posting:{job_link.strip()}"
+
+
+def canonical_role(job_title: str) -> str:
+  """Normalizes a job title to a seniority-agnostic role name."""
+  words = re.findall(r'[a-z0-9+#.]+', (job_title or '').lower())
+  words = [w.strip('.') for w in words]
+  return ' '.join(w for w in words if w and w not in _SENIORITY_WORDS)
+
+
+def cluster_key(job_title: str, tech_skills: list) -> str:
+  """Returns the store key for a canonical (role, skill-set) cluster."""
+  skills = sorted({s.strip().lower() for s in tech_skills or [] if s.strip()})
+  return f"cluster:{canonical_role(job_title)}|{','.join(skills[:_MAX_CLUSTER_SKILLS])}"
+
+
+def _load_latest_set(key: str):
+  """Loads the latest version of a question set, using the shared cache."""
+  doc = _sets.get(key)
+  if doc is not None:
+    return doc
+
+  db = get_db(QUESTIONS_DATABASE_NAME)
+  doc = db[QUESTION_SETS_COLLECTION_NAME].find_one(
+      {'key': key},
+      {'_id': 0, 'key': 1, 'version': 1, 'variants': 1},
+      sort=[('version', -1)]) or _empty_set(key)
+
+  _drop_rotation(key)
+  _sets.set(key, doc)
+  return doc
+
+
+def preload_question_sets(limit: int = QUESTION_SETS_PRELOAD_LIMIT) -> int:
+  """Loads the latest version of up to `limit` question sets into the cache."""
+  if not PRECOMPUTED_QUESTIONS_ENABLED:
+    return 0
+
+  db = get_db(QUESTIONS_DATABASE_NAME)
+  pipeline = [
+      {'$sort': {'key': 1, 'version': -1}},
+      {'$group': {
+          '_id': '$key',
+          'version': {'$first': '$version'},
+          'variants': {'$first': '$variants'}}},
+      {'$limit': limit},
+  ]
+  loaded = 0
+  for doc in db[QUESTION_SETS_COLLECTION_NAME].aggregate(pipeline):
+    key = doc.pop('_id')
+    _sets.set(key, {'key': key, **doc})
+    loaded += 1
+  logger.info(f"Preloaded {loaded} precomputed question sets")
+  return loaded
+
+
+def _next_variant(key: str, variants: list) -> list:
+  """Picks the next variant for a key in round-robin order."""
+  with _rotation_lock:
+    index = _rotation.get(key, 0)
+    _rotation[key] = index + 1
+    _rotation.move_to_end(key)
+    while len(_rotation) > QUESTION_SETS_CACHE_MAX_ENTRIES:
+      _rotation.popitem(last=False)
+  return variants[index % len(variants)]
+
+
+def get_precomputed_questions(
+        job_title: str,
+        tech_skills: list,
+        job_link: str = None):
+  """
+  Returns a precomputed question set for a job, or None if there is none.
+
+  The posting-specific set is preferred; the (role, skill-set) cluster set
+  is used otherwise. Lookup errors are logged and treated as a miss so the
+  caller can fall back to live generation.
+  """
+  if not PRECOMPUTED_QUESTIONS_ENABLED:
+    return None
+
+  keys = [posting_key(job_link), cluster_key(job_title, tech_skills)]
+  try:
+    for key in filter(None, keys):
+      doc = _load_latest_set(key)
+      if doc and doc.get('variants'):
+        questions = _next_variant(key, doc['variants'])
+        logger.info(
+            f"Serving precomputed questions for '{key}' (version {doc['version']})")
+        return {
+            "questions": questions,
+            "key": key,
+            "version": doc['version']
+        }
+  except Exception as e:
+    logger.warning(f"Precomputed question lookup failed: {str(e)}")
+  return None
+
+
+def ensure_question_store_indexes():
+  """Creates the indexes used by the question store."""
+  db = get_db(QUESTIONS_DATABASE_NAME)
+  db[QUESTION_SETS_COLLECTION_NAME].create_index(
+      [('key', 1), ('version', -1)], unique=True)
+
+
+def save_question_set(
+        key: str,
+        job_title: str,
+        tech_skills: list,
+        variants: list) -> int:
+  """
+  Stores a new version of the question set for a key and prunes old versions.
+  Returns the new version number.
+  """
+  db = get_db(QUESTIONS_DATABASE_NAME)
+  collection = db[QUESTION_SETS_COLLECTION_NAME]
+
+  latest = collection.find_one(
+      {'key': key}, {'version': 1}, sort=[('version', -1)])
+  version = (latest['version'] + 1) if latest else 1
+
+  collection.insert_one({
+      'key': key,
+      'key_type': key.split(':', 1)[0],
+      'version': version,
+      'job_title': job_title,
+      'tech_skills': tech_skills,
+      'variants': variants,
+      'created_at': datetime.now(timezone.utc),
+  })
+  collection.delete_many(
+      {'key': key, 'version': {'$lte': version - QUESTION_SETS_KEEP_VERSIONS}})
+
+  _sets.delete(key)
+  _drop_rotation(key)
+  return version
@@ -5,9 +5,19 @@ import os
 import logging
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from models import get_db
-from app.services.ai_service import generate_llm_response
+from app.services import metrics
+from app.services.ai_service import (
+    build_job_preamble, generate_llm_response, register_context)
+from app.services.cache import get_cache, make_key
 from app.services.exceptions import ServiceError
+from app.services.question_store import get_precomputed_questions
+from app.services.skills import normalize_skill_list
+from app.services.slow_queries import find_logged
+from app.services.token_budget import (
+    estimate_tokens, remaining_budget, truncate_to_tokens)
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +25,58 @@ logger = logging.getLogger(__name__)
 QUESTIONS_DATABASE_NAME = 'software_questions_db'
 QUESTIONS_COLLECTION_NAME = 'questions'
 
+# Speculative context lookup configuration
+SPECULATIVE_CONTEXT_ENABLED = os.environ.get(
+    'SPECULATIVE_CONTEXT_ENABLED', 'True').lower() == 'true'
+QUESTIONS_CONTEXT_DEADLINE_MS = int(
+    os.environ.get('QUESTIONS_CONTEXT_DEADLINE_MS', 150))
+QUESTIONS_CONTEXT_WORKERS = int(os.environ.get('QUESTIONS_CONTEXT_WORKERS', 4))
+QUESTIONS_CONTEXT_CACHE_SIZE = int(
+    os.environ.get('QUESTIONS_CONTEXT_CACHE_SIZE', 512))
+QUESTIONS_CONTEXT_CACHE_TTL = int(
+    os.environ.get('QUESTIONS_CONTEXT_CACHE_TTL', 3600))
+AI_QUESTIONS_CACHE_TTL = int(os.environ.get('AI_QUESTIONS_CACHE_TTL', 24 * 3600))
+
+# Context answers are shortened to this many tokens before budgeting
+CONTEXT_ANSWER_TOKEN_LIMIT = 200
+
+_context_executor = None
+_context_executor_lock = threading.Lock()
+# Lookups submitted and not finished yet: search query -> future
+_context_lookups = {}
+_context_lookups_lock = threading.Lock()
+# Context lookups that finished, including late ones: search query -> questions
+_context_cache = get_cache(
+    'question_context', QUESTIONS_CONTEXT_CACHE_TTL, QUESTIONS_CONTEXT_CACHE_SIZE)
+# Live-generated questions per job
+_questions_cache = get_cache('ai_questions', AI_QUESTIONS_CACHE_TTL)
+
+
+class _PlainTextQuestions(list):
+  """Questions salvaged line by line from a reply that was not a JSON array."""
+
+
+def is_parsed_question_set(questions) -> bool:
+  """
+  Whether AI questions came from a well-formed reply: a non-empty JSON array
+  of strings. Only those are cached or stored; an empty or salvaged
+  plain-text result is served once and generated again next time.
+  """
+  return (bool(questions) and not isinstance(questions, _PlainTextQuestions)
+          and all(isinstance(q, str) and q.strip() for q in questions))
+
+
+def _reset_after_fork():
+  global _context_executor, _context_executor_lock
+  global _context_lookups, _context_lookups_lock
+  _context_executor = None
+  _context_executor_lock = threading.Lock()
+  _context_lookups = {}
+  _context_lookups_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 
 def search_questions(query: str, tech_skills: list = None, limit: int = 10):
   """
@@ -35,8 +97,8 @@ def search_questions(query: str, tech_skills: list = None, limit: int = 10):
     projection = {'score': {'$meta': 'textScore'}}
     sort = [('score', {'$meta': 'textScore'})]
 
-    cursor = collection.find(mongodb_query, projection).sort(sort).limit(limit)
-    raw_questions = list(cursor)
+    raw_questions = find_logged(collection, mongodb_query, projection, sort,
+                                limit, source='search_questions')
 
     if not raw_questions:
       return {
@@ -69,21 +131,17 @@ def search_questions(query: str, tech_skills: list = None, limit: int = 10):
 
 
 def parse_tech_skills(skills_list: list) -> list:
-  """Parse and validate tech skills list."""
-  if not skills_list:
-    return []
-
-  cleaned_skills = [
-      skill.strip() for skill in skills_list
-      if isinstance(skill, str) and skill.strip() and len(skill.strip()) > 1
-  ]
+  """Parse and validate tech skills list into canonical skills."""
+  return normalize_skill_list(skills_list)
 
-  return cleaned_skills[:10]
 
-
-def generate_interview_questions(job: dict):
+def generate_interview_questions(job: dict, context: dict = None):
   """
-  Generates interview questions based on a job profile using AI.
+  Generates interview questions based on a job profile.
+
+  Precomputed question sets are served first; AI generation is only used
+  for jobs that have no stored set. `context` is the job's prepared prompt
+  context (see `prepare_question_context`), e.g. from an interview session.
   """
   if not job or not isinstance(job, dict):
     raise ServiceError("Invalid job object provided.", 400)
@@ -92,34 +150,94 @@ def generate_interview_questions(job: dict):
   job_description = job.get('description', '')
   tech_skills = parse_tech_skills(job.get('skills', []))
 
+  precomputed = get_precomputed_questions(
+      job_title, tech_skills, job.get('job_link'))
+  if precomputed:
+    return {
+        "questions": precomputed['questions'],
+        "total": len(precomputed['questions']),
+        "job_title": job_title,
+        "tech_skills": tech_skills,
+        "precomputed": True
+    }
+
+  questions = _questions_cache.get_or_compute(
+      make_key(job_title, job_description, tech_skills),
+      lambda: generate_ai_questions(
+          job_title, job_description, tech_skills, context),
+      should_cache=is_parsed_question_set)
+
+  return {
+      "questions": questions,
+      "total": len(questions),
+      "job_title": job_title,
+      "tech_skills": tech_skills,
+      "precomputed": False
+  }
+
+
+def prepare_question_context(
+        job_title: str,
+        job_description: str,
+        tech_skills: list) -> dict:
+  """
+  Builds the reusable prompt context of a job: the job profile preamble
+  shared with feedback prompts and the question bank context questions,
+  already fitted to the input token budget. Without the question bank the
+  context has no questions.
+  """
   try:
-    # Find relevant questions from the database to use as context
-    search_terms = [job_title] + tech_skills
-    search_query = ' '.join(filter(None, search_terms))
+    search_query = _context_search_query(job_title, tech_skills)
+    db_questions = _context_cache.get(search_query)
+    if db_questions is None:
+      db_questions = _get_context_questions(job_title, tech_skills)
+  except Exception as e:
+    logger.warning(f"Context lookup for '{job_title}' failed: {str(e)}")
+    db_questions = []
 
-    db_questions = search_questions(
-        search_query, tech_skills, limit=5).get(
-        'questions', [])
+  preamble = build_job_preamble(job_title, job_description, tech_skills)
+  return {
+      "preamble": preamble,
+      "context_questions": _fit_context_questions(preamble, job_title, db_questions),
+  }
 
-    # Construct the prompt for the AI
-    prompt = _create_question_generation_prompt(
-        job_title, job_description, tech_skills, db_questions)
+
+def generate_ai_questions(
+        job_title: str,
+        job_description: str,
+        tech_skills: list,
+        context: dict = None) -> list:
+  """
+  Generates a fresh set of interview questions with AI, using questions from
+  the database as context. A prepared `context` skips the lookup.
+  """
+  try:
+    if context is None:
+      # Find relevant questions from the database to use as context
+      if SPECULATIVE_CONTEXT_ENABLED:
+        db_questions = _get_context_questions_speculatively(job_title, tech_skills)
+      else:
+        db_questions = _get_context_questions(job_title, tech_skills)
+      preamble = build_job_preamble(job_title, job_description, tech_skills)
+      # Fit the context questions within the input token budget
+      db_questions = _fit_context_questions(preamble, job_title, db_questions)
+    else:
+      preamble = context['preamble']
+      db_questions = context['context_questions']
+
+    # The job profile is shared with feedback prompts and cached once
+    context_key = register_context(preamble)
+    prompt = _create_question_generation_prompt(job_title, db_questions)
 
     # Generate questions using the AI service
-    ai_response = generate_llm_response(prompt)
+    ai_response = generate_llm_response(
+        prompt, context_key=context_key, call_site='questions')
     if "Error:" in ai_response or "Unable to generate response" in ai_response:
       logger.error(f"AI service returned an error: {ai_response}")
       raise ServiceError("Failed to generate questions from AI service.", 502)
 
     # Parse the AI response to get the questions
-    questions = _parse_ai_question_response(ai_response)
-
-    return {
-        "questions": questions,
-        "total": len(questions),
-        "job_title": job_title,
-        "tech_skills": tech_skills
-    }
+    return _parse_ai_question_response(ai_response)
   except ServiceError:
     raise
   except Exception as e:
@@ -129,12 +247,137 @@ def generate_interview_questions(job: dict):
         "An unexpected error occurred while generating questions.", 500)
 
 
+def _context_search_query(job_title: str, tech_skills: list) -> str:
+  """Builds the question bank search query for a job."""
+  search_terms = [job_title] + tech_skills
+  return ' '.join(filter(None, search_terms))
+
+
+def _get_context_questions(job_title: str, tech_skills: list) -> list:
+  """Looks up context questions from the question bank and caches them."""
+  search_query = _context_search_query(job_title, tech_skills)
+  db_questions = search_questions(
+      search_query, tech_skills, limit=5).get(
+      'questions', [])
+
+  _context_cache.set(search_query, db_questions)
+  return db_questions
+
+
+def invalidate_context_cache():
+  """Drops all cached context lookups."""
+  _context_cache.clear()
+
+
+def _get_context_executor() -> ThreadPoolExecutor:
+  """Returns the executor used for speculative context lookups."""
+  global _context_executor
+  if _context_executor is None:
+    with _context_executor_lock:
+      if _context_executor is None:
+        _context_executor = ThreadPoolExecutor(
+            max_workers=QUESTIONS_CONTEXT_WORKERS,
+            thread_name_prefix='question-context')
+  return _context_executor
+
+
+def _get_context_questions_speculatively(
+        job_title: str,
+        tech_skills: list) -> list:
+  """
+  Looks up context questions with a tight deadline.
+
+  If the question bank does not answer within QUESTIONS_CONTEXT_DEADLINE_MS
+  the prompt is built without context, so the LLM call never waits on a
+  slow database. A late lookup keeps running and its result is cached for
+  the next request for the same job. A request for a query already being
+  looked up waits on that lookup, and no lookup is submitted while
+  QUESTIONS_CONTEXT_WORKERS are already pending, so a slow question bank
+  cannot build an unbounded backlog.
+  """
+  search_query = _context_search_query(job_title, tech_skills)
+  cached = _context_cache.get(search_query)
+  if cached is not None:
+    metrics.increment('questions.context', outcome='cached')
+    return cached
+
+  executor = _get_context_executor()
+  submitted = False
+  with _context_lookups_lock:
+    future = _context_lookups.get(search_query)
+    if future is None and len(_context_lookups) < QUESTIONS_CONTEXT_WORKERS:
+      future = executor.submit(_get_context_questions, job_title, tech_skills)
+      _context_lookups[search_query] = future
+      submitted = True
+    pending = len(_context_lookups)
+
+  if future is None:
+    metrics.increment('questions.context', outcome='backlogged')
+    logger.info(
+        f"{pending} context lookups pending; generating '{search_query}' "
+        f"without context")
+    return []
+  if submitted:
+    # Outside the lock: runs at once if the lookup already finished
+    future.add_done_callback(lambda _: _forget_context_lookup(search_query))
+  else:
+    metrics.increment('questions.context', outcome='joined')
+
+  try:
+    db_questions = future.result(timeout=QUESTIONS_CONTEXT_DEADLINE_MS / 1000)
+    metrics.increment('questions.context', outcome='in_time')
+    return db_questions
+  except FutureTimeoutError:
+    metrics.increment('questions.context', outcome='missed_deadline')
+    logger.info(
+        f"Context lookup for '{search_query}' missed the "
+        f"{QUESTIONS_CONTEXT_DEADLINE_MS}ms deadline; generating without context")
+  except Exception as e:
+    metrics.increment('questions.context', outcome='failed')
+    logger.warning(f"Context lookup for '{search_query}' failed: {str(e)}")
+  return []
+
+
+def _forget_context_lookup(search_query: str):
+  with _context_lookups_lock:
+    _context_lookups.pop(search_query, None)
+
+
+def _fit_context_questions(
+        preamble: str,
+        job_title: str,
+        context_questions: list) -> list:
+  """
+  Shortens context answers and drops context questions until the prompt,
+  with the job profile `preamble`, fits the LLM input token budget.
+  """
+  remaining = remaining_budget(
+      preamble, _create_question_generation_prompt(job_title, []))
+
+  fitted = []
+  for q in context_questions:
+    q = {**q, 'answer': truncate_to_tokens(q['answer'], CONTEXT_ANSWER_TOKEN_LIMIT)}
+    cost = estimate_tokens(f"- Question: {q['question']}\n- Answer: {q['answer']}\n\n")
+    if cost > remaining:
+      break
+    fitted.append(q)
+    remaining -= cost
+
+  if len(fitted) < len(context_questions):
+    metrics.increment('llm.prompt_trimmed', call_site='questions')
+    logger.info(
+        f"Dropped {len(context_questions) - len(fitted)} context questions "
+        f"to fit the input token budget")
+  return fitted
+
+
 def _create_question_generation_prompt(
         job_title: str,
-        job_description: str,
-        tech_skills: list,
         context_questions: list) -> str:
-  """Creates a detailed prompt for the AI to generate interview questions."""
+  """
+  Creates a detailed prompt for the AI to generate interview questions.
+  The job profile itself is supplied through the registered job context.
+  """
   context_prompt = ""
   if context_questions:
     context_prompt = "For context, here are some existing questions and answers that might be relevant. Use them to understand the style, format, and difficulty, but generate NEW and UNIQUE questions:\n"
@@ -142,14 +385,9 @@ def _create_question_generation_prompt(
       context_prompt += f"- Question: {q['question']}\n- Answer: {q['answer']}\n\n"
 
   prompt = f"""
-Based on the following job profile, please generate exactly 5 high-quality technical interview questions.
+Based on the job profile above, please generate exactly 5 high-quality technical interview questions.
 The questions should be suitable for a candidate applying for the role of "{job_title}".
 
-**Job Details:**
-- **Title:** {job_title}
-- **Description:** {job_description}
-- **Key Skills:** {', '.join(tech_skills)}
-
 {context_prompt}
 
 **Instructions:**
@@ -167,6 +405,13 @@ Example format:
   return prompt
 
 
+def _plain_text_questions(response: str) -> list:
+  """Fallback for non-JSON plain text lists: one question per line."""
+  return _PlainTextQuestions(
+      line.strip() for line in response.split('\n')
+      if line.strip() and not line.startswith("```"))
+
+
 def _parse_ai_question_response(response: str) -> list:
   """Parses the AI's JSON response to extract a list of questions."""
   try:
@@ -176,9 +421,7 @@ def _parse_ai_question_response(response: str) -> list:
     if start_index == -1 or end_index == 0:
       logger.warning(
           f"Could not find a JSON array in the AI response: {response}")
-      # Fallback for non-JSON plain text lists
-      return [line.strip() for line in response.split(
-          '\n') if line.strip() and not line.startswith("```")]
+      return _plain_text_questions(response)
 
     json_str = response[start_index:end_index]
     try:
@@ -192,9 +435,7 @@ def _parse_ai_question_response(response: str) -> list:
         return []
     except json.JSONDecodeError:
       logger.error(f"Failed to decode JSON from AI response: {json_str}")
-      # Fallback for non-JSON plain text lists
-      return [line.strip() for line in response.split(
-          '\n') if line.strip() and not line.startswith("```")]
+      return _plain_text_questions(response)
 
   except Exception as e:
     logger.error(
@@ -0,0 +1,135 @@
+"""
+Hybrid re-ranking of job search candidates.
+
+`search_jobs` overfetches candidates ordered by MongoDB textScore and this
+module re-ranks them with a weighted, vectorized score combining:
+- text: textScore normalized by the best candidate,
+- skills: Jaccard similarity between the posting's canonical skills and the
+  canonicalized `tech_skills`,
+- level: whether the posting matches the requested `job_level`,
+- recency: exponential decay of the `first_seen` age.
+"""
+import os
+import json
+import logging
+from datetime import datetime
+import numpy as np
+from app.services.skills import normalize_skill_list
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_RANKING_WEIGHTS = {'text': 0.5, 'skills': 0.25, 'level': 0.15, 'recency': 0.1}
+RANKING_ENABLED = os.environ.get('RANKING_ENABLED', 'True').lower() == 'true'
+RANKING_OVERFETCH = int(os.environ.get('RANKING_OVERFETCH', 5))
+RANKING_MAX_CANDIDATES = int(os.environ.get('RANKING_MAX_CANDIDATES', 100))
+RANKING_RECENCY_HALF_LIFE_DAYS = float(
+    os.environ.get('RANKING_RECENCY_HALF_LIFE_DAYS', 30))
+
+
+def _load_weights() -> dict:
+  weights = dict(DEFAULT_RANKING_WEIGHTS)
+  overrides = os.environ.get('RANKING_WEIGHTS')
+  if overrides:
+    try:
+      weights.update({k: float(v) for k, v in json.loads(overrides).items()})
+    except (ValueError, AttributeError) as e:
+      logger.error(f"Ignoring invalid RANKING_WEIGHTS: {str(e)}")
+  return weights
+
+
+RANKING_WEIGHTS = _load_weights()
+
+
+def candidate_limit(limit: int) -> int:
+  """
+  Returns how many candidates to fetch for a page of `limit` results: the
+  overfetch is capped at RANKING_MAX_CANDIDATES, the page itself is not.
+  """
+  if not RANKING_ENABLED:
+    return limit
+  return max(min(limit * RANKING_OVERFETCH, RANKING_MAX_CANDIDATES), limit)
+
+
+def _to_date(value):
+  if isinstance(value, datetime):
+    return value
+  try:
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d')
+  except (TypeError, ValueError):
+    return None
+
+
+def skill_jaccard(candidate_skills: list, tech_skills: list) -> np.ndarray:
+  """
+  Jaccard similarity of every candidate's (canonical) skill set with
+  `tech_skills`, which are canonicalized first.
+  """
+  query = {s.lower() for s in normalize_skill_list(tech_skills, limit=None)}
+  if not query or not candidate_skills:
+    return np.zeros(len(candidate_skills))
+
+  sets = [{s.strip().lower() for s in skills} for skills in candidate_skills]
+  vocabulary = {skill: i for i, skill in enumerate(query.union(*sets))}
+  matrix = np.zeros((len(sets), len(vocabulary)), dtype=np.float32)
+  for row, skills in enumerate(sets):
+    matrix[row, [vocabulary[s] for s in skills]] = 1.0
+  query_vector = np.zeros(len(vocabulary), dtype=np.float32)
+  query_vector[[vocabulary[s] for s in query]] = 1.0
+
+  intersection = matrix @ query_vector
+  union = matrix.sum(axis=1) + query_vector.sum() - intersection
+  return np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+
+
+def score_candidates(
+        candidates: list,
+        candidate_skills: list,
+        tech_skills: list = None,
+        job_level: str = None,
+        weights: dict = None,
+        now: datetime = None) -> np.ndarray:
+  """Returns the hybrid score of every candidate."""
+  weights = weights or RANKING_WEIGHTS
+  now = now or datetime.now()
+
+  text = np.array([c.get('score', 0.0) or 0.0 for c in candidates], dtype=np.float64)
+  if text.max(initial=0) > 0:
+    text = text / text.max()
+
+  skills = skill_jaccard(candidate_skills, tech_skills)
+
+  level = np.zeros(len(candidates))
+  if job_level:
+    wanted = job_level.lower()
+    level = np.array(
+        [wanted in str(c.get('job level', '')).lower() for c in candidates],
+        dtype=np.float64)
+
+  dates = [_to_date(c.get('first_seen')) for c in candidates]
+  ages = np.array(
+      [(now - d).days if d else np.inf for d in dates], dtype=np.float64)
+  recency = np.power(0.5, np.clip(ages, 0, None) / RANKING_RECENCY_HALF_LIFE_DAYS)
+
+  return (weights.get('text', 0) * text
+          + weights.get('skills', 0) * skills
+          + weights.get('level', 0) * level
+          + weights.get('recency', 0) * recency)
+
+
+def rank_jobs(
+        candidates: list,
+        candidate_skills: list,
+        tech_skills: list = None,
+        job_level: str = None,
+        limit: int = 10,
+        weights: dict = None) -> list:
+  """Re-ranks candidates by hybrid score and returns the top `limit`."""
+  if not RANKING_ENABLED or not candidates:
+    return candidates[:limit]
+
+  scores = score_candidates(
+      candidates, candidate_skills, tech_skills, job_level, weights)
+  # Stable sort keeps the textScore order between equal scores
+  order = np.argsort(-scores, kind='stable')[:limit]
+  return [candidates[i] for i in order]
@@ -0,0 +1,96 @@
+"""
+Background dependency checker backing the readiness probe.
+
+MongoDB and Vertex AI are checked on an interval by a daemon thread so the
+`/readyz` and `/health` endpoints can return the cached result without doing
+any I/O on the request path.
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from models import get_client
+from app.services.ai_service import initialize_vertex_ai
+from app.warmup import is_warmed_up
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+READINESS_CHECK_INTERVAL = float(
+    os.environ.get('READINESS_CHECK_INTERVAL', 15))
+
+_status = {
+    'ready': False,
+    'mongodb': 'unknown',
+    'vertex_ai': 'unknown',
+    'warmed_up': False,
+    'checked_at': None,
+}
+_status_lock = threading.Lock()
+_checker_thread = None
+_checker_lock = threading.Lock()
+
+
+def _check_mongodb() -> bool:
+  """Pings MongoDB over the shared process-wide client."""
+  try:
+    get_client().admin.command('ping')
+    return True
+  except Exception as e:
+    logger.warning(f"Readiness check: MongoDB unavailable: {str(e)}")
+    return False
+
+
+def refresh_dependency_status() -> dict:
+  """Checks all dependencies and updates the cached status."""
+  mongo_ok = _check_mongodb()
+  vertex_ok = initialize_vertex_ai()
+  warmed_up = is_warmed_up()
+
+  with _status_lock:
+    _status.update({
+        'ready': mongo_ok and vertex_ok and warmed_up,
+        'mongodb': 'connected' if mongo_ok else 'failed',
+        'vertex_ai': 'connected' if vertex_ok else 'failed',
+        'warmed_up': warmed_up,
+        'checked_at': datetime.now(timezone.utc).isoformat(),
+    })
+    return dict(_status)
+
+
+def get_dependency_status() -> dict:
+  """
+  Returns a copy of the cached dependency status. Warm-up completion is
+  read live so readiness flips as soon as warm-up finishes.
+  """
+  warmed_up = is_warmed_up()
+  with _status_lock:
+    status = dict(_status)
+  status['ready'] = (status['mongodb'] == 'connected'
+                     and status['vertex_ai'] == 'connected' and warmed_up)
+  status['warmed_up'] = warmed_up
+  return status
+
+
+def _run_checker(interval: float):
+  """Refreshes the dependency status forever."""
+  while True:
+    try:
+      refresh_dependency_status()
+    except Exception as e:
+      logger.error(f"Readiness check failed: {str(e)}")
+    time.sleep(interval)
+
+
+def start_readiness_checker(interval: float = READINESS_CHECK_INTERVAL):
+  """Starts the background checker thread if it is not already running."""
+  global _checker_thread
+  with _checker_lock:
+    if _checker_thread is not None and _checker_thread.is_alive():
+      return
+    _checker_thread = threading.Thread(
+        target=_run_checker, args=(interval,),
+        name='readiness-checker', daemon=True)
+    _checker_thread.start()
+    logger.info(f"Readiness checker started (interval: {interval}s)")
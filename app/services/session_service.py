@@ -0,0 +1,126 @@
+"""
+Interview sessions.
+
+A session is created once per interview, from a posting's `job_link` or
+from a job object (e.g. an AI fallback listing), and keeps for
+INTERVIEW_SESSION_TTL seconds:
+- the job: title, generated description, canonical skills and link,
+- its prepared prompt context: the job profile preamble and the question
+  bank context questions fitted to the input token budget,
+- the interview questions, once they have been generated.
+`/questions` and `/feedback` then take a `session_id` instead of the job,
+and build their prompts from the stored context. Sessions are stored in the
+shared cache (`app/services/cache.py`), so with CACHE_BACKEND=sqlite or
+redis every worker can serve them. With the default `memory` backend they
+live in one process: `gunicorn.conf.py` then runs a single worker and
+refuses a larger WEB_CONCURRENCY, so a session is never looked up in a
+worker that does not hold it.
+"""
+import os
+import time
+import logging
+import secrets
+from app.services import metrics
+from app.services.cache import get_cache
+from app.services.exceptions import ServiceError
+from app.services.job_service import get_job
+from app.services.questions_service import (
+    parse_tech_skills, prepare_question_context)
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INTERVIEW_SESSION_TTL = int(os.environ.get('INTERVIEW_SESSION_TTL', 2 * 3600))
+INTERVIEW_SESSION_MAX_ENTRIES = int(
+    os.environ.get('INTERVIEW_SESSION_MAX_ENTRIES', 10000))
+
+# Session id -> session; every save extends the session's lifetime
+_sessions = get_cache(
+    'interview_sessions', INTERVIEW_SESSION_TTL, INTERVIEW_SESSION_MAX_ENTRIES)
+
+
+def _save(session: dict) -> dict:
+  session['expires_at'] = time.time() + INTERVIEW_SESSION_TTL
+  _sessions.set(session['session_id'], session)
+  return session
+
+
+def create_session(job_link: str = None, job: dict = None) -> dict:
+  """
+  Creates a session from a posting's `job_link`, or from a job object when
+  no link is given. Raises ServiceError (404) for an unknown posting.
+  """
+  if job_link:
+    job = get_job(job_link)
+    if job is None:
+      raise ServiceError(f"No job found for job_link '{job_link}'.", 404)
+  elif not job or not isinstance(job, dict):
+    raise ServiceError("A `job_link` or a job object is required.", 400)
+
+  title = job.get('title', 'N/A')
+  description = job.get('description', '')
+  tech_skills = parse_tech_skills(job.get('skills', []))
+  session = {
+      'session_id': secrets.token_urlsafe(16),
+      'created_at': time.time(),
+      'job': {
+          **{k: v for k, v in job.items() if k not in ('skills', 'score')},
+          'title': title,
+          'description': description,
+          'skills': tech_skills,
+      },
+      'context': prepare_question_context(title, description, tech_skills),
+      'questions': None,
+      'precomputed': False,
+  }
+  metrics.increment('sessions.created', source='job_link' if job_link else 'job')
+  logger.info(f"Created interview session for '{title}'")
+  return _save(session)
+
+
+def get_session(session_id: str) -> dict:
+  """Returns a session. Raises ServiceError (404) if it is unknown or expired."""
+  session = _sessions.get(session_id) if session_id else None
+  if session is None:
+    raise ServiceError("Interview session not found or expired.", 404)
+  return session
+
+
+def save_questions(session: dict, questions: list, precomputed: bool) -> dict:
+  """Stores the interview questions generated for a session."""
+  session['questions'] = questions
+  session['precomputed'] = precomputed
+  return _save(session)
+
+
+def delete_session(session_id: str):
+  """Deletes a session."""
+  _sessions.delete(session_id)
+
+
+def session_answers(session: dict, answers: list) -> list:
+  """
+  Pairs answers, in order, with the session's questions. Returns the
+  `[{question, answer}]` list expected by the feedback service.
+  """
+  questions = session.get('questions')
+  if not questions:
+    raise ServiceError(
+        "The session has no questions yet; request `/questions` first.", 409)
+  if not answers or not isinstance(answers, list) or len(answers) > len(questions):
+    raise ServiceError(
+        f"`answers` must be a list of 1 to {len(questions)} answers.", 400)
+  return [{'question': question, 'answer': answer}
+          for question, answer in zip(questions, answers)]
+
+
+def public_session(session: dict) -> dict:
+  """Returns a session as shown to clients, without the prompt context."""
+  return {
+      'session_id': session['session_id'],
+      'job': session['job'],
+      'questions': session['questions'],
+      'context_questions': len(session['context']['context_questions']),
+      'created_at': session['created_at'],
+      'expires_at': session['expires_at'],
+  }
@@ -0,0 +1,191 @@
+"""
+Skill vocabulary and canonicalization.
+
+Raw `job_skills` strings are split and normalized once at ingestion time
+(see `data/normalize_skills.py`), which stores:
+- `skills_normalized` on every `linkedin_jobs` posting, and
+- the `skill_vocabulary` collection with one document per canonical skill,
+  its aliases and how many postings mention it.
+At request time skills are canonicalized with a dictionary lookup into the
+alias map loaded from that collection, or from the catalog snapshot when
+it matches the collection (see `app/services/snapshot.py`).
+"""
+import os
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from models import get_db
+
+logger = logging.getLogger(__name__)
+
+# Database configuration
+SKILL_VOCABULARY_COLLECTION_NAME = 'skill_vocabulary'
+# Seconds before a vocabulary load that failed is retried
+SKILL_VOCABULARY_RETRY_INTERVAL = float(
+    os.environ.get('SKILL_VOCABULARY_RETRY_INTERVAL', 60))
+
+MAX_SKILLS = 10
+_SEPARATORS = str.maketrans({';': ',', '|': ','})
+
+# Well-known spellings that frequency alone would not merge
+DEFAULT_ALIASES = {
+    'js': 'JavaScript',
+    'javascript': 'JavaScript',
+    'ts': 'TypeScript',
+    'typescript': 'TypeScript',
+    'golang': 'Go',
+    'k8s': 'Kubernetes',
+    'kubernetes': 'Kubernetes',
+    'node': 'Node.js',
+    'nodejs': 'Node.js',
+    'node.js': 'Node.js',
+    'node js': 'Node.js',
+    'react': 'React',
+    'reactjs': 'React',
+    'react.js': 'React',
+    'postgres': 'PostgreSQL',
+    'postgresql': 'PostgreSQL',
+    'amazon web services': 'AWS',
+    'aws': 'AWS',
+    'gcp': 'Google Cloud Platform',
+    'google cloud': 'Google Cloud Platform',
+    'google cloud platform': 'Google Cloud Platform',
+    'ms azure': 'Azure',
+    'microsoft azure': 'Azure',
+    'azure': 'Azure',
+    'ml': 'Machine Learning',
+    'machine learning': 'Machine Learning',
+    'ci/cd': 'CI/CD',
+    'cicd': 'CI/CD',
+    'c sharp': 'C#',
+    'c#': 'C#',
+    'cpp': 'C++',
+    'c++': 'C++',
+}
+
+# Alias map: normalized key -> canonical skill. Until the vocabulary loads
+# only DEFAULT_ALIASES are known.
+_alias_map = dict(DEFAULT_ALIASES)
+_vocabulary_size = 0
+_loaded = False
+# When a failed load may be retried (monotonic time)
+_retry_at = 0.0
+_load_lock = threading.Lock()
+
+
+def skill_key(skill: str) -> str:
+  """Normalizes a skill spelling to its lookup key."""
+  return ' '.join(skill.split()).lower()
+
+
+def split_skill_string(skills_string: str) -> list:
+  """Splits a raw `job_skills` string on `,`, `;` and `|`."""
+  if not skills_string:
+    return []
+  return [s.strip() for s in skills_string.translate(_SEPARATORS).split(',')]
+
+
+def build_vocabulary(skill_lists) -> dict:
+  """
+  Builds the canonical vocabulary from raw skill lists.
+  Spellings sharing a key or a default alias are merged; the canonical form
+  is the default alias target or else the most frequent spelling.
+  Returns canonical -> {"aliases": [...], "frequency": n}.
+  """
+  spellings = defaultdict(Counter)
+  postings_per_key = Counter()
+  for skills in skill_lists:
+    keys = set()
+    for raw in skills:
+      raw = ' '.join(raw.split())
+      if len(raw) <= 1:
+        continue
+      key = skill_key(raw)
+      group = skill_key(DEFAULT_ALIASES.get(key, raw))
+      spellings[group][raw] += 1
+      keys.add(group)
+    postings_per_key.update(keys)
+
+  vocabulary = {}
+  for group, counts in spellings.items():
+    canonical = DEFAULT_ALIASES.get(group) or counts.most_common(1)[0][0]
+    aliases = {skill_key(s) for s in counts} | {group}
+    aliases |= {k for k, v in DEFAULT_ALIASES.items() if v == canonical}
+    vocabulary[canonical] = {
+        "aliases": sorted(aliases),
+        "frequency": postings_per_key[group],
+    }
+  return vocabulary
+
+
+def load_vocabulary(force: bool = False) -> int:
+  """
+  Loads the alias map from the `skill_vocabulary` collection (or a matching
+  snapshot). Returns the number of canonical skills. On failure the current
+  map is kept (DEFAULT_ALIASES before a first load) and the load is retried
+  on use after SKILL_VOCABULARY_RETRY_INTERVAL seconds.
+  """
+  global _alias_map, _vocabulary_size, _loaded, _retry_at
+  with _load_lock:
+    if not force and (_loaded or time.monotonic() < _retry_at):
+      return _vocabulary_size
+
+    alias_map = dict(DEFAULT_ALIASES)
+    skills = 0
+    try:
+      for doc in _vocabulary_docs():
+        canonical = doc['skill']
+        skills += 1
+        alias_map[skill_key(canonical)] = canonical
+        for alias in doc.get('aliases', []):
+          alias_map[alias] = canonical
+    except Exception as e:
+      _retry_at = time.monotonic() + SKILL_VOCABULARY_RETRY_INTERVAL
+      logger.warning(
+          f"Could not load skill vocabulary, retrying in "
+          f"{SKILL_VOCABULARY_RETRY_INTERVAL:.0f}s: {str(e)}")
+      if force:
+        raise
+      return _vocabulary_size
+
+    _alias_map, _vocabulary_size = alias_map, skills
+    _loaded = True
+    logger.info(f"Loaded {skills} canonical skills and {len(alias_map)} aliases")
+    return skills
+
+
+def _vocabulary_docs():
+  """Returns the vocabulary documents from a matching snapshot or MongoDB."""
+  from app.services import snapshot
+
+  def vocabulary():
+    return get_db()[SKILL_VOCABULARY_COLLECTION_NAME]
+
+  current, _ = snapshot.usable_snapshot('vocabulary', vocabulary)
+  if current is not None:
+    return current.vocabulary_docs()
+  return vocabulary().find({}, {"skill": 1, "aliases": 1, "frequency": 1, "_id": 0})
+
+
+def canonicalize(skill: str) -> str:
+  """Returns the canonical spelling of a skill, or the cleaned input if unknown."""
+  if not _loaded and time.monotonic() >= _retry_at:
+    load_vocabulary()
+  cleaned = ' '.join(skill.split())
+  return _alias_map.get(cleaned.lower(), cleaned)
+
+
+def normalize_skill_list(skills: list, limit: int = MAX_SKILLS) -> list:
+  """Canonicalizes and de-duplicates a list of skills, keeping its order."""
+  normalized = []
+  seen = set()
+  for skill in skills or []:
+    if not isinstance(skill, str) or len(skill.strip()) <= 1:
+      continue
+    canonical = canonicalize(skill)
+    if canonical not in seen:
+      seen.add(canonical)
+      normalized.append(canonical)
+  return normalized[:limit] if limit is not None else normalized
+
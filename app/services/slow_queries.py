@@ -0,0 +1,219 @@
+"""
+Slow MongoDB query capture.
+
+The search services run their `find` calls through `find_logged`, which
+times the query (until the results are read). A query slower than
+SLOW_QUERY_THRESHOLD_MS is explained in the background and appended to the
+JSONL log at SLOW_QUERY_LOG with:
+- its shape: the filter, sort and projection with literal values replaced
+  by "?", so all searches of a kind share one shape,
+- the winning plan's stages and the indexes it used, with a flag for
+  collection scans,
+- the keys and documents examined against the documents returned.
+Each shape is explained at most once per SLOW_QUERY_EXPLAIN_INTERVAL
+seconds; slow queries in between are logged without a plan.
+
+`data/index_advisor.py` summarizes the log per shape and proposes (or
+creates) the missing indexes.
+"""
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration: a threshold of 0 disables the capture
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG', os.path.join(tempfile.gettempdir(), 'quickq-slow-queries.jsonl'))
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 60))
+
+# Operators whose operand is a list of sub-filters rather than a value
+_LOGICAL_OPERATORS = ('$and', '$or', '$nor')
+
+_explain_executor = None
+_explain_executor_lock = threading.Lock()
+_log_lock = threading.Lock()
+# Shape -> time it was last explained
+_explained_at = {}
+
+
+def _reset_after_fork():
+  global _explain_executor, _explain_executor_lock, _log_lock
+  _explain_executor = None
+  _explain_executor_lock = threading.Lock()
+  _log_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_explain_executor() -> ThreadPoolExecutor:
+  """Returns the single thread that explains slow queries off the request path."""
+  global _explain_executor
+  if _explain_executor is None:
+    with _explain_executor_lock:
+      if _explain_executor is None:
+        _explain_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='slow-query-explain')
+  return _explain_executor
+
+
+def query_shape(value):
+  """Replaces the literal values of a filter with "?", keeping fields and operators."""
+  if isinstance(value, dict):
+    shape = {}
+    for key, operand in value.items():
+      if key in _LOGICAL_OPERATORS and isinstance(operand, list):
+        shape[key] = [query_shape(condition) for condition in operand]
+      elif isinstance(operand, dict):
+        shape[key] = query_shape(operand)
+      else:
+        shape[key] = '?'
+    return shape
+  return '?'
+
+
+def shape_key(shape: dict) -> str:
+  """Returns a stable string for a query shape."""
+  return json.dumps(shape, sort_keys=True, default=str)
+
+
+def summarize_plan(explain: dict) -> dict:
+  """Extracts the winning plan and execution counters from an explain() result."""
+  winning = explain.get('queryPlanner', {}).get('winningPlan', {})
+  # Slot-based engine plans nest the classic plan under `queryPlan`
+  winning = winning.get('queryPlan', winning)
+  stages, indexes = [], []
+  pending = [winning]
+  while pending:
+    stage = pending.pop(0)
+    if not stage:
+      continue
+    stages.append(stage.get('stage', '?'))
+    if stage.get('indexName'):
+      indexes.append(stage['indexName'])
+    if stage.get('inputStage'):
+      pending.append(stage['inputStage'])
+    pending.extend(stage.get('inputStages', []))
+
+  stats = explain.get('executionStats', {})
+  returned = stats.get('nReturned')
+  examined = stats.get('totalDocsExamined')
+  return {
+      'plan': stages,
+      'indexes': indexes,
+      'collscan': 'COLLSCAN' in stages,
+      'keys_examined': stats.get('totalKeysExamined'),
+      'docs_examined': examined,
+      'returned': returned,
+      'examined_per_returned': (
+          round(examined / max(returned, 1), 1) if examined is not None else None),
+      'execution_ms': stats.get('executionTimeMillis'),
+  }
+
+
+def _append(record: dict):
+  line = json.dumps(record, default=str) + '\n'
+  with _log_lock:
+    directory = os.path.dirname(SLOW_QUERY_LOG)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    # One write per line in append mode, so workers do not interleave lines
+    with open(SLOW_QUERY_LOG, 'a') as f:
+      f.write(line)
+
+
+def _should_explain(key: str) -> bool:
+  now = time.monotonic()
+  with _log_lock:
+    last = _explained_at.get(key)
+    if last is not None and now - last < SLOW_QUERY_EXPLAIN_INTERVAL:
+      return False
+    _explained_at[key] = now
+    return True
+
+
+def _record(collection, source, query, projection, sort, limit, duration_ms):
+  shape = {
+      'filter': query_shape(query),
+      # Directions are kept; `{"$meta": "textScore"}` becomes `{"$meta": "?"}`
+      'sort': [[field, direction if isinstance(direction, int) else query_shape(direction)]
+               for field, direction in sort or []],
+      'projection': sorted(projection or {}),
+  }
+  key = shape_key(shape)
+  record = {
+      'ts': datetime.now(timezone.utc).isoformat(),
+      'source': source,
+      'database': collection.database.name,
+      'collection': collection.name,
+      'shape': shape,
+      'shape_key': key,
+      'limit': limit,
+      'duration_ms': round(duration_ms, 1),
+  }
+  if _should_explain(key):
+    try:
+      cursor = collection.find(query, projection)
+      if sort:
+        cursor = cursor.sort(sort)
+      if limit:
+        cursor = cursor.limit(limit)
+      record.update(summarize_plan(cursor.explain()))
+    except Exception as e:
+      logger.warning(f"Could not explain slow query from {source}: {str(e)}")
+
+  try:
+    _append(record)
+  except OSError as e:
+    logger.warning(f"Could not write the slow query log: {str(e)}")
+  if 'plan' in record:
+    plan = (f"plan {' > '.join(record['plan'])}, {record['docs_examined']} docs "
+            f"examined for {record['returned']} returned")
+  else:
+    plan = "not explained"
+  logger.warning(
+      f"Slow query from {source} on {record['collection']}: "
+      f"{record['duration_ms']}ms, {plan}, shape {shape_key(shape['filter'])}")
+
+
+def find_logged(collection, query: dict, projection: dict = None,
+                sort: list = None, limit: int = 0, source: str = None) -> list:
+  """
+  Runs `collection.find(...)` and returns the documents. Queries slower
+  than SLOW_QUERY_THRESHOLD_MS are explained and logged in the background.
+  """
+  start = time.perf_counter()
+  cursor = collection.find(query, projection)
+  if sort:
+    cursor = cursor.sort(sort)
+  if limit:
+    cursor = cursor.limit(limit)
+  documents = list(cursor)
+  duration_ms = (time.perf_counter() - start) * 1000
+
+  if SLOW_QUERY_THRESHOLD_MS and duration_ms >= SLOW_QUERY_THRESHOLD_MS:
+    source = source or collection.name
+    metrics.increment('mongo.slow_queries', source=source)
+    _get_explain_executor().submit(
+        _record, collection, source, query, projection, sort, limit, duration_ms)
+  return documents
+
+
+def read_log(path: str = None) -> list:
+  """Returns the records of a slow query log, skipping unreadable lines."""
+  records = []
+  with open(path or SLOW_QUERY_LOG) as f:
+    for line in f:
+      try:
+        records.append(json.loads(line))
+      except ValueError:
+        continue
+  return records
@@ -0,0 +1,359 @@
+"""
+Memory-mapped columnar snapshot of the job catalog and skill vocabulary.
+
+The ingestion pipeline (`data/normalize_skills.py`) writes a versioned
+snapshot to CATALOG_SNAPSHOT_DIR:
+
+    <dir>/CURRENT                 name of the current version
+    <dir>/<version>/manifest.json source versions, row counts, array list
+    <dir>/<version>/*.npy         one NumPy array per column
+
+Strings are stored as UTF-8 bytes plus offsets, categorical columns as codes
+into a dictionary, skill lists as offsets into skill codes and the catalog's
+bitset indexes as packed little-endian bytes per key. Workers map the arrays
+read-only (`np.load(mmap_mode='r')`), so the pages are shared between all
+processes of a host through the page cache. The catalog and vocabulary are
+built from the snapshot in milliseconds instead of reading every document
+from MongoDB.
+
+A snapshot is only used while it matches MongoDB: each collection's version
+(document count, last `_id`, last `updated_at`) is recorded when the
+snapshot is written and compared at load time. A stale snapshot is still
+used when MongoDB cannot be reached.
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration: snapshots are disabled unless a directory is set
+CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR', '')
+SNAPSHOT_KEEP_VERSIONS = 2
+SNAPSHOT_FORMAT = 1
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  # The mapped snapshot is shared with the parent; only the lock is reset
+  global _snapshot_lock
+  _snapshot_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def collection_version(collection) -> dict:
+  """Returns a cheap fingerprint of a collection's contents."""
+  last = next(collection.find({}, {'_id': 1}).sort('_id', -1).limit(1), None)
+  updated = next(collection.find(
+      {'updated_at': {'$exists': True}}, {'updated_at': 1, '_id': 0}
+  ).sort('updated_at', -1).limit(1), None)
+  return {
+      'count': collection.count_documents({}),
+      'last_id': str(last['_id']) if last else None,
+      'last_updated_at': updated['updated_at'].isoformat() if updated else None,
+  }
+
+
+class StringColumn:
+  """UTF-8 strings stored as one byte array plus offsets; -1 marks None."""
+
+  def __init__(self, data, starts, ends):
+    self._data = data
+    self._starts = starts
+    self._ends = ends
+
+  @staticmethod
+  def encode(values) -> dict:
+    encoded = [v.encode('utf-8') if v is not None else None for v in values]
+    lengths = np.fromiter((len(v) if v is not None else 0 for v in encoded),
+                          dtype=np.int64, count=len(encoded))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    nulls = np.fromiter((v is None for v in encoded), dtype=bool, count=len(encoded))
+    data = np.frombuffer(b''.join(v for v in encoded if v), dtype=np.uint8)
+    ends = offsets[1:].copy()
+    ends[nulls] = -1
+    return {'data': data, 'starts': offsets[:-1], 'ends': ends}
+
+  def to_list(self) -> list:
+    data = self._data.tobytes()
+    return [data[s:e].decode('utf-8') if e >= 0 else None
+            for s, e in zip(self._starts.tolist(), self._ends.tolist())]
+
+
+class Snapshot:
+  """A snapshot version mapped read-only from disk."""
+
+  def __init__(self, path: str):
+    self.path = path
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+      self.manifest = json.load(f)
+    if self.manifest.get('format') != SNAPSHOT_FORMAT:
+      raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')}")
+    self.version = self.manifest['version']
+    self.sources = self.manifest['sources']
+    self._arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        for name in self.manifest['arrays']
+    }
+
+  def _strings(self, name: str) -> list:
+    return StringColumn(
+        self._arrays[f"{name}.data"], self._arrays[f"{name}.starts"],
+        self._arrays[f"{name}.ends"]).to_list()
+
+  def _categorical(self, name: str) -> list:
+    values = self._strings(f"{name}.values")
+    return [values[code] for code in self._arrays[f"{name}.codes"].tolist()]
+
+  def _lists(self, name: str, values: list) -> list:
+    offsets = self._arrays[f"{name}.offsets"].tolist()
+    codes = self._arrays[f"{name}.codes"].tolist()
+    return [[values[code] for code in codes[start:end]]
+            for start, end in zip(offsets, offsets[1:])]
+
+  def _bitsets(self, name: str) -> dict:
+    keys = self._strings(f"{name}.keys")
+    data = self._arrays[f"{name}.bits"].tobytes()
+    offsets = self._arrays[f"{name}.offsets"].tolist()
+    return {key: int.from_bytes(data[start:end], 'little')
+            for key, start, end in zip(keys, offsets, offsets[1:])}
+
+  def vocabulary_docs(self) -> list:
+    """Returns the vocabulary as `skill_vocabulary` documents."""
+    skills = self._strings('vocabulary.skill')
+    aliases = self._lists('vocabulary.aliases', self._strings('vocabulary.alias_values'))
+    frequencies = self._arrays['vocabulary.frequency'].tolist()
+    return [{'skill': skill, 'aliases': skill_aliases, 'frequency': frequency}
+            for skill, skill_aliases, frequency in zip(skills, aliases, frequencies)]
+
+  def load_catalog(self, posting_skills):
+    """Builds a JobCatalog from the snapshot without reading MongoDB."""
+    from app.services.job_catalog import INDEX_NAMES, JobCatalog, JobRecord
+
+    columns = {
+        '_id': self._strings('postings.job_id'),
+        'job_title': self._strings('postings.job_title'),
+        'job_link': self._strings('postings.job_link'),
+        'first_seen': self._strings('postings.first_seen'),
+        'company': self._categorical('postings.company'),
+        'job_location': self._categorical('postings.job_location'),
+        'job level': self._categorical('postings.job_level'),
+        'job_type': self._categorical('postings.job_type'),
+    }
+    skills = self._lists('postings.skills', self._strings('postings.skill_values'))
+    names = list(columns)
+    records = [
+        JobRecord(dict(zip(names, row)), tuple(row_skills))
+        for row, row_skills in zip(zip(*columns.values()), skills)
+    ]
+    indexes = {name: self._bitsets(f"index.{name}") for name in INDEX_NAMES}
+    return JobCatalog.from_parts(records, indexes, posting_skills)
+
+
+def _add_strings(arrays: dict, name: str, values):
+  for part, array in StringColumn.encode(list(values)).items():
+    arrays[f"{name}.{part}"] = array
+
+
+def _add_categorical(arrays: dict, name: str, values):
+  dictionary = {}
+  codes = np.fromiter((dictionary.setdefault(v, len(dictionary)) for v in values),
+                      dtype=np.int32)
+  arrays[f"{name}.codes"] = codes
+  _add_strings(arrays, f"{name}.values", list(dictionary))
+
+
+def _add_lists(arrays: dict, name: str, lists, dictionary: dict):
+  lists = list(lists)
+  lengths = np.fromiter((len(values) for values in lists), dtype=np.int64, count=len(lists))
+  offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+  np.cumsum(lengths, out=offsets[1:])
+  arrays[f"{name}.offsets"] = offsets
+  arrays[f"{name}.codes"] = np.fromiter(
+      (dictionary.setdefault(v, len(dictionary)) for values in lists for v in values),
+      dtype=np.int32)
+
+
+def _add_bitsets(arrays: dict, name: str, index: dict):
+  keys = list(index)
+  encoded = [index[key].to_bytes((index[key].bit_length() + 7) // 8, 'little')
+             for key in keys]
+  offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+  np.cumsum([len(b) for b in encoded], out=offsets[1:])
+  _add_strings(arrays, f"{name}.keys", keys)
+  arrays[f"{name}.bits"] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+  arrays[f"{name}.offsets"] = offsets
+
+
+def _catalog_arrays(catalog) -> dict:
+  from app.services.job_catalog import INDEX_NAMES
+
+  records = catalog.records
+  if any(record is None for record in records):
+    raise ValueError("Snapshots are written from freshly built catalogs only")
+  arrays = {}
+  _add_strings(arrays, 'postings.job_id', (r.job_id for r in records))
+  _add_strings(arrays, 'postings.job_title', (r.job_title for r in records))
+  _add_strings(arrays, 'postings.job_link', (r.job_link for r in records))
+  _add_strings(arrays, 'postings.first_seen', (
+      str(r.first_seen) if r.first_seen is not None else None for r in records))
+  _add_categorical(arrays, 'postings.company', (r.company for r in records))
+  _add_categorical(arrays, 'postings.job_location', (r.job_location for r in records))
+  _add_categorical(arrays, 'postings.job_level', (r.job_level for r in records))
+  _add_categorical(arrays, 'postings.job_type', (r.job_type for r in records))
+  skill_values = {}
+  _add_lists(arrays, 'postings.skills', (r.skills for r in records), skill_values)
+  _add_strings(arrays, 'postings.skill_values', list(skill_values))
+  for name in INDEX_NAMES:
+    _add_bitsets(arrays, f"index.{name}", catalog.index(name))
+  return arrays
+
+
+def _vocabulary_arrays(docs: list) -> dict:
+  arrays = {}
+  _add_strings(arrays, 'vocabulary.skill', (d['skill'] for d in docs))
+  arrays['vocabulary.frequency'] = np.array(
+      [d.get('frequency', 0) for d in docs], dtype=np.int64)
+  alias_values = {}
+  _add_lists(arrays, 'vocabulary.aliases', (d.get('aliases', []) for d in docs),
+             alias_values)
+  _add_strings(arrays, 'vocabulary.alias_values', list(alias_values))
+  return arrays
+
+
+def write_snapshot(directory: str = None, db=None) -> str:
+  """
+  Writes a snapshot of the postings catalog and skill vocabulary from
+  MongoDB and makes it current. Returns the snapshot version.
+  """
+  from models import get_db
+  from app.services.job_catalog import (
+      CATALOG_PROJECTION, COLLECTION_NAME, JobCatalog)
+  from app.services.job_service import posting_skills
+  from app.services.skills import SKILL_VOCABULARY_COLLECTION_NAME
+
+  directory = directory or CATALOG_SNAPSHOT_DIR
+  if not directory:
+    raise ValueError("No snapshot directory configured (CATALOG_SNAPSHOT_DIR)")
+  db = db if db is not None else get_db()
+  postings = db[COLLECTION_NAME]
+  vocabulary = db[SKILL_VOCABULARY_COLLECTION_NAME]
+  postings.create_index('updated_at')
+
+  # Versions are taken first: changes made while reading make it stale
+  sources = {
+      'postings': collection_version(postings),
+      'vocabulary': collection_version(vocabulary),
+  }
+  vocabulary_docs = list(vocabulary.find(
+      {}, {'skill': 1, 'aliases': 1, 'frequency': 1, '_id': 0}))
+  catalog = JobCatalog(postings.find({}, CATALOG_PROJECTION), posting_skills)
+  arrays = {**_catalog_arrays(catalog), **_vocabulary_arrays(vocabulary_docs)}
+
+  created_at = datetime.now(timezone.utc)
+  digest = hashlib.sha256(json.dumps(sources, sort_keys=True).encode('utf-8'))
+  version = f"{created_at:%Y%m%dT%H%M%SZ}-{digest.hexdigest()[:8]}"
+
+  os.makedirs(directory, exist_ok=True)
+  tmp_path = os.path.join(directory, f".{version}.tmp")
+  os.makedirs(tmp_path, exist_ok=True)
+  for name, array in arrays.items():
+    np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+  manifest = {
+      'format': SNAPSHOT_FORMAT,
+      'version': version,
+      'created_at': created_at.isoformat(),
+      'sources': sources,
+      'postings': len(catalog.records),
+      'skills': len(vocabulary_docs),
+      'arrays': sorted(arrays),
+  }
+  with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+    json.dump(manifest, f, indent=2)
+  os.replace(tmp_path, os.path.join(directory, version))
+
+  current_tmp = os.path.join(directory, f".{CURRENT_FILE}.tmp")
+  with open(current_tmp, 'w') as f:
+    f.write(version)
+  os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+  _prune(directory, version)
+  logger.info(
+      f"Wrote snapshot {version}: {manifest['postings']} postings, "
+      f"{manifest['skills']} skills")
+  return version
+
+
+def _prune(directory: str, current: str):
+  """Keeps the newest SNAPSHOT_KEEP_VERSIONS versions. Mapped files stay readable."""
+  versions = sorted(
+      name for name in os.listdir(directory)
+      if not name.startswith('.') and name != CURRENT_FILE
+      and os.path.isdir(os.path.join(directory, name)))
+  for name in versions[:-SNAPSHOT_KEEP_VERSIONS]:
+    if name != current:
+      shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def open_current(directory: str = None):
+  """Returns the current snapshot (mapped once per version), or None."""
+  global _snapshot
+  directory = directory or CATALOG_SNAPSHOT_DIR
+  if not directory:
+    return None
+  try:
+    with open(os.path.join(directory, CURRENT_FILE)) as f:
+      version = f.read().strip()
+  except FileNotFoundError:
+    return None
+
+  with _snapshot_lock:
+    if _snapshot is None or _snapshot.path != os.path.join(directory, version):
+      try:
+        _snapshot = Snapshot(os.path.join(directory, version))
+      except Exception as e:
+        logger.warning(f"Could not open snapshot {version}: {str(e)}")
+        return None
+    return _snapshot
+
+
+def usable_snapshot(source: str, get_collection):
+  """
+  Returns the current snapshot and the collection's live version when the
+  snapshot matches it. When MongoDB cannot be reached, a stale snapshot is
+  returned with version None. Returns (None, version) otherwise.
+
+  `get_collection` is called inside the check, so a failure to connect
+  (`get_db` pings the server) also falls back to the stale snapshot.
+  """
+  snapshot = open_current()
+  try:
+    version = collection_version(get_collection())
+  except Exception as e:
+    if snapshot is None:
+      raise
+    logger.warning(
+        f"Could not check the '{source}' version, using snapshot "
+        f"{snapshot.version} as is: {str(e)}")
+    metrics.increment('snapshot.loads', source=source, outcome='stale')
+    return snapshot, None
+
+  if snapshot is not None and snapshot.sources.get(source) == version:
+    metrics.increment('snapshot.loads', source=source, outcome='current')
+    return snapshot, version
+  if snapshot is not None:
+    metrics.increment('snapshot.loads', source=source, outcome='outdated')
+    logger.info(f"Snapshot {snapshot.version} is outdated for '{source}'")
+  return None, version
@@ -0,0 +1,254 @@
+"""
+Autocomplete suggestions for the job search box.
+
+Job titles and canonical skills from `linkedin_jobs` are held in a sorted
+array of lowercase keys and looked up with `bisect`, so a prefix query is a
+binary search plus a short scan. Titles are also indexed from every word
+start ("dev" suggests "Android Developer"). Suggestions are ranked by how
+many postings they match, and the top results for prefixes of up to three
+characters are precomputed because their ranges are the largest.
+
+The index is built during warm-up and by the background refresher, never
+inside a request: until a build succeeds suggestions are empty, and a
+failed build is retried in the background with an exponential backoff.
+Posting changes picked up by the change sync adjust the counts of the loaded
+index (`update_suggest_index`) without scanning the collection again.
+"""
+import os
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from models import get_db
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SUGGEST_REFRESH_INTERVAL = int(os.environ.get('SUGGEST_REFRESH_INTERVAL', 3600))
+SUGGEST_MAX_LIMIT = 20
+SUGGEST_TYPES = ('title', 'skill')
+PRECOMPUTED_PREFIX_LENGTH = 3
+# Retry delay after a failed build, doubled per failure up to the maximum
+SUGGEST_RETRY_BACKOFF = float(os.environ.get('SUGGEST_RETRY_BACKOFF', 5))
+SUGGEST_RETRY_MAX_BACKOFF = float(os.environ.get('SUGGEST_RETRY_MAX_BACKOFF', 300))
+
+# Database configuration
+COLLECTION_NAME = 'linkedin_jobs'
+
+_index = None
+_index_lock = threading.Lock()
+_refresher_thread = None
+_build_thread = None
+# Consecutive failed builds and when the next background build may start
+_failures = 0
+_retry_at = 0.0
+
+
+def _reset_after_fork():
+  global _index_lock
+  _index_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _normalize(text: str) -> str:
+  return ' '.join((text or '').split()).lower()
+
+
+class SuggestIndex:
+  """Immutable sorted-array prefix index over titles and skills."""
+
+  def __init__(self, title_counts: Counter, skill_counts: Counter):
+    # entries[i] = (text, type, frequency)
+    self.entries = []
+    pairs = []
+    for kind, counts in (('title', title_counts), ('skill', skill_counts)):
+      for text, frequency in counts.items():
+        entry_id = len(self.entries)
+        self.entries.append((text, kind, frequency))
+        words = _normalize(text).split(' ')
+        starts = range(len(words)) if kind == 'title' else range(1)
+        for start in starts:
+          pairs.append((' '.join(words[start:]), entry_id))
+    pairs.sort()
+    self.keys = [key for key, _ in pairs]
+    self.ids = [entry_id for _, entry_id in pairs]
+    self.loaded_at = time.time()
+    self._top = self._precompute_short_prefixes()
+
+  def __len__(self):
+    return len(self.entries)
+
+  def _rank(self, entry_ids, kind: str, limit: int) -> list:
+    candidates = {i for i in entry_ids if kind is None or self.entries[i][1] == kind}
+    return heapq.nsmallest(
+        limit, candidates,
+        key=lambda i: (-self.entries[i][2], self.entries[i][0]))
+
+  def _precompute_short_prefixes(self) -> dict:
+    groups = {}
+    for key, entry_id in zip(self.keys, self.ids):
+      for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+        if len(key) >= length:
+          groups.setdefault(key[:length], set()).add(entry_id)
+    return {
+        (prefix, kind): self._rank(ids, kind, SUGGEST_MAX_LIMIT)
+        for prefix, ids in groups.items()
+        for kind in (None,) + SUGGEST_TYPES
+    }
+
+  def suggest(self, prefix: str, limit: int = 10, kind: str = None) -> list:
+    """Returns up to `limit` suggestions starting with `prefix`."""
+    prefix = _normalize(prefix)
+    if not prefix:
+      return []
+    limit = min(limit, SUGGEST_MAX_LIMIT)
+
+    top = self._top.get((prefix, kind))
+    if top is None and len(prefix) > PRECOMPUTED_PREFIX_LENGTH:
+      start = bisect_left(self.keys, prefix)
+      end = bisect_left(self.keys, prefix + '\uffff', start)
+      top = self._rank(self.ids[start:end], kind, limit)
+
+    return [
+        {"text": text, "type": entry_kind, "frequency": frequency}
+        for text, entry_kind, frequency in (self.entries[i] for i in (top or [])[:limit])
+    ]
+
+
+def build_suggest_index() -> SuggestIndex:
+  """Builds the index from the postings collection."""
+  from app.services.job_service import posting_skills
+
+  title_spellings = {}
+  title_counts = Counter()
+  skill_counts = Counter()
+  cursor = get_db()[COLLECTION_NAME].find(
+      {}, {"job_title": 1, "job_skills": 1, "skills_normalized": 1, "_id": 0})
+  for posting in cursor:
+    title = ' '.join((posting.get('job_title') or '').split())
+    if title:
+      key = title.lower()
+      title_spellings.setdefault(key, Counter())[title] += 1
+      title_counts[key] += 1
+    skill_counts.update(set(posting_skills(posting, limit=None)))
+
+  # Display each title in its most common spelling
+  titles = Counter({
+      title_spellings[key].most_common(1)[0][0]: count
+      for key, count in title_counts.items()
+  })
+  return SuggestIndex(titles, skill_counts)
+
+
+def refresh_suggest_index() -> int:
+  """
+  Rebuilds the suggestion index and swaps it in. Returns its size. A
+  failure is raised and delays the next background build.
+  """
+  global _index, _failures, _retry_at
+  start = time.perf_counter()
+  try:
+    index = build_suggest_index()
+  except Exception:
+    with _index_lock:
+      _failures += 1
+      _retry_at = time.monotonic() + min(
+          SUGGEST_RETRY_BACKOFF * 2 ** (_failures - 1), SUGGEST_RETRY_MAX_BACKOFF)
+    metrics.increment('suggest.index_builds', outcome='failed')
+    raise
+  with _index_lock:
+    _index = index
+    _failures = 0
+  metrics.increment('suggest.index_builds', outcome='built')
+  logger.info(
+      f"Built suggestion index with {len(index)} entries in "
+      f"{(time.perf_counter() - start) * 1000:.0f}ms")
+  return len(index)
+
+
+def update_suggest_index(removed: list, added: list) -> bool:
+  """
+  Adjusts the loaded index for changed postings, given as `(job_title,
+  skills)` pairs of their removed and added versions. Returns False when no
+  index is loaded; the next build then reads the current postings anyway.
+  """
+  global _index
+  with _index_lock:
+    index = _index
+    if index is None:
+      return False
+    spellings = {}
+    title_counts = Counter()
+    skill_counts = Counter()
+    for text, kind, frequency in index.entries:
+      if kind == 'title':
+        spellings[text.lower()] = text
+        title_counts[text.lower()] = frequency
+      else:
+        skill_counts[text] = frequency
+    for sign, postings in ((-1, removed), (1, added)):
+      for job_title, skills in postings:
+        title = ' '.join((job_title or '').split())
+        if title:
+          spellings.setdefault(title.lower(), title)
+          title_counts[title.lower()] += sign
+        for skill in set(skills):
+          skill_counts[skill] += sign
+    _index = SuggestIndex(
+        Counter({spellings[key]: count for key, count in title_counts.items()
+                 if count > 0}),
+        Counter({skill: count for skill, count in skill_counts.items()
+                 if count > 0}))
+  metrics.increment('suggest.index_updates')
+  return True
+
+
+def _build_in_background():
+  try:
+    refresh_suggest_index()
+  except Exception as e:
+    logger.warning(f"Suggestion index build failed: {str(e)}")
+
+
+def get_suggest_index():
+  """
+  Returns the suggestion index, or None while it is not built. A missing
+  index is built in a background thread, at most one at a time and not
+  before the backoff after a failure has passed.
+  """
+  global _build_thread
+  index = _index
+  if index is None:
+    with _index_lock:
+      building = _build_thread is not None and _build_thread.is_alive()
+      if _index is None and not building and time.monotonic() >= _retry_at:
+        _build_thread = threading.Thread(
+            target=_build_in_background, name='suggest-index-build', daemon=True)
+        _build_thread.start()
+  return index
+
+
+def _run_refresher(interval: int):
+  while True:
+    time.sleep(interval)
+    try:
+      refresh_suggest_index()
+    except Exception as e:
+      logger.error(f"Suggestion index refresh failed: {str(e)}")
+
+
+def start_suggest_refresher(interval: int = SUGGEST_REFRESH_INTERVAL):
+  """Starts the scheduled index refresh thread."""
+  global _refresher_thread
+  with _index_lock:
+    if _refresher_thread is not None and _refresher_thread.is_alive():
+      return
+    _refresher_thread = threading.Thread(
+        target=_run_refresher, args=(interval,),
+        name='suggest-index-refresher', daemon=True)
+    _refresher_thread.start()
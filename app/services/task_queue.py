@@ -0,0 +1,446 @@
+"""
+Asynchronous task queue for long-running AI work.
+
+`/feedback` and `/jobs` accept `"async": true`; the request is then queued,
+answered with 202 and a task ID, and executed off the web threads. Results
+are fetched with `GET /tasks/<task_id>` (optionally long-polling) or pushed
+to a `callback_url` webhook.
+
+Two backends are available (TASK_QUEUE_BACKEND):
+- `memory`: an in-process worker pool. Tasks are lost on restart.
+- `mongo`: tasks are stored in a MongoDB collection and executed by one or
+  more separate worker processes (`python worker.py`).
+At most TASK_QUEUE_MAX_DEPTH tasks may be unfinished at once; further tasks
+are rejected with 429. A MongoDB worker renews the lease of a task while it
+runs, and only the worker whose lease is current records the outcome and
+sends the webhook, so a task taken over after an expired lease is reported
+once.
+
+Webhooks only go to public http(s) hosts: a `callback_url` whose host is not
+in TASK_WEBHOOK_ALLOWED_HOSTS (when set) or resolves to a private, loopback,
+link-local or otherwise reserved address is rejected with 400, and checked
+again before delivery.
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+import ipaddress
+import threading
+from urllib.parse import urlsplit
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from models import get_db
+from app.services import metrics
+from app.services.exceptions import ServiceError
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TASK_QUEUE_BACKEND = os.environ.get('TASK_QUEUE_BACKEND', 'memory')
+TASK_WORKERS = int(os.environ.get('TASK_WORKERS', 4))
+TASK_RESULT_TTL = int(os.environ.get('TASK_RESULT_TTL', 3600))
+TASK_LEASE_SECONDS = int(os.environ.get('TASK_LEASE_SECONDS', 300))
+TASK_POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', 0.5))
+TASK_QUEUE_MAX_DEPTH = int(os.environ.get('TASK_QUEUE_MAX_DEPTH', 100))
+# Comma-separated hosts (and their subdomains) webhooks may be sent to;
+# empty allows any public host
+TASK_WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower().lstrip('.')
+    for host in os.environ.get('TASK_WEBHOOK_ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
+TASK_MAX_WAIT_SECONDS = 30
+TASK_WEBHOOK_TIMEOUT = 10
+WEBHOOK_SCHEMES = ('http', 'https')
+
+# Database configuration
+TASKS_COLLECTION_NAME = 'tasks'
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+# In-memory backend state: task_id -> task dict, task_id -> completion event
+_tasks = {}
+_events = {}
+_tasks_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_after_fork():
+  global _executor, _executor_lock, _tasks_lock
+  _executor = None
+  _executor_lock = threading.Lock()
+  _tasks_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _run_feedback_task(job: dict, questions: list, mode: str = None):
+  from app.services.feedback_service import generate_feedback_for_answers
+  return generate_feedback_for_answers(job, questions, mode)
+
+
+def _run_jobs_task(query: str, tech_skills: list = None, job_level: str = None,
+                   limit: int = 10, facets: bool = False):
+  from app.services.job_service import search_jobs
+  result = search_jobs(
+      query, tech_skills=tech_skills, job_level=job_level, limit=limit,
+      facets=facets)
+  if 'error' in result:
+    raise ServiceError(result['error'], 500)
+  return result
+
+
+# Task name -> handler. Arguments must be JSON/BSON serializable.
+TASK_HANDLERS = {
+    'feedback': _run_feedback_task,
+    'jobs': _run_jobs_task,
+}
+
+
+def _now():
+  return datetime.now(timezone.utc)
+
+
+def _public_view(task: dict) -> dict:
+  """Returns the client-facing representation of a task."""
+  view = {
+      'task_id': task['task_id'],
+      'name': task['name'],
+      'status': task['status'],
+      'created_at': _isoformat(task.get('created_at')),
+      'finished_at': _isoformat(task.get('finished_at')),
+  }
+  if task['status'] == SUCCEEDED:
+    view['result'] = task.get('result')
+  elif task['status'] == FAILED:
+    view['error'] = task.get('error')
+    view['status_code'] = task.get('status_code', 500)
+  return view
+
+
+def _isoformat(value):
+  return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _execute(name: str, kwargs: dict) -> dict:
+  """Runs a task handler and returns the fields describing its outcome."""
+  start = time.perf_counter()
+  try:
+    result = TASK_HANDLERS[name](**kwargs)
+    outcome = {'status': SUCCEEDED, 'result': result}
+  except ServiceError as e:
+    outcome = {'status': FAILED, 'error': str(e), 'status_code': e.status_code}
+  except Exception as e:
+    logger.error(f"Task '{name}' failed unexpectedly: {str(e)}")
+    outcome = {'status': FAILED, 'error': f'Internal server error: {str(e)}',
+               'status_code': 500}
+  metrics.increment('tasks.finished', task=name, status=outcome['status'])
+  logger.info(
+      f"Task '{name}' {outcome['status']} in {time.perf_counter() - start:.2f}s")
+  outcome['finished_at'] = _now()
+  return outcome
+
+
+def _is_public_address(address: str) -> bool:
+  ip = ipaddress.ip_address(address.split('%', 1)[0])
+  if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+    ip = ip.ipv4_mapped
+  return ip.is_global and not ip.is_multicast
+
+
+def validate_callback_url(callback_url) -> str:
+  """
+  Returns the callback URL if webhooks may be sent to it. Raises
+  ServiceError (400) for other schemes, hosts outside the allowlist and
+  hosts resolving to non-public addresses.
+  """
+  if not isinstance(callback_url, str):
+    raise ServiceError("`callback_url` must be a URL.", 400)
+  try:
+    parts = urlsplit(callback_url.strip())
+    host = (parts.hostname or '').lower()
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+  except ValueError:
+    raise ServiceError("`callback_url` must be a URL.", 400)
+  if parts.scheme not in WEBHOOK_SCHEMES or not host:
+    raise ServiceError("`callback_url` must be an http(s) URL.", 400)
+  if TASK_WEBHOOK_ALLOWED_HOSTS and not any(
+          host == allowed or host.endswith(f".{allowed}")
+          for allowed in TASK_WEBHOOK_ALLOWED_HOSTS):
+    raise ServiceError(f"Webhooks to '{host}' are not allowed.", 400)
+
+  try:
+    addresses = {info[4][0] for info in socket.getaddrinfo(
+        host, port, proto=socket.IPPROTO_TCP)}
+  except (socket.gaierror, UnicodeError):
+    raise ServiceError(f"`callback_url` host '{host}' cannot be resolved.", 400)
+  if not addresses or not all(_is_public_address(a) for a in addresses):
+    raise ServiceError(
+        f"`callback_url` host '{host}' resolves to a non-public address.", 400)
+  return callback_url.strip()
+
+
+def _send_webhook(task: dict):
+  """POSTs the finished task to its callback URL. Best effort."""
+  callback_url = task.get('callback_url')
+  if not callback_url:
+    return
+  try:
+    # Checked again: the host's addresses may have changed since enqueueing
+    validate_callback_url(callback_url)
+    # Redirects are not followed, so they cannot point at internal hosts
+    requests.post(callback_url, json=_public_view(task),
+                  timeout=TASK_WEBHOOK_TIMEOUT, allow_redirects=False)
+  except ServiceError as e:
+    logger.warning(
+        f"Webhook for task {task['task_id']} not delivered: {str(e)}")
+  except requests.RequestException as e:
+    logger.warning(
+        f"Webhook delivery for task {task['task_id']} failed: {str(e)}")
+
+
+# In-memory backend
+
+def _get_executor() -> ThreadPoolExecutor:
+  global _executor
+  if _executor is None:
+    with _executor_lock:
+      if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=TASK_WORKERS, thread_name_prefix='task-worker')
+  return _executor
+
+
+def _prune_memory_tasks():
+  """Drops finished in-memory tasks older than TASK_RESULT_TTL."""
+  cutoff = _now() - timedelta(seconds=TASK_RESULT_TTL)
+  with _tasks_lock:
+    expired = [
+        task_id for task_id, task in _tasks.items()
+        if task['status'] in FINISHED_STATUSES and task['finished_at'] < cutoff
+    ]
+    for task_id in expired:
+      _tasks.pop(task_id, None)
+      _events.pop(task_id, None)
+
+
+def _run_memory_task(task_id: str):
+  with _tasks_lock:
+    task = _tasks[task_id]
+    task.update({'status': RUNNING, 'started_at': _now()})
+  outcome = _execute(task['name'], task['kwargs'])
+  with _tasks_lock:
+    task.update(outcome)
+    event = _events.get(task_id)
+  if event:
+    event.set()
+  _send_webhook(task)
+
+
+# MongoDB backend
+
+def _tasks_collection():
+  return get_db()[TASKS_COLLECTION_NAME]
+
+
+def ensure_task_indexes():
+  """Creates the indexes used by the MongoDB task queue."""
+  collection = _tasks_collection()
+  collection.create_index('task_id', unique=True)
+  collection.create_index([('status', 1), ('created_at', 1)])
+  collection.create_index('expires_at', expireAfterSeconds=0)
+
+
+def _claim_next_task(worker_id: str):
+  """
+  Atomically claims the oldest queued task (or one whose lease expired)
+  under a new `lease_id`.
+  """
+  now = _now()
+  task = _tasks_collection().find_one_and_update(
+      {'$or': [
+          {'status': QUEUED},
+          {'status': RUNNING, 'lease_expires_at': {'$lt': now}},
+      ]},
+      {'$set': {
+          'status': RUNNING,
+          'started_at': now,
+          'worker': worker_id,
+          'lease_id': uuid.uuid4().hex,
+          'lease_expires_at': now + timedelta(seconds=TASK_LEASE_SECONDS),
+      }},
+      sort=[('created_at', 1)],
+      return_document=ReturnDocument.AFTER)
+  if task is not None:
+    task.pop('_id', None)
+  return task
+
+
+def _renew_lease(task: dict, stop: threading.Event):
+  """Extends the lease of a running task until `stop` is set or it is lost."""
+  while not stop.wait(TASK_LEASE_SECONDS / 3):
+    try:
+      result = _tasks_collection().update_one(
+          {'task_id': task['task_id'], 'lease_id': task['lease_id']},
+          {'$set': {'lease_expires_at': _now() + timedelta(
+              seconds=TASK_LEASE_SECONDS)}})
+    except PyMongoError as e:
+      logger.warning(f"Failed to renew lease of task {task['task_id']}: {str(e)}")
+      continue
+    if result.matched_count == 0:
+      return
+
+
+def _run_claimed_task(task: dict):
+  """
+  Runs a claimed task while renewing its lease, then records the outcome
+  and sends the webhook unless another worker took the task over.
+  """
+  stop = threading.Event()
+  renewer = threading.Thread(
+      target=_renew_lease, args=(task, stop),
+      name=f"task-lease-{task['task_id']}", daemon=True)
+  renewer.start()
+  try:
+    outcome = _execute(task['name'], task['kwargs'])
+  finally:
+    stop.set()
+  outcome['expires_at'] = outcome['finished_at'] + timedelta(
+      seconds=TASK_RESULT_TTL)
+  result = _tasks_collection().update_one(
+      {'task_id': task['task_id'], 'lease_id': task['lease_id']},
+      {'$set': outcome, '$unset': {'lease_expires_at': ''}})
+  if result.matched_count == 0:
+    metrics.increment('tasks.lease_lost', task=task['name'])
+    logger.warning(
+        f"Lease of task {task['task_id']} was taken over, dropping this outcome")
+    return
+  task.update(outcome)
+  _send_webhook(task)
+
+
+def run_worker(worker_threads: int = TASK_WORKERS):
+  """
+  Runs a MongoDB queue worker with `worker_threads` concurrent task slots.
+  Blocks forever; used by `worker.py`.
+  """
+  ensure_task_indexes()
+  worker_id = f"{socket.gethostname()}:{os.getpid()}"
+  logger.info(f"Task worker {worker_id} started with {worker_threads} threads")
+
+  def worker_loop():
+    while True:
+      try:
+        task = _claim_next_task(worker_id)
+      except Exception as e:
+        logger.error(f"Failed to claim task: {str(e)}")
+        task = None
+      if task is None:
+        time.sleep(TASK_POLL_INTERVAL)
+        continue
+
+      _run_claimed_task(task)
+
+  threads = [
+      threading.Thread(target=worker_loop, name=f'task-worker-{i}', daemon=True)
+      for i in range(worker_threads)
+  ]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+
+# Public API
+
+def _unfinished_count() -> int:
+  """Returns the number of queued and running tasks (hold `_tasks_lock` for
+  the in-memory backend)."""
+  if TASK_QUEUE_BACKEND == 'mongo':
+    return _tasks_collection().count_documents(
+        {'status': {'$in': [QUEUED, RUNNING]}})
+  return sum(1 for task in _tasks.values()
+             if task['status'] not in FINISHED_STATUSES)
+
+
+def _reject_full_queue(name: str):
+  metrics.increment('tasks.rejected', task=name)
+  logger.warning(f"Task queue full ({TASK_QUEUE_MAX_DEPTH}), rejected '{name}'")
+  raise ServiceError("Task queue is full, retry later.", 429)
+
+
+def enqueue_task(name: str, kwargs: dict, callback_url: str = None) -> dict:
+  """
+  Queues a task and returns its client-facing representation. Raises
+  ServiceError (429) when TASK_QUEUE_MAX_DEPTH tasks are already waiting.
+  """
+  if name not in TASK_HANDLERS:
+    raise ServiceError(f"Unknown task '{name}'.", 400)
+  if callback_url:
+    callback_url = validate_callback_url(callback_url)
+
+  task = {
+      'task_id': uuid.uuid4().hex,
+      'name': name,
+      'kwargs': kwargs,
+      'status': QUEUED,
+      'callback_url': callback_url,
+      'created_at': _now(),
+  }
+
+  if TASK_QUEUE_BACKEND == 'mongo':
+    # Counted after inserting, so concurrent submits cannot all pass the
+    # check; a task over the limit is withdrawn unless a worker took it
+    _tasks_collection().insert_one(dict(task))
+    if _unfinished_count() > TASK_QUEUE_MAX_DEPTH:
+      withdrawn = _tasks_collection().delete_one(
+          {'task_id': task['task_id'], 'status': QUEUED})
+      if withdrawn.deleted_count:
+        _reject_full_queue(name)
+  else:
+    _prune_memory_tasks()
+    with _tasks_lock:
+      if _unfinished_count() >= TASK_QUEUE_MAX_DEPTH:
+        _reject_full_queue(name)
+      _tasks[task['task_id']] = task
+      _events[task['task_id']] = threading.Event()
+    _get_executor().submit(_run_memory_task, task['task_id'])
+  metrics.increment('tasks.enqueued', task=name)
+
+  logger.info(f"Queued task '{name}' with ID {task['task_id']}")
+  return _public_view(task)
+
+
+def get_task(task_id: str, wait: float = 0):
+  """
+  Returns a task's client-facing representation, or None if it is unknown.
+  With `wait` > 0, blocks up to that many seconds for the task to finish.
+  """
+  wait = max(0, min(wait, TASK_MAX_WAIT_SECONDS))
+
+  if TASK_QUEUE_BACKEND == 'mongo':
+    deadline = time.monotonic() + wait
+    while True:
+      task = _tasks_collection().find_one({'task_id': task_id}, {'_id': 0})
+      if (task is None or task['status'] in FINISHED_STATUSES
+              or time.monotonic() >= deadline):
+        return _public_view(task) if task else None
+      time.sleep(TASK_POLL_INTERVAL)
+
+  with _tasks_lock:
+    event = _events.get(task_id)
+  if event is None:
+    return None
+  if wait:
+    event.wait(wait)
+  with _tasks_lock:
+    task = _tasks.get(task_id)
+    return _public_view(task) if task else None
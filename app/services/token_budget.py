@@ -0,0 +1,40 @@
+"""
+Prompt-size budgeting helpers.
+
+Token counts are estimated locally (about 4 characters per token for
+English text) so budgets can be enforced before a prompt is sent; exact
+counts are recorded afterwards from the response usage metadata.
+"""
+import os
+import math
+
+# Configuration
+LLM_INPUT_TOKEN_BUDGET = int(os.environ.get('LLM_INPUT_TOKEN_BUDGET', 8000))
+LLM_DESCRIPTION_TOKEN_BUDGET = int(os.environ.get(
+    'LLM_DESCRIPTION_TOKEN_BUDGET', LLM_INPUT_TOKEN_BUDGET * 2 // 5))
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = ' [truncated]'
+
+
+def estimate_tokens(text: str) -> int:
+  """Estimates the number of tokens in a text."""
+  return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+  """Truncates a text to roughly `max_tokens`, cutting at a word boundary."""
+  text = text or ''
+  if estimate_tokens(text) <= max_tokens:
+    return text
+
+  max_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+  cut = text[:max_chars]
+  if ' ' in cut:
+    cut = cut[:cut.rfind(' ')]
+  return cut + TRUNCATION_MARKER
+
+
+def remaining_budget(*parts: str, budget: int = LLM_INPUT_TOKEN_BUDGET) -> int:
+  """Returns how many tokens are left after the given prompt parts."""
+  return budget - sum(estimate_tokens(part) for part in parts)
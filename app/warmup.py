@@ -0,0 +1,96 @@
+"""
+Startup warm-up phase.
+
+Warm-up hooks pre-connect MongoDB, pre-initialize the Vertex AI model and
+pre-load in-process caches so the first user request does not pay for them.
+The readiness probe reports not-ready until warm-up has finished.
+
+Hooks registered as `shared` build read-only caches. In preload mode (see
+`gunicorn.conf.py`) they run once in the gunicorn master so the forked
+workers share them copy-on-write, and each worker only runs the others.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'True').lower() == 'true'
+
+# Registered hooks: name -> (callable, shared), in registration order
+_hooks = {}
+_state = {
+    'started': False,
+    'finished': not WARMUP_ENABLED,
+    'timings_ms': {},
+    'errors': {},
+}
+_state_lock = threading.Lock()
+
+
+def register_warmup(name: str, hook, shared: bool = False):
+  """
+  Registers a warm-up hook. Hooks run in registration order; `shared` hooks
+  build process-independent caches that may be loaded before forking.
+  """
+  _hooks[name] = (hook, shared)
+
+
+def is_warmed_up() -> bool:
+  """Returns True once warm-up has finished (or is disabled)."""
+  with _state_lock:
+    return _state['finished']
+
+
+def get_warmup_status() -> dict:
+  """Returns a copy of the warm-up state."""
+  with _state_lock:
+    return {
+        'finished': _state['finished'],
+        'timings_ms': dict(_state['timings_ms']),
+        'errors': dict(_state['errors']),
+    }
+
+
+def run_warmup(scope: str = None):
+  """
+  Runs the registered hooks: all of them, or only the 'shared' or 'worker'
+  ones; running the shared scope alone does not finish warm-up. A failing
+  hook is logged and recorded but does not stop the others; the background
+  readiness checker keeps reporting the affected dependency as failed until
+  it recovers.
+  """
+  total_start = time.perf_counter()
+  for name, (hook, shared) in list(_hooks.items()):
+    if scope is not None and shared != (scope == 'shared'):
+      continue
+    start = time.perf_counter()
+    try:
+      hook()
+    except Exception as e:
+      logger.warning(f"Warm-up step '{name}' failed: {str(e)}")
+      with _state_lock:
+        _state['errors'][name] = str(e)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    with _state_lock:
+      _state['timings_ms'][name] = round(elapsed_ms, 1)
+    logger.info(f"Warm-up step '{name}' took {elapsed_ms:.1f}ms")
+
+  if scope == 'shared':
+    return
+  with _state_lock:
+    _state['finished'] = True
+  logger.info(
+      f"Warm-up finished in {(time.perf_counter() - total_start) * 1000:.1f}ms")
+
+
+def start_warmup(scope: str = None):
+  """Runs warm-up in a background thread so the server can bind immediately."""
+  with _state_lock:
+    if not WARMUP_ENABLED or _state['started']:
+      return
+    _state['started'] = True
+  threading.Thread(
+      target=run_warmup, args=(scope,), name='warmup', daemon=True).start()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the chunked postings preprocessing pipeline.
+
+Writes a synthetic postings CSV (one million rows by default) shaped like
+the LinkedIn export, runs `data/preprocess_postings.py` over it and reports
+rows per second and peak memory. The vectorized output is also checked
+against a row-wise reference port of the notebook's `preprocess_job_data`
+on a sample, whose throughput is reported for comparison.
+
+Usage (from the repository root):
+    python benchmarks/preprocessing_throughput.py
+    python benchmarks/preprocessing_throughput.py --rows 200000 --workers 4
+"""
+import argparse
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+from preprocess_postings import (  # noqa: E402
+    CHUNK_SIZE, Deduplicator, iter_processed_chunks, preprocess_chunk)
+
+TITLES = ['Senior Software Engineer', 'Data Engineer', 'Jr. Python Developer',
+          'Lead Mobile Developer', 'Machine Learning Engineer', 'Intern, Backend',
+          'Principal Architect', 'DevOps Engineer', 'Frontend Developer']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', None]
+LOCATIONS = ['New York, NY', 'San Francisco, CA, United States', 'Austin, TX',
+             'Remote', 'London, England, United Kingdom', None]
+LEVELS = ['Mid senior', 'Associate']
+TYPES = ['Onsite', 'Hybrid', 'Remote']
+SKILLS = ['Python', 'SQL', 'AWS', 'Docker', 'Kubernetes', 'Java', 'React',
+          'JavaScript', 'Go', 'Terraform', 'Spark', 'Airflow']
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int, chunk_size: int = CHUNK_SIZE):
+  """Writes `rows` synthetic postings, including missing values and duplicates."""
+  rng = np.random.default_rng(seed)
+  header = True
+  for start in range(0, rows, chunk_size):
+    n = min(chunk_size, rows - start)
+    skill_sets = [', '.join(rng.choice(SKILLS, size=k, replace=False))
+                  for k in rng.integers(0, 8, size=n)]
+    df = pd.DataFrame({
+        'job_link': [f'https://www.linkedin.com/jobs/view/{i}'
+                     for i in range(start, start + n)],
+        'job_title': rng.choice(TITLES, size=n),
+        'company': rng.choice(np.array(COMPANIES, dtype=object), size=n),
+        'job_location': rng.choice(np.array(LOCATIONS, dtype=object), size=n),
+        'first_seen': (np.datetime64('2024-01-01')
+                       + rng.integers(0, 90, size=n)).astype(str),
+        'job level': rng.choice(LEVELS, size=n),
+        'job_type': rng.choice(TYPES, size=n),
+        'job_summary': rng.choice(
+            np.array(['Build services.', ' Ship features ', None], dtype=object), size=n),
+        'job_skills': np.where(rng.random(n) < 0.05, None, skill_sets),
+    })
+    # About 1% exact duplicates of earlier rows
+    duplicates = rng.random(n) < 0.01
+    df.loc[duplicates, 'job_link'] = df['job_link'].iloc[0]
+    df.loc[duplicates, df.columns[1:]] = df.iloc[0, 1:].to_numpy()
+    df.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+    header = False
+
+
+def reference_preprocess(df: pd.DataFrame) -> pd.DataFrame:
+  """Row-wise port of the notebook's `preprocess_job_data`, without output."""
+  df = df[df['job_title'].notna()].copy()
+  df['job_summary'] = df['job_summary'].fillna('No description available')
+  df['job_skills'] = df['job_skills'].fillna('Not specified')
+  df['company'] = df['company'].fillna('Unknown Company')
+  df['job_location'] = df['job_location'].fillna('Location not specified')
+  first_seen = pd.to_datetime(df['first_seen'], errors='coerce')
+  for col in ['job_title', 'company', 'job_location', 'job_summary', 'job_skills']:
+    df[col] = df[col].astype(str).str.strip()
+  df['title_length'] = df['job_title'].str.len()
+  df['summary_length'] = df['job_summary'].str.len()
+  df['is_remote'] = df['job_type'].str.contains('Remote', case=False, na=False)
+  df['is_senior'] = df['job_title'].str.contains(r'Senior|Lead|Principal|Sr\.', case=False, na=False)
+  df['is_junior'] = df['job_title'].str.contains(r'Junior|Jr\.|Entry|Intern', case=False, na=False)
+
+  def extract_skills_count(skills_str):
+    if pd.isna(skills_str) or skills_str == 'Not specified':
+      return 0
+    skills = re.split(r'[,;|]', str(skills_str))
+    return len([skill.strip() for skill in skills if skill.strip()])
+
+  def extract_location_parts(location_str):
+    if pd.isna(location_str) or location_str == 'Location not specified':
+      return 'Unknown', 'Unknown'
+    parts = str(location_str).split(', ')
+    city = parts[0].strip() if len(parts) > 0 else 'Unknown'
+    state = parts[1].strip() if len(parts) > 1 else 'Unknown'
+    return city, state
+
+  df['skills_count'] = df['job_skills'].apply(extract_skills_count)
+  df[['city', 'state']] = df['job_location'].apply(
+      lambda x: pd.Series(extract_location_parts(x)))
+  df['posting_year'] = first_seen.dt.year
+  df['posting_month'] = first_seen.dt.month
+  df['posting_day_of_week'] = first_seen.dt.day_name()
+  return df.drop_duplicates()
+
+
+def verify(path: str, sample_rows: int) -> float:
+  """Compares the pipeline with the reference on a sample. Returns reference rows/s."""
+  sample = pd.read_csv(path, nrows=sample_rows)
+  start = time.perf_counter()
+  expected = reference_preprocess(sample)
+  reference_rate = len(sample) / (time.perf_counter() - start)
+
+  actual = Deduplicator()(preprocess_chunk(sample))
+  columns = ['skills_count', 'city', 'state', 'title_length', 'summary_length',
+             'is_remote', 'is_senior', 'is_junior', 'posting_year', 'posting_month']
+  if len(actual) != len(expected):
+    raise AssertionError(f"row count {len(actual)} != reference {len(expected)}")
+  for column in columns:
+    if list(actual[column].astype(object)) != list(expected[column].astype(object)):
+      raise AssertionError(f"column '{column}' differs from the reference")
+  return reference_rate
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--rows', type=int, default=1_000_000)
+  parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+  parser.add_argument('--workers', type=int, default=1)
+  parser.add_argument('--sample', type=int, default=20_000,
+                      help='Rows checked against the row-wise reference')
+  parser.add_argument('--csv', default=None,
+                      help='Reuse this synthetic CSV (created if missing)')
+  parser.add_argument('--seed', type=int, default=7)
+  args = parser.parse_args()
+
+  path = args.csv or os.path.join(tempfile.gettempdir(), f'postings-{args.rows}.csv')
+  if not os.path.exists(path):
+    start = time.perf_counter()
+    write_synthetic_csv(path, args.rows, args.seed, args.chunk_size)
+    print(f"Wrote {args.rows} synthetic rows to {path} in "
+          f"{time.perf_counter() - start:.1f}s")
+
+  reference_rate = verify(path, args.sample)
+
+  start = time.perf_counter()
+  rows = sum(len(df) for df in iter_processed_chunks(path, args.chunk_size, args.workers))
+  elapsed = time.perf_counter() - start
+  peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+  print(f"Rows out:            {rows}")
+  print(f"Pipeline:            {elapsed:.2f}s, {rows / elapsed:,.0f} rows/s "
+        f"(chunk {args.chunk_size}, workers {args.workers})")
+  print(f"Row-wise reference:  {reference_rate:,.0f} rows/s "
+        f"(sample of {args.sample}, output matched)")
+  print(f"Peak RSS:            {peak_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline relevance benchmark for the job search re-ranking stage.
+
+Compares nDCG@k of the plain MongoDB textScore order with the hybrid
+ranking in `app/services/ranking.py` over a set of judged queries.
+
+Judgments are read from a JSON file, by default the hand-labelled set in
+`benchmarks/ranking_judgments.json`:
+[
+  {
+    "query": "data engineer",
+    "tech_skills": ["Python", "AWS"],
+    "job_level": "Mid senior",
+    "candidates": [
+      {"job_title": "Senior Data Engineer", "score": 1.7,
+       "job_skills": "Python, AWS, Docker", "job level": "Mid senior",
+       "first_seen": "2024-01-15", "relevance": 3},
+      ...
+    ]
+  }
+]
+where `score` is the candidate's textScore and `relevance` a graded label
+(0-3) judged from the posting as a whole, i.e. how well the role fits the
+search, not computed from the features the ranker scores. Recency is
+measured against JUDGMENT_DATE.
+
+Usage (from the repository root):
+    python benchmarks/ranking_relevance.py
+    python benchmarks/ranking_relevance.py --judgments judgments.json --k 10
+    python benchmarks/ranking_relevance.py --weights '{"text": 0.7, "skills": 0.3}'
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.job_service import parse_skills  # noqa: E402
+from app.services.ranking import RANKING_WEIGHTS, score_candidates  # noqa: E402
+
+DEFAULT_JUDGMENTS = os.path.join(os.path.dirname(__file__), 'ranking_judgments.json')
+JUDGMENT_DATE = datetime(2024, 6, 1)
+
+
+def ndcg_at_k(relevances: list, k: int) -> float:
+  """Normalized discounted cumulative gain of a ranked relevance list."""
+  gains = np.asarray(relevances, dtype=np.float64)
+  discounts = 1 / np.log2(np.arange(2, k + 2))
+  dcg = ((2 ** gains[:k] - 1) * discounts[:len(gains[:k])]).sum()
+  ideal = np.sort(gains)[::-1][:k]
+  idcg = ((2 ** ideal - 1) * discounts[:len(ideal)]).sum()
+  return dcg / idcg if idcg > 0 else 0.0
+
+
+def evaluate(judgments: list, k: int, weights: dict) -> dict:
+  """Returns the mean nDCG@k of the textScore and hybrid orderings."""
+  baseline, hybrid = [], []
+  for judged in judgments:
+    candidates = judged['candidates']
+    labels = np.array([c['relevance'] for c in candidates])
+
+    text_order = np.argsort([-c['score'] for c in candidates], kind='stable')
+    baseline.append(ndcg_at_k(labels[text_order], k))
+
+    scores = score_candidates(
+        candidates,
+        [parse_skills(c.get('job_skills', '')) for c in candidates],
+        judged.get('tech_skills'), judged.get('job_level'), weights,
+        now=JUDGMENT_DATE)
+    hybrid.append(ndcg_at_k(labels[np.argsort(-scores, kind='stable')], k))
+
+  return {
+      'queries': len(judgments),
+      'textscore_ndcg': float(np.mean(baseline)),
+      'hybrid_ndcg': float(np.mean(hybrid)),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--judgments', default=DEFAULT_JUDGMENTS,
+                      help='JSON file with judged queries')
+  parser.add_argument('--k', type=int, default=10, help='Cut-off for nDCG@k')
+  parser.add_argument('--weights', default=None,
+                      help='JSON ranking weights to evaluate')
+  args = parser.parse_args()
+
+  with open(args.judgments) as f:
+    judgments = json.load(f)
+
+  weights = dict(RANKING_WEIGHTS)
+  if args.weights:
+    weights.update(json.loads(args.weights))
+
+  result = evaluate(judgments, args.k, weights)
+  print(f"Queries:            {result['queries']}")
+  print(f"Weights:            {weights}")
+  print(f"textScore nDCG@{args.k}: {result['textscore_ndcg']:.4f}")
+  print(f"hybrid nDCG@{args.k}:    {result['hybrid_ndcg']:.4f}")
+
+
+if __name__ == '__main__':
+  main()
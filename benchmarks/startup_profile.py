@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Cold start profile and regression check.
+
+Runs the application import under `python -X importtime` in a fresh
+interpreter, prints the slowest top-level packages, times `create_app()` and
+compares the results against `startup_budget.json`. Exits with status 1 when
+the startup budget is exceeded or a heavy dependency (e.g. the Vertex AI SDK)
+is imported eagerly.
+
+Usage (from the repository root):
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --top 25 --json startup_profile.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), 'startup_budget.json')
+
+# Imports every module loaded at startup, then times the app factory.
+# Warm-up and real connections are disabled so only the cold-start code
+# path of this process is measured.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+import app.routes.health, app.routes.jobs, app.routes.questions, app.routes.feedback
+imported = time.perf_counter()
+eager = [m for m in {heavy!r} if m in sys.modules]
+create_app()
+created = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'eager_heavy_imports': eager,
+}}))
+"""
+
+
+def _probe_env() -> dict:
+  env = dict(os.environ)
+  env.update({
+      'WARMUP_ENABLED': 'false',
+      'MONGODB_URI': '',
+      'PYTHONPATH': ROOT,
+  })
+  return env
+
+
+def profile_imports(budget: dict) -> dict:
+  """Runs the probe under -X importtime and returns the parsed results."""
+  code = PROBE.format(heavy=budget['forbidden_eager_imports'])
+  result = subprocess.run(
+      [sys.executable, '-X', 'importtime', '-c', code],
+      cwd=ROOT, env=_probe_env(), capture_output=True, text=True, check=True)
+
+  packages = defaultdict(float)
+  for line in result.stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    fields = line[len('import time:'):].split('|')
+    if len(fields) != 3:
+      continue
+    module = fields[2].strip().split('.')[0]
+    packages[module] += int(fields[0]) / 1000
+
+  timings = json.loads(result.stdout.strip().splitlines()[-1])
+  timings['packages_ms'] = dict(
+      sorted(packages.items(), key=lambda item: -item[1]))
+  return timings
+
+
+def check_budget(profile: dict, budget: dict) -> list:
+  """Returns a list of budget violations."""
+  violations = []
+  if profile['eager_heavy_imports']:
+    violations.append(
+        f"Heavy modules imported at startup: {profile['eager_heavy_imports']}")
+  if profile['import_ms'] > budget['max_import_ms']:
+    violations.append(
+        f"Import took {profile['import_ms']:.0f}ms "
+        f"(budget {budget['max_import_ms']}ms)")
+  if profile['create_app_ms'] > budget['max_create_app_ms']:
+    violations.append(
+        f"create_app() took {profile['create_app_ms']:.0f}ms "
+        f"(budget {budget['max_create_app_ms']}ms)")
+  return violations
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--top', type=int, default=15,
+                      help='Number of packages to show in the breakdown')
+  parser.add_argument('--json', dest='json_path', default=None,
+                      help='Write the full profile to this file')
+  args = parser.parse_args()
+
+  with open(BUDGET_FILE) as f:
+    budget = json.load(f)
+
+  profile = profile_imports(budget)
+
+  print(f"Import:       {profile['import_ms']:8.1f} ms")
+  print(f"create_app(): {profile['create_app_ms']:8.1f} ms")
+  print(f"\nSlowest packages (self time, top {args.top}):")
+  for name, ms in list(profile['packages_ms'].items())[:args.top]:
+    print(f"  {name:<30} {ms:8.1f} ms")
+
+  if args.json_path:
+    with open(args.json_path, 'w') as f:
+      json.dump(profile, f, indent=2)
+
+  violations = check_budget(profile, budget)
+  if violations:
+    print("\nStartup budget exceeded:")
+    for violation in violations:
+      print(f"  - {violation}")
+    sys.exit(1)
+  print("\nStartup within budget.")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,194 @@
+"""
+Index advisor for the slow query log.
+
+Reads the JSONL log written by `app/services/slow_queries.py`, groups the
+slow queries by shape and prints, per shape, how often and how slowly it
+ran, its winning plan and how many documents it examined per document
+returned. It then compares each shape with the collection's indexes and
+proposes the missing ones:
+- a text index when a `$text` query has none to use,
+- otherwise a compound index ordered by the equality, sort and range
+  fields of the filter (the ESR rule), unless an existing index has that
+  prefix.
+Case-insensitive `$regex` filters are placed last: an index can only be
+scanned for them, not seeked.
+
+Usage (from the repository root):
+    python data/index_advisor.py
+    python data/index_advisor.py --log /tmp/quickq-slow-queries.jsonl
+    python data/index_advisor.py --uri mongodb://localhost:27017 --create
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+load_dotenv()
+
+from app.services.slow_queries import SLOW_QUERY_LOG, read_log  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields of the text index each searched collection needs
+TEXT_INDEX_FIELDS = {
+    'linkedin_jobs': ['job_title', 'job_skills'],
+    'questions': ['Question', 'Answer', 'Category'],
+}
+EQUALITY_OPERATORS = {'$eq', '$in'}
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte', '$ne', '$nin', '$regex', '$exists'}
+
+
+def _conditions(shape: dict):
+  """Yields (field, operators) of a filter shape, flattening `$and`."""
+  for key, operand in shape.items():
+    if key == '$and':
+      for condition in operand:
+        yield from _conditions(condition)
+    elif key.startswith('$'):
+      yield key, {key}
+    elif isinstance(operand, dict):
+      yield key, set(operand)
+    else:
+      yield key, {'$eq'}
+
+
+def proposed_index(shape: dict) -> dict:
+  """
+  Returns the index a query shape needs as `{"keys": [...], "kind": ...}`,
+  or None when no index would help.
+  """
+  conditions = list(_conditions(shape['filter']))
+  if any(field == '$text' for field, _ in conditions):
+    return {'kind': 'text', 'keys': []}
+  if any(field.startswith('$') for field, _ in conditions):
+    # $or / $nor need one index per branch; not advised automatically
+    return None
+
+  equality, ranges = [], []
+  for field, operators in conditions:
+    if operators <= EQUALITY_OPERATORS:
+      equality.append(field)
+    elif operators & RANGE_OPERATORS:
+      ranges.append(field)
+  sort = [(field, direction) for field, direction in shape.get('sort', [])
+          if isinstance(direction, int)]
+  keys = [(field, 1) for field in equality]
+  keys += [(field, direction) for field, direction in sort if field not in equality]
+  keys += [(field, 1) for field in ranges if field not in dict(keys)]
+  if not keys or keys == [('_id', 1)]:
+    return None
+  return {'kind': 'compound', 'keys': keys}
+
+
+def missing_index(proposal: dict, collection_name: str, index_information: dict):
+  """Returns the index keys to create, or None if an existing index covers them."""
+  existing = [list(info['key']) for info in index_information.values()]
+  if proposal['kind'] == 'text':
+    if any(direction == 'text' for keys in existing for _, direction in keys):
+      return None
+    fields = TEXT_INDEX_FIELDS.get(collection_name)
+    return [(field, 'text') for field in fields] if fields else None
+
+  wanted = [tuple(key) for key in proposal['keys']]
+  for keys in existing:
+    if [tuple(key) for key in keys[:len(wanted)]] == wanted:
+      return None
+  return wanted
+
+
+def summarize(records: list) -> list:
+  """Groups slow query records by collection and shape, slowest total first."""
+  groups = defaultdict(list)
+  for record in records:
+    groups[(record['database'], record['collection'], record['shape_key'])].append(record)
+
+  summaries = []
+  for (database, collection, _), group in groups.items():
+    durations = [r['duration_ms'] for r in group]
+    explained = [r for r in group if 'plan' in r]
+    latest = explained[-1] if explained else {}
+    ratios = [r['examined_per_returned'] for r in explained
+              if r.get('examined_per_returned') is not None]
+    summaries.append({
+        'database': database,
+        'collection': collection,
+        'sources': sorted({r['source'] for r in group}),
+        'shape': group[-1]['shape'],
+        'count': len(group),
+        'p50_ms': round(statistics.median(durations), 1),
+        'max_ms': max(durations),
+        'total_ms': round(sum(durations), 1),
+        'plan': latest.get('plan'),
+        'indexes': latest.get('indexes'),
+        'collscan': any(r.get('collscan') for r in explained),
+        'max_examined_per_returned': max(ratios) if ratios else None,
+    })
+  summaries.sort(key=lambda s: -s['total_ms'])
+  return summaries
+
+
+def _print_summary(summary: dict):
+  print(f"{summary['database']}.{summary['collection']} "
+        f"({', '.join(summary['sources'])})")
+  print(f"  shape:    {json.dumps(summary['shape']['filter'])}")
+  if summary['shape'].get('sort'):
+    print(f"  sort:     {json.dumps(summary['shape']['sort'])}")
+  print(f"  slow:     {summary['count']} queries, p50 {summary['p50_ms']}ms, "
+        f"max {summary['max_ms']}ms")
+  if summary['plan']:
+    print(f"  plan:     {' > '.join(summary['plan'])}"
+          f"{'  [COLLECTION SCAN]' if summary['collscan'] else ''}")
+    print(f"  indexes:  {', '.join(summary['indexes']) or 'none'}")
+    print(f"  examined: up to {summary['max_examined_per_returned']} docs "
+          f"per doc returned")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--log', default=SLOW_QUERY_LOG,
+                      help='Slow query log (default SLOW_QUERY_LOG)')
+  parser.add_argument('--uri', help='MongoDB URI (default MONGODB_URI)')
+  parser.add_argument('--create', action='store_true',
+                      help='Create the proposed indexes')
+  args = parser.parse_args()
+
+  if args.uri:
+    os.environ['MONGODB_URI'] = args.uri
+  from models import close_client, get_db
+
+  summaries = summarize(read_log(args.log))
+  if not summaries:
+    print(f"No slow queries in {args.log}")
+    return
+
+  try:
+    for summary in summaries:
+      _print_summary(summary)
+      proposal = proposed_index(summary['shape'])
+      if proposal is None:
+        print("  advice:   no single index would help\n")
+        continue
+      collection = get_db(summary['database'])[summary['collection']]
+      keys = missing_index(proposal, summary['collection'], collection.index_information())
+      if keys is None:
+        print("  advice:   an existing index covers this shape\n")
+        continue
+      print(f"  advice:   db.{summary['collection']}.createIndex("
+            f"{json.dumps(dict(keys))})")
+      if args.create:
+        name = collection.create_index(keys)
+        print(f"  created:  {name}")
+      print()
+  finally:
+    close_client()
+
+
+if __name__ == '__main__':
+  main()
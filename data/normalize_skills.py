@@ -0,0 +1,127 @@
+"""
+Ingestion-time skill normalization for the LinkedIn postings.
+
+Splits every posting's raw `job_skills` string once, builds the canonical
+skill vocabulary with its alias table and frequency stats, and stores:
+- the vocabulary in `job_postings_db.skill_vocabulary`, and
+- each posting's canonical skills in its `skills_normalized` field and its
+  lowercased job level in `job_level_normalized`, both indexed for the
+  search filters and facets.
+It then writes the memory-mapped catalog snapshot to `--snapshot-dir`
+(default CATALOG_SNAPSHOT_DIR), which workers load at startup.
+Re-run it after importing new postings.
+
+Usage (from the repository root):
+    python data/normalize_skills.py
+    python data/normalize_skills.py --dry-run
+    python data/normalize_skills.py --snapshot-dir /var/lib/quickq/snapshots
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from pymongo import ReplaceOne, UpdateOne
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+load_dotenv()
+
+from app.services.job_service import (  # noqa: E402
+    COLLECTION_NAME, LEVEL_FIELD, level_key)
+from app.services.snapshot import (  # noqa: E402
+    CATALOG_SNAPSHOT_DIR, write_snapshot)
+from app.services.skills import (  # noqa: E402
+    SKILL_VOCABULARY_COLLECTION_NAME, build_vocabulary, load_vocabulary,
+    normalize_skill_list, split_skill_string)
+from models import close_client, get_db  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def normalize_skills(dry_run: bool = False, snapshot_dir: str = None) -> dict:
+  """
+  Builds the vocabulary and writes `skills_normalized` and the normalized
+  job level for every posting, then a catalog snapshot if `snapshot_dir`
+  is set.
+  """
+  db = get_db()
+  postings = db[COLLECTION_NAME]
+
+  raw_skills, levels = {}, {}
+  for doc in postings.find({}, {"job_skills": 1, "job level": 1}):
+    raw_skills[doc['_id']] = split_skill_string(doc.get('job_skills', ''))
+    levels[doc['_id']] = level_key(doc.get('job level'))
+  vocabulary = build_vocabulary(raw_skills.values())
+  logger.info(
+      f"Built a vocabulary of {len(vocabulary)} canonical skills from "
+      f"{len(raw_skills)} postings")
+
+  top = sorted(vocabulary.items(), key=lambda item: -item[1]['frequency'])[:20]
+  for skill, entry in top:
+    logger.info(f"  {skill}: {entry['frequency']} postings, aliases {entry['aliases']}")
+
+  if dry_run:
+    return {"skills": len(vocabulary), "postings": len(raw_skills)}
+
+  updated_at = datetime.now(timezone.utc)
+  vocabulary_collection = db[SKILL_VOCABULARY_COLLECTION_NAME]
+  if vocabulary:
+    vocabulary_collection.bulk_write([
+        ReplaceOne({"skill": skill}, {
+            "skill": skill,
+            "aliases": entry['aliases'],
+            "frequency": entry['frequency'],
+            "updated_at": updated_at,
+        }, upsert=True)
+        for skill, entry in vocabulary.items()
+    ])
+  vocabulary_collection.delete_many({"skill": {"$nin": list(vocabulary)}})
+  vocabulary_collection.create_index("skill", unique=True)
+  vocabulary_collection.create_index("aliases")
+
+  # Canonicalize postings with the alias map that was just stored
+  load_vocabulary(force=True)
+  operations = []
+  for posting_id, skills in raw_skills.items():
+    operations.append(UpdateOne(
+        {"_id": posting_id},
+        {"$set": {"skills_normalized": normalize_skill_list(skills, limit=None),
+                  LEVEL_FIELD: levels[posting_id] or None,
+                  "updated_at": updated_at}}))
+    if len(operations) >= BATCH_SIZE:
+      postings.bulk_write(operations, ordered=False)
+      operations = []
+  if operations:
+    postings.bulk_write(operations, ordered=False)
+  postings.create_index("skills_normalized")
+  postings.create_index(LEVEL_FIELD)
+
+  logger.info(f"Normalized skills for {len(raw_skills)} postings")
+  stats = {"skills": len(vocabulary), "postings": len(raw_skills)}
+  if snapshot_dir:
+    stats["snapshot"] = write_snapshot(snapshot_dir, db)
+  return stats
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--dry-run', action='store_true',
+                      help='Build and print the vocabulary without writing it')
+  parser.add_argument('--snapshot-dir', default=CATALOG_SNAPSHOT_DIR,
+                      help='Write the catalog snapshot here (default '
+                           'CATALOG_SNAPSHOT_DIR; empty to skip)')
+  args = parser.parse_args()
+
+  try:
+    normalize_skills(args.dry_run, args.snapshot_dir)
+  finally:
+    close_client()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,123 @@
+"""
+Offline pipeline that precomputes interview question sets.
+
+Question sets are generated either per `linkedin_jobs` posting or per
+canonical (role, skill-set) cluster and stored as a new version in
+`software_questions_db.question_sets`. `generate_interview_questions`
+serves these sets before falling back to live generation.
+
+Usage (from the repository root):
+    python data/precompute_question_sets.py --by cluster --variants 3
+    python data/precompute_question_sets.py --by posting --limit 500
+"""
+import argparse
+import logging
+import os
+import sys
+from collections import Counter, defaultdict
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+load_dotenv()
+
+from app import create_app  # noqa: E402
+from app.services.exceptions import ServiceError  # noqa: E402
+from app.services.job_service import COLLECTION_NAME, posting_skills  # noqa: E402
+from app.services.question_store import (  # noqa: E402
+    cluster_key, ensure_question_store_indexes, posting_key, save_question_set)
+from app.services.questions_service import (  # noqa: E402
+    generate_ai_questions, is_parsed_question_set)
+from models import get_db  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_postings(limit=None):
+  """Yields postings from the LinkedIn jobs collection."""
+  projection = {
+      "job_title": 1, "job_summary": 1, "job_skills": 1,
+      "skills_normalized": 1, "job_link": 1, "_id": 0,
+  }
+  cursor = get_db()[COLLECTION_NAME].find({}, projection)
+  if limit:
+    cursor = cursor.limit(limit)
+  for posting in cursor:
+    yield {
+        "title": posting.get('job_title', 'N/A'),
+        "description": posting.get('job_summary', ''),
+        "skills": posting_skills(posting),
+        "job_link": posting.get('job_link'),
+    }
+
+
+def _build_targets(by: str, limit=None) -> list:
+  """Builds the list of (key, title, description, skills) to precompute."""
+  if by == 'posting':
+    return [
+        (posting_key(p['job_link']), p['title'], p['description'], p['skills'])
+        for p in _iter_postings(limit) if posting_key(p['job_link'])
+    ]
+
+  clusters = defaultdict(list)
+  for posting in _iter_postings():
+    clusters[cluster_key(posting['title'], posting['skills'])].append(posting)
+
+  # Most populated clusters first, so a limited run covers the most traffic
+  ordered = sorted(clusters.items(), key=lambda item: -len(item[1]))
+  if limit:
+    ordered = ordered[:limit]
+
+  targets = []
+  for key, postings in ordered:
+    title = Counter(p['title'] for p in postings).most_common(1)[0][0]
+    representative = max(postings, key=lambda p: len(p['description'] or ''))
+    targets.append(
+        (key, title, representative['description'], postings[0]['skills']))
+  return targets
+
+
+def precompute_question_sets(by: str = 'cluster', variants: int = 3, limit=None):
+  """Generates and stores question set variants for every target."""
+  ensure_question_store_indexes()
+  targets = _build_targets(by, limit)
+  logger.info(f"Precomputing {variants} variants for {len(targets)} {by} keys")
+
+  stored = 0
+  for key, title, description, skills in targets:
+    generated = []
+    for _ in range(variants):
+      try:
+        questions = generate_ai_questions(title, description, skills)
+      except ServiceError as e:
+        logger.warning(f"Skipping variant for '{key}': {str(e)}")
+        continue
+      if is_parsed_question_set(questions):
+        generated.append(questions)
+
+    if generated:
+      version = save_question_set(key, title, skills, generated)
+      stored += 1
+      logger.info(f"Stored {len(generated)} variants for '{key}' (v{version})")
+
+  logger.info(f"Precomputed question sets for {stored}/{len(targets)} keys")
+  return stored
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--by', choices=['posting', 'cluster'], default='cluster',
+                      help='Precompute per posting or per (role, skills) cluster')
+  parser.add_argument('--variants', type=int, default=3,
+                      help='Number of question set variants per key')
+  parser.add_argument('--limit', type=int, default=None,
+                      help='Maximum number of postings/clusters to process')
+  args = parser.parse_args()
+
+  app = create_app()
+  with app.app_context():
+    precompute_question_sets(args.by, args.variants, args.limit)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,259 @@
+"""
+Chunked preprocessing pipeline for the LinkedIn postings CSV.
+
+Production version of `preprocess_job_data` from
+`ai_engineer_data_preprocessing_demo.ipynb`: the same cleaning and derived
+features, computed with vectorized pandas/NumPy operations instead of
+row-wise `apply`, over a CSV read in chunks so memory stays bounded by
+the chunk size. Chunks can be processed by a pool of worker processes.
+Duplicate rows are dropped across the whole file, not just within a chunk.
+
+The processed postings can be written to a CSV or upserted by `job_link`
+into `job_postings_db.linkedin_jobs`, replacing the insert cells of
+`process_datasets.ipynb`. Run `normalize_skills.py` after ingesting: it
+normalizes the new postings' skills and writes the catalog snapshot.
+
+Usage (from the repository root):
+    python data/preprocess_postings.py postings.csv --output processed.csv
+    python data/preprocess_postings.py postings.csv --ingest --workers 4
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 100_000
+INGEST_BATCH_SIZE = 1000
+
+TEXT_COLUMNS = ['job_title', 'company', 'job_location', 'job_summary', 'job_skills']
+FILL_VALUES = {
+    'job_summary': 'No description available',
+    'job_skills': 'Not specified',
+    'company': 'Unknown Company',
+    'job_location': 'Location not specified',
+}
+SENIOR_PATTERN = r'Senior|Lead|Principal|Sr\.'
+JUNIOR_PATTERN = r'Junior|Jr\.|Entry|Intern'
+# A skill is a delimited part with at least one non-space character
+SKILL_PATTERN = r'[^,;|]*[^,;|\s][^,;|]*'
+DERIVED_COLUMNS = [
+    'title_length', 'summary_length', 'is_remote', 'is_senior', 'is_junior',
+    'skills_count', 'city', 'state', 'posting_year', 'posting_month',
+    'posting_day_of_week',
+]
+
+
+def _distinct(series: pd.Series):
+  """
+  Returns `(codes, values)`: the distinct stripped strings of a column and
+  each row's position among them. Titles, locations, job types and skill
+  lists repeat heavily, so string work is done once per distinct value and
+  broadcast back with `values.to_numpy()[codes]`. Missing values get a
+  code of their own rather than -1, which would index the last value.
+  """
+  codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+  return codes, pd.Series(uniques, dtype=object).str.strip()
+
+
+def preprocess_chunk(df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Cleans one chunk of raw postings and adds the derived features. Rows
+  without a job title are dropped; duplicates are left to the caller, which
+  sees every chunk.
+  """
+  df = df[df['job_title'].notna()].copy()
+  if 'job_type' not in df:
+    df['job_type'] = ''
+
+  # 1. Missing values
+  df = df.fillna({col: value for col, value in FILL_VALUES.items() if col in df})
+
+  # 2. Types
+  distinct = {}
+  for col in TEXT_COLUMNS + ['job_type']:
+    codes, values = distinct[col] = _distinct(df[col])
+    if col in TEXT_COLUMNS:
+      df[col] = values.to_numpy()[codes]
+  first_seen = pd.to_datetime(df['first_seen'], errors='coerce', format='ISO8601')
+
+  # 3. Derived features
+  codes, titles = distinct['job_title']
+  df['title_length'] = titles.str.len().to_numpy()[codes]
+  df['is_senior'] = titles.str.contains(SENIOR_PATTERN, case=False).to_numpy()[codes]
+  df['is_junior'] = titles.str.contains(JUNIOR_PATTERN, case=False).to_numpy()[codes]
+
+  codes, summaries = distinct['job_summary']
+  df['summary_length'] = summaries.str.len().to_numpy()[codes]
+
+  codes, job_types = distinct['job_type']
+  df['is_remote'] = job_types.str.contains(
+      'remote', case=False, regex=False, na=False).to_numpy()[codes]
+
+  codes, skills = distinct['job_skills']
+  counts = skills.str.count(SKILL_PATTERN).where(skills != 'Not specified', 0)
+  df['skills_count'] = counts.to_numpy(dtype='int64')[codes]
+
+  # "City, State, Country": the first two parts
+  codes, locations = distinct['job_location']
+  parts = locations.str.split(', ', n=2, expand=True).reindex(columns=[0, 1])
+  parts = parts.apply(lambda col: col.str.strip()).fillna('Unknown')
+  parts[locations == 'Location not specified'] = 'Unknown'
+  city_state = parts.to_numpy()[codes]
+  df['city'] = city_state[:, 0]
+  df['state'] = city_state[:, 1]
+
+  df['posting_year'] = first_seen.dt.year.astype('Int64')
+  df['posting_month'] = first_seen.dt.month.astype('Int64')
+  df['posting_day_of_week'] = first_seen.dt.day_name()
+  # Stored as it was: the API reads `first_seen` as a YYYY-MM-DD string
+  df['first_seen'] = first_seen.dt.strftime('%Y-%m-%d')
+
+  # Row fingerprint of the cleaned source columns, for cross-chunk dedup
+  source_columns = [c for c in df.columns if c not in DERIVED_COLUMNS]
+  df['_row_hash'] = pd.util.hash_pandas_object(df[source_columns], index=False).to_numpy()
+  return df
+
+
+class Deduplicator:
+  """Drops rows already seen in earlier chunks, keeping only their hashes."""
+
+  def __init__(self):
+    self._seen = np.empty(0, dtype=np.uint64)
+
+  def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+    hashes = df['_row_hash'].to_numpy(dtype=np.uint64)
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    if len(self._seen):
+      # Binary search in the sorted hashes of earlier chunks
+      positions = np.searchsorted(self._seen, hashes)
+      positions[positions == len(self._seen)] = 0
+      keep &= self._seen[positions] != hashes
+    self._seen = np.sort(np.concatenate([self._seen, hashes[keep]]))
+    return df[keep].drop(columns='_row_hash')
+
+
+def iter_processed_chunks(path: str, chunk_size: int = CHUNK_SIZE, workers: int = 1):
+  """
+  Yields preprocessed, de-duplicated chunks of the CSV in file order. With
+  `workers` > 1 chunks are processed in a process pool, with at most two
+  chunks per worker in flight.
+  """
+  reader = pd.read_csv(path, chunksize=chunk_size)
+  dedupe = Deduplicator()
+
+  if workers <= 1:
+    for chunk in reader:
+      yield dedupe(preprocess_chunk(chunk))
+    return
+
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    pending = deque()
+    for chunk in reader:
+      pending.append(executor.submit(preprocess_chunk, chunk))
+      if len(pending) >= workers * 2:
+        yield dedupe(pending.popleft().result())
+    while pending:
+      yield dedupe(pending.popleft().result())
+
+
+def to_documents(df: pd.DataFrame) -> list:
+  """Converts a processed chunk to MongoDB documents (missing values omitted)."""
+  records = df.astype(object).where(df.notna(), None).to_dict(orient='records')
+  return [{k: v for k, v in record.items() if v is not None} for record in records]
+
+
+def ingest_chunks(chunks, collection) -> int:
+  """Upserts processed postings by `job_link`. Returns the number written."""
+  from pymongo import InsertOne, UpdateOne
+
+  collection.create_index("job_link")
+  written = 0
+  for df in chunks:
+    documents = to_documents(df)
+    # `updated_at` lets the change sync poller and snapshots see the rewrite
+    updated_at = datetime.now(timezone.utc)
+    for doc in documents:
+      doc["updated_at"] = updated_at
+    for start in range(0, len(documents), INGEST_BATCH_SIZE):
+      operations = [
+          UpdateOne({"job_link": doc["job_link"]}, {"$set": doc}, upsert=True)
+          if doc.get("job_link") else InsertOne(doc)
+          for doc in documents[start:start + INGEST_BATCH_SIZE]
+      ]
+      collection.bulk_write(operations, ordered=False)
+      written += len(operations)
+    logger.info(f"Ingested {written} postings")
+  return written
+
+
+def run(path: str, output: str = None, ingest: bool = False,
+        chunk_size: int = CHUNK_SIZE, workers: int = 1) -> dict:
+  """Runs the pipeline and writes the result to `output` and/or MongoDB."""
+  start = time.perf_counter()
+  rows = 0
+
+  def counted(chunks):
+    nonlocal rows
+    header = True
+    for df in chunks:
+      rows += len(df)
+      if output:
+        df.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+        header = False
+      yield df
+
+  chunks = counted(iter_processed_chunks(path, chunk_size, workers))
+  if ingest:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from dotenv import load_dotenv
+    load_dotenv()
+    from app.services.job_service import COLLECTION_NAME
+    from models import close_client, get_db
+    try:
+      ingest_chunks(chunks, get_db()[COLLECTION_NAME])
+    finally:
+      close_client()
+  else:
+    for _ in chunks:
+      pass
+
+  elapsed = time.perf_counter() - start
+  stats = {
+      'rows': rows,
+      'seconds': round(elapsed, 2),
+      'rows_per_second': round(rows / elapsed) if elapsed else None,
+  }
+  logger.info(f"Preprocessed {rows} postings in {elapsed:.1f}s")
+  return stats
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('csv', help='Raw postings CSV')
+  parser.add_argument('--output', help='Write the processed postings to this CSV')
+  parser.add_argument('--ingest', action='store_true',
+                      help='Upsert the processed postings into MongoDB')
+  parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+  parser.add_argument('--workers', type=int, default=1,
+                      help='Worker processes (default 1: in-process)')
+  args = parser.parse_args()
+
+  if not args.output and not args.ingest:
+    parser.error('nothing to do: pass --output and/or --ingest')
+
+  stats = run(args.csv, args.output, args.ingest, args.chunk_size, args.workers)
+  print(stats)
+
+
+if __name__ == '__main__':
+  logging.basicConfig(level=logging.INFO)
+  main()
@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for the multi-worker deployment.
+
+The app is preloaded in the master, which loads the read-only caches (skill
+vocabulary, question sets, suggestion index, job catalog) once and freezes
+them out of the garbage collector, so forked workers share those pages
+copy-on-write instead of each holding a copy. Per-worker state (MongoDB
+client, Vertex AI models, executors, background threads) is created after
+the fork.
+
+Async task results and interview sessions are per-process with the default
+`memory` backends, so a request for them could reach a worker that does not
+hold them. One worker per CPU is only the default when TASK_QUEUE_BACKEND is
+`mongo` and CACHE_BACKEND is `sqlite` or `redis`; otherwise a single worker
+runs, and an explicit WEB_CONCURRENCY above 1 refuses to start.
+
+Usage:
+    gunicorn --config gunicorn.conf.py main:app
+"""
+import gc
+import os
+from dotenv import load_dotenv
+
+# The backends below may be configured in .env
+load_dotenv()
+
+# Tells create_app it runs in the master and must not start threads
+os.environ.setdefault('PRELOAD_MODE', 'true')
+
+SHARED_CACHE_BACKENDS = ('sqlite', 'redis')
+shared_backends = (
+    os.environ.get('TASK_QUEUE_BACKEND', 'memory') == 'mongo'
+    and os.environ.get('CACHE_BACKEND', 'memory') in SHARED_CACHE_BACKENDS)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY', len(os.sched_getaffinity(0)) if shared_backends else 1))
+if workers > 1 and not shared_backends:
+  raise RuntimeError(
+      f"WEB_CONCURRENCY={workers} needs shared backends: set "
+      "TASK_QUEUE_BACKEND=mongo and CACHE_BACKEND=sqlite or redis, or run "
+      "a single worker")
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ['PRELOAD_MODE'].lower() == 'true'
+
+
+def when_ready(server):
+  """Runs in the master after the app is loaded, before workers fork."""
+  if preload_app:
+    # Move the loaded objects to a permanent generation so collections in
+    # the workers do not touch (and copy) the shared pages
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} preloaded objects")
+
+
+def post_fork(server, worker):
+  """Starts the per-worker warm-up and background threads."""
+  if preload_app:
+    from app import start_background_services
+    start_background_services('worker')
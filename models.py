@@ -3,7 +3,7 @@ Database operations for MongoDB Atlas integration.
 """
 import logging
 import os
-from flask import g
+import threading
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
@@ -11,34 +11,49 @@ from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Process-wide client; MongoClient is thread-safe and pools connections
+_client = None
+_client_lock = threading.Lock()
+
+
+def create_client():
+  """
+  Creates a new MongoDB client and verifies the connection with a ping.
+  """
+  connection_string = os.environ.get('MONGODB_URI')
+  if not connection_string:
+    raise ValueError("MONGODB_URI environment variable not set.")
+
+  client = MongoClient(
+      connection_string,
+      serverSelectionTimeoutMS=5000,
+      connectTimeoutMS=10000,
+      socketTimeoutMS=20000,
+  )
+  client.admin.command('ping')
+  return client
+
 
 def get_client():
   """
-  Returns the MongoDB client instance from the Flask global context.
-  If it doesn't exist, it creates a new connection and stores it in the context.
-  """
-  if 'client' not in g:
-    try:
-      connection_string = os.environ.get('MONGODB_URI')
-      if not connection_string:
-        raise ValueError("MONGODB_URI environment variable not set.")
-
-      client = MongoClient(
-          connection_string,
-          serverSelectionTimeoutMS=5000,
-          connectTimeoutMS=10000,
-          socketTimeoutMS=20000,
-      )
-      client.admin.command('ping')
-      g.client = client
-      logger.info("Successfully connected to MongoDB Atlas.")
-    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-      logger.error(f"Failed to connect to MongoDB: {str(e)}")
-      raise
-    except Exception as e:
-      logger.error(f"Unexpected error connecting to MongoDB: {str(e)}")
-      raise
-  return g.client
+  Returns the process-wide MongoDB client instance.
+  If it doesn't exist, it creates a new connection and shares it between
+  requests and background threads.
+  """
+  global _client
+  if _client is None:
+    with _client_lock:
+      if _client is None:
+        try:
+          _client = create_client()
+          logger.info("Successfully connected to MongoDB Atlas.")
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+          logger.error(f"Failed to connect to MongoDB: {str(e)}")
+          raise
+        except Exception as e:
+          logger.error(f"Unexpected error connecting to MongoDB: {str(e)}")
+          raise
+  return _client
 
 
 def get_db(database_name=None):
@@ -54,9 +69,21 @@ def get_db(database_name=None):
 
 def close_client(e=None):
   """
-  Closes the MongoDB connection if it exists in the Flask global context.
+  Closes the process-wide MongoDB connection if it exists.
   """
-  client = g.pop('client', None)
+  global _client
+  with _client_lock:
+    client, _client = _client, None
   if client is not None:
     client.close()
     logger.info("MongoDB connection closed.")
+
+
+def _reset_after_fork():
+  """MongoClient is not fork-safe: a forked worker opens its own client."""
+  global _client, _client_lock
+  _client = None
+  _client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
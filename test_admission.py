@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the admission limiters in `app/admission.py`.
+Run with `python -m pytest -q`.
+"""
+import threading
+import time
+
+import pytest
+
+from app import admission
+from app.admission import AdmissionLimiter, AdmissionRejected
+
+
+def _wait_for(condition, timeout: float = 2.0):
+  deadline = time.monotonic() + timeout
+  while not condition():
+    assert time.monotonic() < deadline, "condition not reached"
+    time.sleep(0.005)
+
+
+def _acquire_in_thread(limiter, admitted, name, priority=0):
+  def run():
+    limiter.acquire(priority=priority)
+    admitted.append(name)
+
+  thread = threading.Thread(target=run, daemon=True)
+  thread.start()
+  return thread
+
+
+def test_waiter_is_admitted_when_a_slot_frees():
+  limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=4, max_wait=5)
+  limiter.acquire()
+  admitted = []
+  thread = _acquire_in_thread(limiter, admitted, 'waiter')
+  _wait_for(lambda: limiter.stats()['queue_depth'] == 1)
+  assert admitted == []
+
+  limiter.release(0.01)
+  thread.join(2)
+  assert admitted == ['waiter']
+  assert limiter.stats()['in_flight'] == 1
+
+
+def test_lower_priority_value_is_admitted_first():
+  limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=4, max_wait=5)
+  limiter.acquire()
+  admitted = []
+  threads = [_acquire_in_thread(limiter, admitted, 'feedback', priority=2)]
+  _wait_for(lambda: limiter.stats()['queue_depth'] == 1)
+  threads.append(_acquire_in_thread(limiter, admitted, 'jobs', priority=1))
+  _wait_for(lambda: limiter.stats()['queue_depth'] == 2)
+
+  for count in (1, 2):
+    limiter.release(0.01)
+    _wait_for(lambda: len(admitted) == count)
+  for thread in threads:
+    thread.join(2)
+  assert admitted == ['jobs', 'feedback']
+
+
+def test_full_queue_is_shed_with_429():
+  limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=1, max_wait=5)
+  limiter.acquire()
+  _acquire_in_thread(limiter, [], 'waiter')
+  _wait_for(lambda: limiter.stats()['queue_depth'] == 1)
+
+  with pytest.raises(AdmissionRejected) as rejected:
+    limiter.acquire()
+  assert (rejected.value.status_code, rejected.value.reason) == (429, 'queue_full')
+  assert rejected.value.retry_after >= 1
+  limiter.release(0.01)
+
+
+def test_expected_wait_beyond_deadline_is_shed_at_once():
+  """With ~1s per request ahead, a 0.2s deadline is rejected without waiting."""
+  limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=4, max_wait=5)
+  limiter.acquire()
+  started = time.monotonic()
+  with pytest.raises(AdmissionRejected) as rejected:
+    limiter.acquire(max_wait=0.2)
+  assert (rejected.value.status_code, rejected.value.reason) == (503, 'deadline')
+  assert time.monotonic() - started < 0.1
+
+
+def test_waiter_times_out_with_503():
+  limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=4, max_wait=5)
+  limiter.acquire()
+  limiter.release(0.01)
+  limiter.acquire()  # the service time average is now well below the wait
+  with pytest.raises(AdmissionRejected) as rejected:
+    limiter.acquire(max_wait=0.9)
+  assert (rejected.value.status_code, rejected.value.reason) == (503, 'timeout')
+  assert limiter.stats()['queue_depth'] == 0
+
+
+def test_limited_slots_leave_a_thread_for_probes(monkeypatch):
+  limits = admission._load_limits()
+  exempt = sum(limits[name]['max_concurrent']
+               for name in admission.GLOBAL_EXEMPT_BLUEPRINTS)
+  assert admission._global_concurrency(limits) + exempt < admission.ADMISSION_THREADS
+  assert set(admission.UNLIMITED_BLUEPRINTS) == {'health'}
+
+  monkeypatch.setattr(admission, 'ADMISSION_GLOBAL_CONCURRENCY', 20)
+  assert admission._global_concurrency(limits) + exempt == admission.ADMISSION_THREADS - 1
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared prompt contexts of `app/services/ai_service.py`.
+Run with `python -m pytest -q`; no Vertex AI access is needed.
+"""
+from collections import OrderedDict
+
+import pytest
+
+from app.services import ai_service
+
+
+@pytest.fixture
+def contexts(monkeypatch):
+  """A fresh context registry holding two entries, with a stub model."""
+  monkeypatch.setattr(ai_service, '_contexts', OrderedDict())
+  monkeypatch.setattr(ai_service, 'CONTEXT_CACHE_MAX_ENTRIES', 2)
+  monkeypatch.setattr(ai_service, 'CONTEXT_CACHE_BACKEND', 'local')
+  monkeypatch.setattr(ai_service, 'get_model', lambda model_name: 'inline-model')
+  return ai_service._contexts
+
+
+def test_recently_used_context_survives_eviction(contexts):
+  first = ai_service.register_context('Job profile A')
+  second = ai_service.register_context('Job profile B')
+  ai_service._resolve_context(first, 'prompt', ai_service.DEFAULT_MODEL)
+  ai_service.register_context('Job profile C')
+
+  assert first in contexts and second not in contexts
+  with pytest.raises(ValueError):
+    ai_service._resolve_context(second, 'prompt', ai_service.DEFAULT_MODEL)
+
+
+def test_reregistering_refreshes_recency(contexts):
+  first = ai_service.register_context('Job profile A')
+  ai_service.register_context('Job profile B')
+  assert ai_service.register_context('Job profile A') == first
+  ai_service.register_context('Job profile C')
+  assert first in contexts
+
+
+def test_local_context_is_sent_inline(contexts):
+  key = ai_service.register_context('Job profile A')
+  model, prompt = ai_service._resolve_context(key, 'Ask.', ai_service.DEFAULT_MODEL)
+  assert (model, prompt) == ('inline-model', 'Job profile A\nAsk.')
+
+
+def test_vertex_caches_preambles_above_the_minimum(contexts, monkeypatch):
+  monkeypatch.setattr(ai_service, 'CONTEXT_CACHE_BACKEND', 'vertex')
+  monkeypatch.setattr(ai_service, 'initialize_vertex_ai', lambda: True)
+  monkeypatch.setattr(ai_service, '_create_vertex_cached_model',
+                      lambda preamble, model_name: 'cached-model')
+  long_preamble = 'word ' * (ai_service.CONTEXT_CACHE_MIN_TOKENS * 4 // 5 + 10)
+  assert ai_service.CONTEXT_CACHE_MIN_TOKENS < ai_service.LLM_DESCRIPTION_TOKEN_BUDGET
+
+  cached = ai_service.register_context(long_preamble)
+  assert ai_service._resolve_context(cached, 'Ask.', ai_service.DEFAULT_MODEL) == (
+      'cached-model', 'Ask.')
+  short = ai_service.register_context('Job profile A')
+  assert ai_service._resolve_context(short, 'Ask.', ai_service.DEFAULT_MODEL)[0] == (
+      'inline-model')
+
+  # Past the local expiry the Vertex AI cache may be gone
+  contexts[cached]['expires_at'] = 0
+  assert ai_service._resolve_context(cached, 'Ask.', ai_service.DEFAULT_MODEL)[0] == (
+      'inline-model')
@@ -35,6 +35,20 @@ def test_health_endpoint():
     return False
 
 
+def test_probe_endpoints():
+  """Test the liveness and readiness probes."""
+  _print_test_header("Liveness/Readiness Probes")
+  try:
+    livez = requests.get(f"{BASE_URL}/livez")
+    _print_response(livez)
+    readyz = requests.get(f"{BASE_URL}/readyz")
+    _print_response(readyz)
+    return livez.status_code == 200 and readyz.status_code in (200, 503)
+  except requests.ConnectionError as e:
+    print(f"Error: {e}")
+    return False
+
+
 def test_jobs_endpoint():
   """Test the /jobs search endpoint."""
   _print_test_header("Job Search")
@@ -102,6 +116,7 @@ def main():
 
   tests = [
       ("Health Check", test_health_endpoint),
+      ("Liveness/Readiness Probes", test_probe_endpoints),
       ("Job Search", test_jobs_endpoint),
       ("Question Generation", test_questions_endpoint),
   ]
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Unit tests for `app/services/change_sync.py`: catalog and suggestion index
+patching, `updated_at` polling and the fallback from change streams to
+polling. Run with `python -m pytest -q`; no MongoDB access is needed.
+"""
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.services import change_sync, job_catalog, job_service, skills, suggest_service
+from app.services.job_catalog import JobCatalog
+from app.services.suggest_service import SuggestIndex
+
+NOON = datetime(2024, 5, 1, 12, 0)
+LATER = datetime(2024, 5, 1, 12, 5)
+
+
+def _matches(doc: dict, query: dict) -> bool:
+  """The subset of MongoDB query semantics used by the polling queries."""
+  for field, condition in query.items():
+    if field == '$or':
+      if not any(_matches(doc, clause) for clause in condition):
+        return False
+      continue
+    value = doc.get(field)
+    if not isinstance(condition, dict):
+      if value != condition:
+        return False
+    elif '$gt' in condition and not (value is not None and value > condition['$gt']):
+      return False
+    elif '$type' in condition and not isinstance(value, datetime):
+      return False
+  return True
+
+
+class FakeCursor:
+
+  def __init__(self, docs):
+    self.docs = docs
+
+  def sort(self, keys, direction=None):
+    if isinstance(keys, str):
+      keys = [(keys, direction)]
+    for field, order in reversed(keys):
+      self.docs.sort(key=lambda doc: doc[field], reverse=order < 0)
+    return self
+
+  def limit(self, count):
+    return self.docs[:count]
+
+
+class FakeCollection:
+
+  def __init__(self, docs):
+    self.docs = docs
+
+  def find(self, query=None, projection=None):
+    return FakeCursor([dict(doc) for doc in self.docs if _matches(doc, query or {})])
+
+
+def _posting(job_id, title, job_skills, updated_at=NOON):
+  return {'_id': job_id, 'job_title': title, 'job_skills': job_skills,
+          'job_link': f'https://jobs.example/{job_id}', 'updated_at': updated_at}
+
+
+@pytest.fixture
+def synced(monkeypatch):
+  """A catalog and suggestion index over two postings, patched by the sync."""
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', True)
+  docs = [_posting('a', 'Data Engineer', 'Python, SQL'),
+          _posting('b', 'Data Engineer', 'Python')]
+  catalog = JobCatalog(docs, job_service.posting_skills)
+  monkeypatch.setattr(job_catalog, 'JOB_CATALOG_ENABLED', True)
+  monkeypatch.setattr(job_catalog, '_catalog', catalog)
+  monkeypatch.setattr(suggest_service, '_index', SuggestIndex(
+      Counter({'Data Engineer': 2}), Counter({'Python': 2, 'SQL': 1})))
+  invalidated = []
+  monkeypatch.setattr(job_service, 'invalidate_job_descriptions', invalidated.extend)
+  monkeypatch.setattr(change_sync, '_suggest_state', {'pending': False, 'rebuilt_at': 0.0})
+  return catalog, invalidated
+
+
+def _counts():
+  return {text: frequency for text, _, frequency in suggest_service._index.entries}
+
+
+def test_posting_changes_patch_catalog_and_suggestion_counts(synced):
+  catalog, invalidated = synced
+  change_sync._apply_posting_changes([
+      {'op': 'upsert', '_id': 'b', 'doc': _posting('b', 'ML Engineer', 'Python, Go')},
+      {'op': 'upsert', '_id': 'c', 'doc': _posting('c', 'ML Engineer', 'Rust')},
+      {'op': 'delete', '_id': 'a', 'doc': None},
+  ])
+
+  assert catalog.ids() == {'b', 'c'}
+  assert [doc['job_title'] for doc in catalog.search('engineer')] == [
+      'ML Engineer', 'ML Engineer']
+  assert catalog.search('sql') == []
+  assert _counts() == {'ML Engineer': 2, 'Python': 1, 'Go': 1, 'Rust': 1}
+  assert set(invalidated) == {f'https://jobs.example/{i}' for i in 'abc'}
+  assert not change_sync._suggest_state['pending']
+
+
+def test_repeated_posting_in_one_batch_is_counted_once(synced):
+  doc = _posting('b', 'Data Engineer', 'Python, Go')
+  change_sync._apply_posting_changes([
+      {'op': 'upsert', '_id': 'b', 'doc': doc},
+      {'op': 'upsert', '_id': 'b', 'doc': doc},
+  ])
+  assert _counts() == {'Data Engineer': 2, 'Python': 2, 'SQL': 1, 'Go': 1}
+
+
+def test_without_catalog_the_index_is_rebuilt_later(synced, monkeypatch):
+  monkeypatch.setattr(job_catalog, 'JOB_CATALOG_ENABLED', False)
+  change_sync._apply_posting_changes(
+      [{'op': 'upsert', '_id': 'c', 'doc': _posting('c', 'ML Engineer', 'Rust')}])
+  assert change_sync._suggest_state['pending']
+  assert _counts() == {'Data Engineer': 2, 'Python': 2, 'SQL': 1}
+
+
+def test_polling_pages_through_documents_sharing_a_timestamp(monkeypatch):
+  monkeypatch.setattr(change_sync, 'CHANGE_SYNC_BATCH_SIZE', 2)
+  collection = FakeCollection([_posting(job_id, 'Engineer', 'Go') for job_id in 'abcde'])
+  position = {'last_id': 'e', 'last_updated_at': None, 'last_updated_id': None}
+
+  seen = []
+  for _ in range(3):
+    seen.extend(change['_id'] for change in change_sync._poll_once(collection, position))
+  assert seen == ['a', 'b', 'c', 'd', 'e']
+  assert change_sync._poll_once(collection, position) == []
+
+  collection.docs[1]['updated_at'] = LATER
+  collection.docs.append(_posting('f', 'Engineer', 'Go', updated_at=LATER))
+  changes = change_sync._poll_once(collection, position)
+  assert [change['_id'] for change in changes] == ['f', 'b']  # f once, though new and updated
+  assert (position['last_id'], position['last_updated_id']) == ('f', 'f')
+
+
+def test_polling_starts_from_the_newest_update_in_the_collection():
+  collection = FakeCollection([_posting('a', 'Engineer', 'Go', updated_at=LATER),
+                               _posting('b', 'Engineer', 'Go')])
+  assert change_sync._newest_update(collection) == (LATER, 'a')
+  assert change_sync._newest_update(FakeCollection([])) == (None, None)
+
+
+class Stop(BaseException):
+  """Ends the otherwise endless watcher loop."""
+
+
+def test_watcher_falls_back_to_polling(monkeypatch):
+  calls = []
+
+  def watch(name):
+    calls.append('watch')
+    raise OperationFailure('not a replica set', code=40573)
+
+  def poll(name):
+    calls.append('poll')
+    raise Stop()
+
+  monkeypatch.setattr(change_sync, '_watch_change_stream', watch)
+  monkeypatch.setattr(change_sync, '_poll_changes', poll)
+  with pytest.raises(Stop):
+    change_sync._run_watcher('linkedin_jobs')
+  assert calls == ['watch', 'poll']
+
+
+def test_lost_history_clears_the_token_and_resyncs(monkeypatch):
+  events = []
+  failures = [OperationFailure('history lost', code=286)]
+
+  def watch(name):
+    if not failures:
+      raise Stop()
+    raise failures.pop()
+
+  monkeypatch.setattr(change_sync, '_watch_change_stream', watch)
+  monkeypatch.setattr(change_sync, '_save_state', lambda name, **fields: events.append(fields))
+  monkeypatch.setattr(change_sync, '_resync', lambda name: events.append('resync'))
+  with pytest.raises(Stop):
+    change_sync._run_watcher('linkedin_jobs')
+  assert events == [{'resume_token': None}, 'resync']
+
+
+def test_state_is_kept_locally_when_another_process_holds_the_lease(monkeypatch):
+  writes = []
+
+  class StateCollection:
+    def update_one(self, query, update, upsert=False):
+      writes.append(query)
+      raise DuplicateKeyError('E11000')
+
+  monkeypatch.setattr(change_sync, 'get_db', lambda: {'sync_state': StateCollection()})
+  monkeypatch.setattr(change_sync, '_progress', {})
+  change_sync._save_state('questions', resume_token={'_data': '01'})
+  assert change_sync._progress['questions'] == {'resume_token': {'_data': '01'}}
+  assert writes[0]['_id'] == 'questions' and '$or' in writes[0]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the input limits of `app/services/feedback_service.py`.
+Run with `python -m pytest -q`; no Vertex AI access is needed.
+"""
+import pytest
+
+from app.services import feedback_service
+from app.services.exceptions import ServiceError
+from app.services.token_budget import estimate_tokens, remaining_budget
+
+JOB = {'title': 'Backend Engineer', 'description': 'Builds APIs.', 'skills': ['Python']}
+
+
+def _pairs(n: int, answer: str = 'An answer.') -> list:
+  return [{'question': f'Question {i}?', 'answer': answer} for i in range(n)]
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+  """Records the prompts sent to the model instead of calling it."""
+  calls = []
+
+  def respond(prompts, call_site=None):
+    calls.extend(prompts)
+    return ['Solid answer.'] * len(prompts)
+
+  monkeypatch.setattr(feedback_service, 'generate_llm_responses', respond)
+  monkeypatch.setattr(feedback_service, 'generate_llm_response',
+                      lambda prompt, **kwargs: calls.append(prompt) or 'Hire.')
+  return calls
+
+
+def test_too_many_pairs_rejected_before_any_llm_call(llm_calls):
+  """Above FEEDBACK_MAX_QA_PAIRS the request fails with 400 and costs nothing."""
+  qa_pairs = _pairs(feedback_service.FEEDBACK_MAX_QA_PAIRS + 1)
+  with pytest.raises(ServiceError) as error:
+    feedback_service.generate_feedback_for_answers(JOB, qa_pairs, 'map_reduce')
+  assert error.value.status_code == 400
+  assert llm_calls == []
+
+
+@pytest.mark.parametrize('qa_pairs', [
+    [], 'answers', [{'question': 'Why?'}], [{'question': 'Why?', 'answer': 3}], ['text'],
+])
+def test_malformed_pairs_rejected(qa_pairs):
+  with pytest.raises(ServiceError) as error:
+    feedback_service.check_qa_pairs(qa_pairs)
+  assert error.value.status_code == 400
+
+
+def test_map_reduce_makes_one_call_per_pair_and_a_summary(llm_calls):
+  feedback_service._feedback_cache.clear()
+  result = feedback_service.generate_feedback_for_answers(JOB, _pairs(3), 'map_reduce')
+  assert len(llm_calls) == 4
+  assert result['mode'] == 'map_reduce' and len(result['question_feedback']) == 3
+
+
+def test_fit_answers_stays_within_budget():
+  """Answers share the remaining budget; long ones are truncated."""
+  qa_pairs = _pairs(feedback_service.FEEDBACK_MAX_QA_PAIRS, answer='word ' * 5000)
+  fitted = feedback_service._fit_answers(qa_pairs, 'fixed prompt part')
+  used = sum(estimate_tokens(qa['question'] + qa['answer'])
+             for qa in fitted)
+  assert used <= remaining_budget('fixed prompt part')
+
+
+def test_fit_answers_rejects_pairs_that_cannot_fit():
+  """The per-answer minimum must not push the prompt over the budget."""
+  with pytest.raises(ServiceError) as error:
+    feedback_service._fit_answers(_pairs(1000), 'fixed prompt part')
+  assert error.value.status_code == 400
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the hedge budget, latency percentiles and hedged calls in
+`app/services/hedging.py`. Run with `python -m pytest -q`; no Vertex AI
+access is needed.
+"""
+import threading
+
+import pytest
+
+from app.services import hedging
+from app.services.hedging import HedgeBudget, LatencyTracker
+
+
+def test_budget_earns_one_hedge_per_ratio_of_calls():
+  budget = HedgeBudget(ratio=0.25, max_tokens=10)
+  for _ in range(3):
+    budget.deposit()
+  assert not budget.try_acquire()
+  budget.deposit()
+  assert budget.try_acquire()
+  assert not budget.try_acquire()
+
+
+def test_budget_refill_is_capped():
+  budget = HedgeBudget(ratio=0.5, max_tokens=2)
+  for _ in range(100):
+    budget.deposit()
+  assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_percentile_needs_min_samples_and_uses_the_window():
+  tracker = LatencyTracker(window=10)
+  for seconds in range(1, 5):
+    tracker.record('feedback', seconds)
+  assert tracker.percentile('feedback', 50, min_samples=5) is None
+  assert tracker.percentile('feedback', 50, min_samples=4) == 3
+  assert tracker.percentile('questions', 50, min_samples=0) is None
+
+  for _ in range(10):
+    tracker.record('feedback', 0.5)
+  assert tracker.percentile('feedback', 100, min_samples=1) == 0.5
+
+
+@pytest.fixture
+def hedged(monkeypatch):
+  """Hedging enabled, with a site whose p90 is 10ms and one hedge to spend."""
+  tracker = LatencyTracker()
+  for _ in range(hedging.LLM_HEDGE_MIN_SAMPLES):
+    tracker.record('site', 0.01)
+  budget = HedgeBudget(ratio=1.0)
+  monkeypatch.setattr(hedging, 'LLM_HEDGING_ENABLED', True)
+  monkeypatch.setattr(hedging, '_tracker', tracker)
+  monkeypatch.setattr(hedging, '_budget', budget)
+  return budget
+
+
+def _first_call_stalls(release: threading.Event):
+  calls = []
+
+  def call():
+    calls.append(1)
+    if len(calls) == 1:
+      release.wait(5)
+      return 'primary'
+    return 'hedge'
+
+  return call, calls
+
+
+def test_slow_call_is_hedged_and_the_first_response_wins(hedged):
+  release = threading.Event()
+  call, calls = _first_call_stalls(release)
+  try:
+    assert hedging.hedged_call(call, 'site') == 'hedge'
+  finally:
+    release.set()
+  assert len(calls) == 2
+
+
+def test_no_hedge_without_budget(hedged, monkeypatch):
+  monkeypatch.setattr(hedged, 'try_acquire', lambda: False)
+  release = threading.Event()
+  call, calls = _first_call_stalls(release)
+  threading.Timer(0.1, release.set).start()
+  assert hedging.hedged_call(call, 'site') == 'primary'
+  assert len(calls) == 1
+
+
+def test_disabled_hedging_calls_directly(monkeypatch):
+  monkeypatch.setattr(hedging, 'LLM_HEDGING_ENABLED', False)
+  assert hedging.hedged_call(threading.current_thread) is threading.current_thread()
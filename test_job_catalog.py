@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bitset search and copy-on-write updates of
+`app/services/job_catalog.py`. Run with `python -m pytest -q`; no MongoDB
+access is needed.
+"""
+import pytest
+
+from app.services import skills
+from app.services.job_catalog import JobCatalog, _bit_indexes, tokenize
+
+POSTINGS = [
+    {'_id': 'a', 'job_title': 'Senior Data Engineer', 'job level': 'Mid senior',
+     'job_type': 'Remote', 'job_location': 'Berlin',
+     'skills_normalized': ['Python', 'SQL']},
+    {'_id': 'b', 'job_title': 'Backend Developer', 'job level': 'Associate',
+     'job_type': 'Onsite', 'job_location': 'Paris',
+     'skills_normalized': ['Go', 'SQL']},
+    {'_id': 'c', 'job_title': 'Data Analyst', 'job level': 'Associate',
+     'job_type': 'Onsite', 'job_location': 'Berlin',
+     'skills_normalized': ['SQL', 'Excel']},
+]
+
+
+def _posting_skills(doc, limit=10):
+  return list(doc.get('skills_normalized', []))
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', True)
+  return JobCatalog(POSTINGS, _posting_skills)
+
+
+def _titles(documents):
+  return [doc['job_title'] for doc in documents]
+
+
+def test_bit_indexes_and_tokenize():
+  assert _bit_indexes(0b101001) == [0, 3, 5]
+  assert _bit_indexes(0) == []
+  assert tokenize('C++ / C# Developer') == ['c++', 'c#', 'developer']
+
+
+def test_title_matches_rank_above_skill_matches(catalog):
+  assert _titles(catalog.search('data')) == ['Senior Data Engineer', 'Data Analyst']
+  assert _titles(catalog.search('sql')) == [
+      'Senior Data Engineer', 'Backend Developer', 'Data Analyst']
+  assert _titles(catalog.search('data', tech_skills=['python'])) == ['Senior Data Engineer']
+  assert _titles(catalog.search('sql', job_level='associate', limit=1)) == ['Backend Developer']
+  assert catalog.search('data rust') == [] and catalog.search('') == []
+
+
+def test_apply_swaps_in_a_copy(catalog):
+  before = catalog._indexes
+  old_record = catalog.get('a')
+  catalog.apply([
+      ('upsert', {**POSTINGS[0], 'job_title': 'Staff Data Engineer'}),
+      ('upsert', {'_id': 'd', 'job_title': 'Rust Engineer', 'skills_normalized': ['Rust']}),
+      ('remove', 'c'),
+      ('remove', 'unknown'),
+  ])
+
+  assert catalog.ids() == {'a', 'b', 'd'}
+  assert catalog.get('a').job_title == 'Staff Data Engineer'
+  assert _titles(catalog.search('engineer')) == ['Staff Data Engineer', 'Rust Engineer']
+  assert catalog.search('analyst') == [] and catalog.search('senior') == []
+
+  # The version a running search took is left as it was
+  assert before.records[0] is old_record and len(before.records) == 3
+  assert before.title_index['senior'] == 1 and 'staff' not in before.title_index
+  assert before.positions.keys() == {'a', 'b', 'c'}
+
+
+def test_removed_slot_stays_empty_until_rebuild(catalog):
+  catalog.remove('b')
+  catalog.upsert({'_id': 'e', 'job_title': 'Go Developer', 'skills_normalized': ['Go']})
+  assert len(catalog) == 3 and catalog.records[1] is None
+  assert catalog.get('e') is catalog.records[3]
+  assert _titles(catalog.search('go')) == ['Go Developer']
+
+
+def test_search_with_facets_counts_the_best_matches(catalog):
+  documents, counters, counted, capped = catalog.search_with_facets(
+      'sql', limit=1, facet_candidates=2)
+  assert _titles(documents) == ['Senior Data Engineer']
+  assert (counted, capped) == (2, True)
+  assert counters['location'] == {'Berlin': 1, 'Paris': 1}
+  assert counters['skills'] == {'SQL': 2, 'Python': 1, 'Go': 1}
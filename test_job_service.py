@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the MongoDB search query and the `$facet` aggregation of
+`app/services/job_service.py`. Run with `python -m pytest -q`; no MongoDB
+access is needed.
+"""
+import re
+
+import pytest
+
+from app.services import job_service, skills
+
+
+class FakeCollection:
+  """The `find_one`/`distinct` lookups `_build_search_query` makes."""
+
+  def __init__(self, postings):
+    self.postings = postings
+
+  def find_one(self, query, projection=None):
+    field = next(iter(query))
+    return next((p for p in self.postings if field in p), None)
+
+  def distinct(self, field):
+    return sorted({p[field] for p in self.postings if field in p})
+
+
+@pytest.fixture
+def use_postings(monkeypatch):
+  """Serves the given postings as the collection, with the default aliases."""
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', True)
+
+  def use(postings):
+    collection = FakeCollection(postings)
+    monkeypatch.setattr(
+        job_service, 'get_db', lambda: {job_service.COLLECTION_NAME: collection})
+    job_service._levels_cache.clear()
+    job_service._skills_field_cache.clear()
+
+  yield use
+  job_service._levels_cache.clear()
+  job_service._skills_field_cache.clear()
+
+
+def _condition(query: dict, field: str) -> dict:
+  return next(c[field] for c in query['$and'] if field in c)
+
+
+def test_skills_match_normalized_field(use_postings):
+  """Normalized postings are matched on the indexed canonical skills."""
+  use_postings([{'job_skills': 'Python, ts', 'skills_normalized': ['Python', 'TypeScript'],
+                 'job_level_normalized': 'mid senior'}])
+  query = job_service._build_search_query('engineer', ['python', 'TS'], 'Senior')
+
+  assert _condition(query, 'skills_normalized') == {'$in': ['python', 'TypeScript']}
+  assert _condition(query, 'job_level_normalized') == {'$in': ['mid senior']}
+
+
+def test_skills_fall_back_to_raw_field(use_postings):
+  """Before normalize_skills.py runs, the raw skills string is matched by word."""
+  use_postings([{'job_skills': 'Python, ts', 'job level': 'Mid senior'}])
+  query = job_service._build_search_query('engineer', ['TS', 'k8s'], 'Senior')
+
+  condition = _condition(query, 'job_skills')
+  assert condition['$options'] == 'i'
+  pattern = re.compile(condition['$regex'], re.IGNORECASE)
+  assert pattern.search('Python, TypeScript, AWS')
+  assert pattern.search('Docker; Kubernetes')
+  assert pattern.search('SQL | ts')
+  assert not pattern.search('Reports, Excel')
+  assert _condition(query, 'job level') == {'$regex': 'Senior', '$options': 'i'}
+
+
+def test_invalid_skills_add_no_filter(use_postings):
+  """Skills that cannot be canonicalized do not filter every posting out."""
+  use_postings([])
+  assert job_service._build_search_query('engineer', ['x', 3]) == {
+      '$text': {'$search': '"engineer"'}}
+
+
+class FakeAggregation:
+  """Records the pipeline and returns one `$facet` result document."""
+
+  def __init__(self, result):
+    self.result = result
+    self.pipelines = []
+
+  def aggregate(self, pipeline):
+    self.pipelines.append(pipeline)
+    return iter([self.result])
+
+
+@pytest.fixture
+def aggregation(use_postings, monkeypatch):
+  """Serves the given `$facet` output to `_find_candidates_with_facets`."""
+  monkeypatch.setattr(job_service, 'JOB_FACET_CANDIDATES', 3)
+
+  def use(result):
+    use_postings([])
+    collection = FakeAggregation(result)
+    monkeypatch.setattr(
+        job_service, 'get_db', lambda: {job_service.COLLECTION_NAME: collection})
+    return collection
+
+  return use
+
+
+def test_facet_pipeline_counts_one_extra_candidate(aggregation):
+  collection = aggregation({
+      'page': [{'job_title': 'Data Engineer'}],
+      'candidates': [{'count': 4}],
+      'job_level': [{'_id': 'Mid senior', 'count': 3}],
+      'skills': [{'_id': 'Python', 'count': 2}, {'_id': 'SQL', 'count': 1}],
+  })
+  page, counters, candidates, capped = job_service._find_candidates_with_facets(
+      'engineer', limit=2)
+
+  assert page == [{'job_title': 'Data Engineer'}]
+  assert (candidates, capped) == (3, True)
+  assert counters['skills'] == {'Python': 2, 'SQL': 1}
+  assert counters['job_type'] == {} and counters['location'] == {}
+
+  pipeline = collection.pipelines[0]
+  assert pipeline[3] == {'$limit': 4}
+  stages = pipeline[4]['$facet']
+  assert stages['skills'][1] == {'$unwind': '$skills_normalized'}
+  assert stages['job_level'][0] == {'$limit': 3}
+  assert stages['page'][0] == {'$limit': job_service.candidate_limit(2)}
+
+
+def test_empty_facet_result_counts_nothing(aggregation):
+  aggregation({})
+  page, counters, candidates, capped = job_service._find_candidates_with_facets('engineer')
+  assert (page, candidates, capped) == ([], 0, False)
+  assert all(counts == {} for counts in counters.values())
+
+
+def test_format_facets_drops_placeholders_and_keeps_the_top_values(monkeypatch):
+  monkeypatch.setattr(job_service, 'JOB_FACET_SIZE', 2)
+  counters = {field: {} for field in job_service.FACET_FIELDS}
+  counters['location'] = {'N/A': 9, 'Remote': 4, 'Berlin': 4, 'Paris': 1, None: 2}
+  facets = job_service._format_facets(counters, 12, False)
+
+  assert facets['location'] == [{'value': 'Berlin', 'count': 4},
+                                {'value': 'Remote', 'count': 4}]
+  assert facets['skills'] == []
+  assert (facets['candidates'], facets['capped']) == (12, False)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the request parsing and the streamed responses of the
+`/jobs` routes in `app/routes/jobs.py`. Run with `python -m pytest -q`; no
+MongoDB or Vertex AI access is needed.
+"""
+import json
+
+import pytest
+from flask import Flask
+
+from app.routes import jobs
+from app.routes.jobs import jobs_bp
+
+
+EVENTS = [
+    {'event': 'search', 'query': 'python', 'jobs': [{'title': 'Dev'}], 'pending': [0]},
+    {'event': 'description', 'index': 0, 'description': 'Line one\nline two'},
+    {'event': 'done', 'total': 1},
+]
+
+
+class Calls(list):
+  """Recorded search arguments, with the test client that made them."""
+  client = None
+
+
+@pytest.fixture
+def searches(monkeypatch):
+  """A test client whose searches record their arguments."""
+  calls = Calls()
+
+  def search(query, limit=10, facets=False, **kwargs):
+    calls.append({'query': query, 'limit': limit, 'facets': facets})
+    return {'query': query, 'jobs': [], 'total': 0, 'ai_generated': False}
+
+  def batch(searches):
+    calls.extend(searches)
+    return {'results': [search(s['query']) for s in searches], 'unique_jobs': 0}
+
+  def stream(query, limit=10, facets=False, **kwargs):
+    calls.append({'query': query, 'limit': limit, 'facets': facets})
+    yield from EVENTS
+
+  monkeypatch.setattr(jobs, 'search_jobs', search)
+  monkeypatch.setattr(jobs, 'search_jobs_batch', batch)
+  monkeypatch.setattr(jobs, 'stream_search_jobs', stream)
+  app = Flask(__name__)
+  app.register_blueprint(jobs_bp)
+  calls.client = app.test_client()
+  return calls
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('false', False), ('True', True),
+])
+def test_facets_flag_is_parsed_strictly(searches, value, expected):
+  response = searches.client.post('/jobs', json={'query': 'python', 'facets': value})
+  assert response.status_code == 200
+  assert searches[-1]['facets'] is expected
+
+
+@pytest.mark.parametrize('value', ['no', 1, None, []])
+def test_other_facets_values_are_rejected(searches, value):
+  response = searches.client.post('/jobs', json={'query': 'python', 'facets': value})
+  assert response.status_code == 400 and searches == []
+
+
+def test_limit_is_capped(searches):
+  searches.client.post('/jobs', json={'query': 'python', 'limit': 10_000})
+  searches.client.post('/jobs', json={'query': 'python', 'limit': 0})
+  assert [call['limit'] for call in searches] == [jobs.JOB_SEARCH_MAX_LIMIT, 1]
+
+
+@pytest.mark.parametrize('value', ['10', 2.5, True])
+def test_non_integer_limit_is_rejected(searches, value):
+  response = searches.client.post('/jobs', json={'query': 'python', 'limit': value})
+  assert response.status_code == 400
+
+
+def test_batch_limits_are_capped_per_search(searches):
+  response = searches.client.post('/jobs/batch', json={'searches': [
+      {'query': 'python', 'limit': 500}, {'query': 'go'}]})
+  assert response.status_code == 200
+  assert [s['limit'] for s in searches[:2]] == [jobs.JOB_SEARCH_MAX_LIMIT, 10]
+
+  response = searches.client.post('/jobs/batch', json={'searches': [
+      {'query': 'python', 'limit': 'all'}]})
+  assert response.status_code == 400
+
+
+def test_ndjson_stream_sends_one_event_per_line(searches):
+  response = searches.client.post('/jobs', json={'query': 'python', 'stream': 'ndjson'})
+  assert response.mimetype == 'application/x-ndjson'
+  assert response.headers['X-Accel-Buffering'] == 'no'
+  lines = response.get_data(as_text=True).split('\n')
+  assert lines[-1] == '' and [json.loads(line) for line in lines[:-1]] == EVENTS
+
+
+def test_sse_stream_names_events_and_escapes_newlines(searches):
+  response = searches.client.post(
+      '/jobs', json={'query': 'python'}, headers={'Accept': 'text/event-stream'})
+  assert response.mimetype == 'text/event-stream'
+  messages = response.get_data(as_text=True).split('\n\n')
+  assert messages[-1] == ''
+  for message, event in zip(messages[:-1], EVENTS):
+    name, data = message.split('\n')
+    assert name == f"event: {event['event']}"
+    assert json.loads(data[len('data: '):]) == event
+
+
+@pytest.mark.parametrize('body', [
+    {'query': 'python', 'stream': 'xml'},
+    {'query': 'python', 'stream': 'ndjson', 'async': True},
+])
+def test_invalid_stream_requests_are_rejected(searches, body):
+  response = searches.client.post('/jobs', json=body)
+  assert response.status_code == 400 and searches == []
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the vectorized postings preprocessing: the output of
+`data/preprocess_postings.py` must match the row-wise reference port of the
+notebook's `preprocess_job_data` in `benchmarks/preprocessing_throughput.py`.
+Run with `python -m pytest -q`; no MongoDB access is needed.
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from preprocessing_throughput import reference_preprocess  # noqa: E402
+from preprocess_postings import Deduplicator, preprocess_chunk  # noqa: E402
+
+# Missing values, padded strings, mixed skill delimiters, partial locations,
+# an unparseable date, a row without a title and an exact duplicate
+FIXTURE = '''job_link,job_title,company,job_location,first_seen,job level,job_type,job_summary,job_skills
+https://example.com/1,Senior Data Engineer,Acme,"New York, NY, United States",2024-01-15,Mid senior,Onsite,Build pipelines.,"Python, SQL; AWS"
+https://example.com/2,  Jr. Python Developer ,,Austin,2024-02-03,Associate,Remote,,
+https://example.com/3,Intern Backend,Globex,,2024-02-29,Associate,Hybrid, Ship features ,"Go|Docker| |Kubernetes"
+https://example.com/4,,Initech,"Austin, TX",2024-03-01,Associate,Onsite,No title.,Java
+https://example.com/5,Lead Mobile Developer,Hooli,"San Francisco, CA",not a date,Mid senior,Remote (US),Ship apps.,"Swift,,Kotlin"
+https://example.com/6,Principal Architect,Umbrella,Location not specified,2024-03-10,Mid senior,Onsite,Design systems.,Not specified
+https://example.com/1,Senior Data Engineer,Acme,"New York, NY, United States",2024-01-15,Mid senior,Onsite,Build pipelines.,"Python, SQL; AWS"
+https://example.com/7,DevOps Engineer,Acme,"London, England, United Kingdom",2024-04-22,Mid senior,,Run clusters.,"Terraform ; AWS"
+'''
+COMPARED_COLUMNS = [
+    'job_title', 'company', 'job_location', 'job_summary', 'job_skills',
+    'title_length', 'summary_length', 'is_remote', 'is_senior', 'is_junior',
+    'skills_count', 'city', 'state', 'posting_year', 'posting_month',
+    'posting_day_of_week',
+]
+
+
+def _fixture() -> pd.DataFrame:
+  return pd.read_csv(io.StringIO(FIXTURE))
+
+
+def _values(df: pd.DataFrame, column: str) -> list:
+  """Column values with missing values as None, comparable across dtypes."""
+  return [None if pd.isna(v) else v for v in df[column].astype(object)]
+
+
+def _assert_equivalent(actual: pd.DataFrame, expected: pd.DataFrame):
+  assert len(actual) == len(expected)
+  assert list(actual['job_link']) == list(expected['job_link'])
+  for column in COMPARED_COLUMNS:
+    assert _values(actual, column) == _values(expected, column), column
+
+
+def test_chunk_matches_row_wise_reference():
+  """One chunk gives the same cleaned columns and features as the notebook."""
+  df = _fixture()
+  _assert_equivalent(Deduplicator()(preprocess_chunk(df)), reference_preprocess(df))
+
+
+def test_duplicates_dropped_across_chunks():
+  """A duplicate in a later chunk is dropped as if the file were one chunk."""
+  df = _fixture()
+  dedupe = Deduplicator()
+  chunks = [dedupe(preprocess_chunk(df.iloc[start:start + 3]))
+            for start in range(0, len(df), 3)]
+  _assert_equivalent(
+      pd.concat(chunks, ignore_index=True), reference_preprocess(df))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the AI question generation path and the speculative context
+lookups of `app/services/questions_service.py`. Run with
+`python -m pytest -q`; no MongoDB or Vertex AI access is needed.
+"""
+import threading
+
+import pytest
+
+from app.services import questions_service
+
+JOB = {'title': 'Data Engineer', 'description': 'Builds pipelines.', 'skills': ['Python']}
+CONTEXT = {'preamble': 'Job profile.', 'context_questions': []}
+
+
+@pytest.fixture
+def replies(monkeypatch):
+  """Serves the given model replies in order and counts the calls."""
+  sent = []
+
+  def use(*responses):
+    queue = list(responses)
+
+    def respond(prompt, **kwargs):
+      sent.append(prompt)
+      return queue.pop(0)
+
+    monkeypatch.setattr(questions_service, 'generate_llm_response', respond)
+    return sent
+
+  monkeypatch.setattr(questions_service, 'register_context', lambda preamble: 'ctx')
+  monkeypatch.setattr(questions_service, 'get_precomputed_questions', lambda *args: None)
+  monkeypatch.setattr(questions_service, 'parse_tech_skills', list)
+  questions_service._questions_cache.clear()
+  yield use
+  questions_service._questions_cache.clear()
+
+
+def test_parsed_questions_are_cached(replies):
+  sent = replies('["What is a DAG?", "How do you backfill?"]')
+  for _ in range(2):
+    result = questions_service.generate_interview_questions(JOB, CONTEXT)
+    assert result['questions'] == ['What is a DAG?', 'How do you backfill?']
+  assert len(sent) == 1
+
+
+@pytest.mark.parametrize('bad_reply', [
+    '[]',
+    '[1, 2]',
+    'Sure! Here are some questions:\n1. What is a DAG?',
+    '["What is a DAG?", oops]',
+])
+def test_empty_or_unparsed_replies_are_not_cached(replies, bad_reply):
+  """One bad reply is served once; the next request asks the model again."""
+  sent = replies(bad_reply, '["What is a DAG?"]')
+  questions_service.generate_interview_questions(JOB, CONTEXT)
+  result = questions_service.generate_interview_questions(JOB, CONTEXT)
+  assert result['questions'] == ['What is a DAG?']
+  assert len(sent) == 2
+
+
+def test_plain_text_reply_is_still_served(replies):
+  replies('What is a DAG?\nHow do you backfill?')
+  result = questions_service.generate_interview_questions(JOB, CONTEXT)
+  assert result['questions'] == ['What is a DAG?', 'How do you backfill?']
+  assert not questions_service.is_parsed_question_set(result['questions'])
+
+
+@pytest.fixture
+def slow_lookups(monkeypatch):
+  """Context lookups that block until released, recording their queries."""
+  release = threading.Event()
+  started = []
+
+  def lookup(job_title, tech_skills):
+    started.append(job_title)
+    release.wait(5)
+    return [{'question': 'Q', 'answer': 'A'}]
+
+  monkeypatch.setattr(questions_service, '_get_context_questions', lookup)
+  monkeypatch.setattr(questions_service, '_context_lookups', {})
+  monkeypatch.setattr(questions_service, 'QUESTIONS_CONTEXT_DEADLINE_MS', 20)
+  questions_service._context_cache.clear()
+  yield started
+  release.set()
+
+
+def test_identical_slow_lookups_share_one_query(slow_lookups):
+  for _ in range(3):
+    assert questions_service._get_context_questions_speculatively('Data Engineer', []) == []
+  assert slow_lookups == ['Data Engineer']
+  assert len(questions_service._context_lookups) == 1
+
+
+def test_no_lookup_submitted_beyond_the_worker_count(slow_lookups):
+  workers = questions_service.QUESTIONS_CONTEXT_WORKERS
+  for i in range(workers + 3):
+    questions_service._get_context_questions_speculatively(f'Role {i}', [])
+  assert len(slow_lookups) == workers
+  assert len(questions_service._context_lookups) == workers
+
+
+def test_finished_lookup_is_forgotten(monkeypatch):
+  monkeypatch.setattr(questions_service, '_get_context_questions',
+                      lambda job_title, tech_skills: [])
+  monkeypatch.setattr(questions_service, '_context_lookups', {})
+  questions_service._context_cache.clear()
+  assert questions_service._get_context_questions_speculatively('Data Engineer', []) == []
+  assert questions_service._context_lookups == {}
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the hybrid re-ranking in `app/services/ranking.py`.
+Run with `python -m pytest -q`; no MongoDB access is needed.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.services import ranking, skills
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture(autouse=True)
+def default_aliases(monkeypatch):
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', True)
+
+
+@pytest.mark.parametrize('limit, expected', [
+    (1, 5), (10, 50), (20, 100), (100, 100), (150, 150),
+])
+def test_candidate_limit_overfetches_within_bounds(monkeypatch, limit, expected):
+  """The overfetch stops at RANKING_MAX_CANDIDATES; the page is always honored."""
+  monkeypatch.setattr(ranking, 'RANKING_OVERFETCH', 5)
+  monkeypatch.setattr(ranking, 'RANKING_MAX_CANDIDATES', 100)
+  assert ranking.candidate_limit(limit) == expected
+
+
+def test_candidate_limit_without_ranking(monkeypatch):
+  monkeypatch.setattr(ranking, 'RANKING_ENABLED', False)
+  assert ranking.candidate_limit(150) == 150
+
+
+def test_skill_jaccard_canonicalizes_the_query():
+  scores = ranking.skill_jaccard(
+      [['TypeScript', 'Kubernetes'], ['Java'], []], ['ts', 'k8s'])
+  assert scores.tolist() == [1.0, 0.0, 0.0]
+
+
+def _posting(title, score, skills_list, level, first_seen):
+  return {'job_title': title, 'score': score, 'skills': skills_list,
+          'job level': level, 'first_seen': first_seen}
+
+
+def test_rank_jobs_orders_by_hybrid_score(monkeypatch):
+  """Skills, level and recency can lift a posting above a better text match."""
+  monkeypatch.setattr(ranking, 'RANKING_ENABLED', True)
+  candidates = [
+      _posting('text only', 2.0, ['Java'], 'Associate', '2023-01-01'),
+      _posting('good fit', 1.6, ['Python', 'AWS'], 'Mid senior', '2024-05-30'),
+      _posting('partial fit', 1.6, ['Python'], 'Mid senior', '2024-05-30'),
+  ]
+  weights = {'text': 0.5, 'skills': 0.25, 'level': 0.15, 'recency': 0.1}
+  scores = ranking.score_candidates(
+      candidates, [c['skills'] for c in candidates], ['python', 'aws'],
+      'senior', weights, now=NOW)
+  order = [candidates[i]['job_title'] for i in (-scores).argsort(kind='stable')]
+  assert order == ['good fit', 'partial fit', 'text only']
+
+  ranked = ranking.rank_jobs(
+      candidates, [c['skills'] for c in candidates], ['python', 'aws'],
+      'senior', limit=2, weights=weights)
+  assert [c['job_title'] for c in ranked] == ['good fit', 'partial fit']
+
+
+def test_rank_jobs_keeps_text_order_between_ties(monkeypatch):
+  monkeypatch.setattr(ranking, 'RANKING_ENABLED', True)
+  candidates = [_posting(str(i), 1.0, [], None, None) for i in range(5)]
+  ranked = ranking.rank_jobs(candidates, [[]] * 5, limit=5)
+  assert [c['job_title'] for c in ranked] == ['0', '1', '2', '3', '4']
+
+
+def test_rank_jobs_disabled_returns_text_order(monkeypatch):
+  monkeypatch.setattr(ranking, 'RANKING_ENABLED', False)
+  candidates = [_posting('a', 1.0, [], None, None),
+                _posting('b', 0.5, ['Python'], 'Senior', '2024-05-31')]
+  ranked = ranking.rank_jobs(candidates, [[], ['Python']], ['Python'], 'Senior', limit=1)
+  assert [c['job_title'] for c in ranked] == ['a']
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for interview sessions in `app/services/session_service.py`.
+Run with `python -m pytest -q`; no MongoDB or Vertex AI access is needed.
+"""
+import pytest
+
+from app.services import session_service
+from app.services.exceptions import ServiceError
+
+JOB = {'title': 'Data Engineer', 'description': 'Builds pipelines.',
+       'skills': 'Python, SQL', 'score': 3.2, 'job_link': 'https://jobs.example/1'}
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+  """Sessions over one known posting, with a stub prompt context."""
+  monkeypatch.setattr(session_service, 'get_job',
+                      lambda job_link: dict(JOB) if job_link == JOB['job_link'] else None)
+  monkeypatch.setattr(session_service, 'parse_tech_skills',
+                      lambda value: [s.strip() for s in value.split(',')])
+  monkeypatch.setattr(session_service, 'prepare_question_context',
+                      lambda title, description, tech_skills: {
+                          'preamble': title, 'context_questions': [{'question': 'Q'}]})
+  session_service._sessions.clear()
+  yield
+  session_service._sessions.clear()
+
+
+def _error(call, *args) -> int:
+  with pytest.raises(ServiceError) as error:
+    call(*args)
+  return error.value.status_code
+
+
+def test_session_from_job_link_stores_the_prepared_job():
+  session = session_service.create_session(job_link=JOB['job_link'])
+  stored = session_service.get_session(session['session_id'])
+
+  assert stored['job']['skills'] == ['Python', 'SQL'] and 'score' not in stored['job']
+  assert stored['context']['preamble'] == 'Data Engineer'
+  assert stored['questions'] is None and stored['expires_at'] > stored['created_at']
+
+
+def test_invalid_sources_are_rejected():
+  assert _error(session_service.create_session, 'https://jobs.example/missing') == 404
+  assert _error(session_service.create_session, None, None) == 400
+  assert _error(session_service.create_session, None, ['not', 'a', 'job']) == 400
+
+
+def test_unknown_or_deleted_session_is_not_found():
+  session = session_service.create_session(job=JOB)
+  session_service.delete_session(session['session_id'])
+  assert _error(session_service.get_session, session['session_id']) == 404
+  assert _error(session_service.get_session, '') == 404
+
+
+def test_answers_are_paired_with_the_questions_in_order():
+  session = session_service.create_session(job=JOB)
+  assert _error(session_service.session_answers, session, ['An answer']) == 409
+
+  session_service.save_questions(session, ['Q1', 'Q2'], precomputed=True)
+  assert session_service.session_answers(session, ['A1']) == [
+      {'question': 'Q1', 'answer': 'A1'}]
+  for answers in ([], 'A1', ['A1', 'A2', 'A3']):
+    assert _error(session_service.session_answers, session, answers) == 400
+
+
+def test_public_session_hides_the_prompt_context():
+  session = session_service.create_session(job=JOB)
+  public = session_service.public_session(session)
+  assert 'context' not in public and public['context_questions'] == 1
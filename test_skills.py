@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for skill canonicalization and vocabulary loading in
+`app/services/skills.py`. Run with `python -m pytest -q`; no MongoDB access
+is needed.
+"""
+import pytest
+
+from app.services import skills
+
+VOCABULARY = [{'skill': 'PostgreSQL', 'aliases': ['postgres', 'psql'], 'frequency': 12}]
+
+
+@pytest.fixture
+def vocabulary(monkeypatch):
+  """Unloaded vocabulary served from the given outcomes, on a fake clock."""
+  clock = [1000.0]
+  calls = []
+
+  def use(*outcomes):
+    queue = list(outcomes)
+
+    def docs():
+      calls.append(1)
+      outcome = queue.pop(0)
+      if isinstance(outcome, Exception):
+        raise outcome
+      return outcome
+
+    monkeypatch.setattr(skills, '_vocabulary_docs', docs)
+    return calls
+
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', False)
+  monkeypatch.setattr(skills, '_retry_at', 0.0)
+  monkeypatch.setattr(skills, '_vocabulary_size', 0)
+  monkeypatch.setattr(skills.time, 'monotonic', lambda: clock[0])
+  use.clock = clock
+  return use
+
+
+def test_normalize_skill_list_canonicalizes_and_dedupes(vocabulary):
+  vocabulary(VOCABULARY)
+  assert skills.normalize_skill_list(['psql', 'PostgreSQL', ' k8s ', 'x', None, 'Rust']) == [
+      'PostgreSQL', 'Kubernetes', 'Rust']
+
+
+def test_failed_load_keeps_defaults_and_retries_after_interval(vocabulary):
+  calls = vocabulary(ConnectionError('down'), VOCABULARY)
+
+  assert skills.canonicalize('k8s') == 'Kubernetes'
+  assert skills.canonicalize('psql') == 'psql'
+  assert not skills._loaded
+  skills.canonicalize('psql')
+  assert len(calls) == 1  # no retry within the interval
+
+  vocabulary.clock[0] += skills.SKILL_VOCABULARY_RETRY_INTERVAL
+  assert skills.canonicalize('psql') == 'PostgreSQL'
+  assert skills._loaded and len(calls) == 2
+
+
+def test_forced_load_failure_is_raised_and_keeps_the_loaded_map(vocabulary):
+  vocabulary(VOCABULARY, ConnectionError('down'))
+  assert skills.load_vocabulary() == 1
+  with pytest.raises(ConnectionError):
+    skills.load_vocabulary(force=True)
+  assert skills.canonicalize('postgres') == 'PostgreSQL'
+
+
+def test_split_skill_string_accepts_every_delimiter():
+  assert skills.split_skill_string('Python, SQL;AWS | Go') == ['Python', 'SQL', 'AWS', 'Go']
+  assert skills.split_skill_string(None) == []
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit tests for slow query shapes and plans in `app/services/slow_queries.py`
+and the indexes proposed from them by `data/index_advisor.py`. Run with
+`python -m pytest -q`; no MongoDB access is needed.
+"""
+import os
+import sys
+
+from app.services.slow_queries import query_shape, shape_key, summarize_plan
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'data'))
+
+from index_advisor import missing_index, proposed_index, summarize  # noqa: E402
+
+
+def test_query_shape_replaces_literals_only():
+  query = {
+      '$text': {'$search': '"data engineer"'},
+      '$and': [{'skills_normalized': {'$in': ['Python', 'SQL']}},
+               {'job level': {'$regex': 'senior', '$options': 'i'}}],
+      'job_type': 'Remote',
+  }
+  assert query_shape(query) == {
+      '$text': {'$search': '?'},
+      '$and': [{'skills_normalized': {'$in': '?'}},
+               {'job level': {'$regex': '?', '$options': '?'}}],
+      'job_type': '?',
+  }
+  other = {'job_type': 'Onsite', '$text': {'$search': 'go'},
+           '$and': [{'skills_normalized': {'$in': ['Go']}},
+                    {'job level': {'$regex': 'junior', '$options': 'i'}}]}
+  assert shape_key(query_shape(query)) == shape_key(query_shape(other))
+
+
+def test_summarize_plan_walks_nested_stages():
+  explain = {
+      'queryPlanner': {'winningPlan': {'queryPlan': {
+          'stage': 'LIMIT', 'inputStage': {
+              'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'job_type_1'}}}}},
+      'executionStats': {'nReturned': 4, 'totalDocsExamined': 50,
+                         'totalKeysExamined': 60, 'executionTimeMillis': 120},
+  }
+  summary = summarize_plan(explain)
+  assert summary['plan'] == ['LIMIT', 'FETCH', 'IXSCAN']
+  assert summary['indexes'] == ['job_type_1'] and not summary['collscan']
+  assert summary['examined_per_returned'] == 12.5
+
+  collscan = summarize_plan({'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}},
+                             'executionStats': {'nReturned': 0, 'totalDocsExamined': 9}})
+  assert collscan['collscan'] and collscan['examined_per_returned'] == 9
+
+
+def _shape(query: dict, sort: list = ()) -> dict:
+  return {'filter': query_shape(query), 'sort': [list(key) for key in sort]}
+
+
+def test_proposed_index_follows_equality_sort_range():
+  shape = _shape({'$and': [{'first_seen': {'$gte': '2024-01-01'}},
+                           {'job_level_normalized': {'$in': ['associate']}}],
+                  'job_type': 'Remote'},
+                 sort=[('first_seen', -1)])
+  assert proposed_index(shape) == {'kind': 'compound', 'keys': [
+      ('job_level_normalized', 1), ('job_type', 1), ('first_seen', -1)]}
+
+
+def test_proposed_index_for_text_and_unindexable_shapes():
+  assert proposed_index(_shape({'$text': {'$search': 'go'}})) == {'kind': 'text', 'keys': []}
+  assert proposed_index(_shape({'$or': [{'a': 1}, {'b': 2}]})) is None
+  assert proposed_index(_shape({'_id': 'x'})) is None
+
+
+def test_missing_index_skips_covered_prefixes():
+  proposal = {'kind': 'compound', 'keys': [('job_type', 1)]}
+  covered = {'job_type_1_first_seen_-1': {'key': [('job_type', 1), ('first_seen', -1)]}}
+  assert missing_index(proposal, 'linkedin_jobs', covered) is None
+  assert missing_index(proposal, 'linkedin_jobs', {}) == [('job_type', 1)]
+
+  text = {'kind': 'text', 'keys': []}
+  assert missing_index(text, 'linkedin_jobs', {}) == [
+      ('job_title', 'text'), ('job_skills', 'text')]
+  assert missing_index(text, 'linkedin_jobs', {'t': {'key': [('_fts', 'text')]}}) is None
+
+
+def test_summarize_groups_by_shape_slowest_first():
+  def record(key, duration, **fields):
+    return {'database': 'db', 'collection': 'linkedin_jobs', 'source': 'search_jobs',
+            'shape': {'filter': {}}, 'shape_key': key, 'duration_ms': duration, **fields}
+
+  summaries = summarize([
+      record('a', 120), record('b', 900),
+      record('a', 300, plan=['COLLSCAN'], collscan=True, examined_per_returned=40.0),
+  ])
+  assert [(s['count'], s['total_ms']) for s in summaries] == [(1, 900), (2, 420)]
+  assert summaries[1]['collscan'] and summaries[1]['max_examined_per_returned'] == 40.0
+  assert summaries[1]['p50_ms'] == 210
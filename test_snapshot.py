@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the memory-mapped snapshots of `app/services/snapshot.py`:
+the collection version fingerprint, column encoding and a write/load round
+trip. Run with `python -m pytest -q`; no MongoDB access is needed.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.services import job_service, skills, snapshot
+from app.services.snapshot import StringColumn
+
+POSTINGS = [
+    {'_id': 'a1', 'job_title': 'Data Engineer', 'company': 'Acme', 'job level': 'Mid senior',
+     'job_type': 'Remote', 'job_location': 'Berlin', 'job_link': 'https://jobs.example/a1',
+     'skills_normalized': ['Python', 'SQL'], 'updated_at': datetime(2024, 5, 1)},
+    {'_id': 'a2', 'job_title': 'Café Barista', 'company': 'Acme', 'job level': 'Associate',
+     'job_type': 'Onsite', 'job_location': 'Paris', 'skills_normalized': []},
+]
+VOCABULARY = [{'_id': 'v1', 'skill': 'PostgreSQL', 'aliases': ['postgres', 'psql'],
+               'frequency': 12}]
+
+
+class FakeCollection:
+  """The lookups `collection_version` and `write_snapshot` make."""
+
+  def __init__(self, docs):
+    self.docs = docs
+
+  def find(self, query=None, projection=None):
+    field = next(iter(query or {}), None)
+    return FakeCursor([dict(doc) for doc in self.docs if field is None or field in doc])
+
+  def count_documents(self, query):
+    return len(self.docs)
+
+  def create_index(self, key):
+    pass
+
+
+class FakeCursor(list):
+
+  def sort(self, field, direction):
+    return FakeCursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+  def limit(self, count):
+    return iter(self[:count])
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+  """Postings and vocabulary collections, with snapshots written to tmp_path."""
+  monkeypatch.setattr(skills, '_alias_map', dict(skills.DEFAULT_ALIASES))
+  monkeypatch.setattr(skills, '_loaded', True)
+  monkeypatch.setattr(snapshot, 'CATALOG_SNAPSHOT_DIR', str(tmp_path))
+  monkeypatch.setattr(snapshot, '_snapshot', None)
+  return {'linkedin_jobs': FakeCollection([dict(p) for p in POSTINGS]),
+          'skill_vocabulary': FakeCollection([dict(v) for v in VOCABULARY])}
+
+
+def test_collection_version_fingerprints_count_and_newest_ids():
+  assert snapshot.collection_version(FakeCollection(POSTINGS)) == {
+      'count': 2, 'last_id': 'a2', 'last_updated_at': '2024-05-01T00:00:00'}
+  assert snapshot.collection_version(FakeCollection([])) == {
+      'count': 0, 'last_id': None, 'last_updated_at': None}
+
+
+def test_string_column_round_trip():
+  values = ['Data Engineer', None, '', 'Café ☕']
+  encoded = StringColumn.encode(values)
+  column = StringColumn(encoded['data'], encoded['starts'], encoded['ends'])
+  assert column.to_list() == values
+
+
+def test_written_snapshot_loads_the_same_catalog(db):
+  version = snapshot.write_snapshot(db=db)
+  current, live = snapshot.usable_snapshot('postings', lambda: db['linkedin_jobs'])
+  assert current.version == version and live['count'] == 2
+
+  catalog = current.load_catalog(job_service.posting_skills)
+  assert [r.job_title for r in catalog.records] == ['Data Engineer', 'Café Barista']
+  assert catalog.get('a1').skills == ('Python', 'SQL') and catalog.get('a2').job_link is None
+  assert [doc['job_title'] for doc in catalog.search('sql')] == ['Data Engineer']
+  assert current.vocabulary_docs() == [
+      {'skill': 'PostgreSQL', 'aliases': ['postgres', 'psql'], 'frequency': 12}]
+
+
+def test_changed_collection_makes_the_snapshot_outdated(db):
+  snapshot.write_snapshot(db=db)
+  db['linkedin_jobs'].docs.append({'_id': 'a3', 'job_title': 'Data Analyst'})
+  current, live = snapshot.usable_snapshot('postings', lambda: db['linkedin_jobs'])
+  assert current is None and live['last_id'] == 'a3'
+
+
+def test_stale_snapshot_is_used_when_mongodb_is_down(db):
+  version = snapshot.write_snapshot(db=db)
+
+  def unreachable():
+    raise ConnectionError('no server')
+
+  current, live = snapshot.usable_snapshot('postings', unreachable)
+  assert current.version == version and live is None
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the lazy Vertex AI import and the startup warm-up.
+Run with `python -m pytest -q`; no MongoDB or Vertex AI access is needed.
+"""
+import os
+import subprocess
+import sys
+
+from app import warmup
+from app.services import readiness
+
+
+def test_app_import_does_not_load_vertexai():
+  """Creating the app must not import the Vertex AI SDK."""
+  script = (
+      "import sys\n"
+      "from app import create_app\n"
+      "create_app()\n"
+      "sys.exit(1 if 'vertexai' in sys.modules else 0)\n")
+  env = dict(os.environ, PRELOAD_MODE='true', WARMUP_ENABLED='false')
+  result = subprocess.run(
+      [sys.executable, '-c', script], env=env, timeout=120,
+      cwd=os.path.dirname(os.path.abspath(__file__)),
+      capture_output=True, text=True)
+  assert result.returncode == 0, result.stderr[-2000:]
+
+
+def test_warmup_sets_readiness(monkeypatch):
+  """Readiness stays false until every warm-up hook has run."""
+  calls = []
+  monkeypatch.setattr(warmup, '_hooks', {})
+  monkeypatch.setattr(warmup, '_state', {
+      'started': False, 'finished': False, 'timings_ms': {}, 'errors': {}})
+  monkeypatch.setattr(readiness, '_check_mongodb', lambda: True)
+  monkeypatch.setattr(readiness, 'initialize_vertex_ai', lambda: True)
+  warmup.register_warmup('shared_cache', lambda: calls.append('shared'), shared=True)
+  warmup.register_warmup('worker_client', lambda: calls.append('worker'))
+
+  assert readiness.refresh_dependency_status()['ready'] is False
+
+  warmup.run_warmup('shared')
+  assert calls == ['shared']
+  assert not warmup.is_warmed_up()
+  assert readiness.refresh_dependency_status()['ready'] is False
+
+  warmup.run_warmup('worker')
+  assert calls == ['shared', 'worker']
+  assert warmup.is_warmed_up()
+  status = readiness.refresh_dependency_status()
+  assert status['ready'] is True and status['warmed_up'] is True
+  assert set(warmup.get_warmup_status()['timings_ms']) == {'shared_cache', 'worker_client'}
+
+
+def test_failed_warmup_hook_does_not_block_readiness(monkeypatch):
+  """A failing hook is recorded; warm-up still finishes."""
+  monkeypatch.setattr(warmup, '_hooks', {})
+  monkeypatch.setattr(warmup, '_state', {
+      'started': False, 'finished': False, 'timings_ms': {}, 'errors': {}})
+
+  def fail():
+    raise RuntimeError("unavailable")
+
+  warmup.register_warmup('mongodb', fail)
+  warmup.run_warmup()
+  assert warmup.is_warmed_up()
+  assert warmup.get_warmup_status()['errors'] == {'mongodb': 'unavailable'}
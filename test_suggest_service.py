@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for `app/services/suggest_service.py`: prefix lookups and the
+background build of the index. Run with `python -m pytest -q`; no MongoDB
+access is needed.
+"""
+from collections import Counter
+
+import pytest
+
+from app.services import suggest_service
+from app.services.suggest_service import SuggestIndex
+
+
+def _index() -> SuggestIndex:
+  return SuggestIndex(
+      Counter({'Android Developer': 5, 'Data Engineer': 9, 'DevOps Engineer': 2}),
+      Counter({'Docker': 7, 'Django': 3, 'Python': 8}))
+
+
+def test_prefix_matches_ranked_by_frequency():
+  suggestions = _index().suggest('d', limit=3)
+  assert [s['text'] for s in suggestions] == ['Data Engineer', 'Docker', 'Android Developer']
+
+
+def test_titles_match_from_any_word_and_filter_by_type():
+  index = _index()
+  assert [s['text'] for s in index.suggest('devel')] == ['Android Developer']
+  assert [s['text'] for s in index.suggest('dj', kind='skill')] == ['Django']
+  assert index.suggest('dj', kind='title') == []
+  assert index.suggest('  ') == []
+
+
+@pytest.fixture
+def builds(monkeypatch):
+  """Replaces the MongoDB scan with the given outcomes, recording calls."""
+  calls = []
+
+  def use(*outcomes):
+    queue = list(outcomes)
+
+    def build():
+      calls.append(1)
+      outcome = queue.pop(0)
+      if isinstance(outcome, Exception):
+        raise outcome
+      return outcome
+
+    monkeypatch.setattr(suggest_service, 'build_suggest_index', build)
+    return calls
+
+  monkeypatch.setattr(suggest_service, '_index', None)
+  monkeypatch.setattr(suggest_service, '_build_thread', None)
+  monkeypatch.setattr(suggest_service, '_failures', 0)
+  monkeypatch.setattr(suggest_service, '_retry_at', 0.0)
+  return use
+
+
+def _join_build():
+  if suggest_service._build_thread is not None:
+    suggest_service._build_thread.join(2)
+
+
+def test_missing_index_is_built_in_the_background(builds):
+  calls = builds(_index())
+  assert suggest_service.get_suggest_index() is None
+  _join_build()
+  assert len(calls) == 1
+  assert suggest_service.get_suggest_index().suggest('py')[0]['text'] == 'Python'
+
+
+def test_failed_build_backs_off(builds, monkeypatch):
+  calls = builds(ConnectionError('down'), ConnectionError('down'), _index())
+  clock = [1000.0]
+  monkeypatch.setattr(suggest_service.time, 'monotonic', lambda: clock[0])
+
+  assert suggest_service.get_suggest_index() is None
+  _join_build()
+  for _ in range(3):  # keystrokes during the backoff start no build
+    assert suggest_service.get_suggest_index() is None
+  assert len(calls) == 1
+
+  clock[0] += suggest_service.SUGGEST_RETRY_BACKOFF
+  suggest_service.get_suggest_index()
+  _join_build()
+  assert len(calls) == 2
+  # The second failure doubles the delay
+  clock[0] += suggest_service.SUGGEST_RETRY_BACKOFF
+  suggest_service.get_suggest_index()
+  assert len(calls) == 2
+
+  clock[0] += suggest_service.SUGGEST_RETRY_BACKOFF
+  suggest_service.get_suggest_index()
+  _join_build()
+  assert len(calls) == 3 and suggest_service.get_suggest_index() is not None
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the MongoDB task queue leases, the queue depth limit and the
+webhook URL check in `app/services/task_queue.py`. Run with
+`python -m pytest -q`; no MongoDB or network access is needed.
+"""
+import socket
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import task_queue
+from app.services.exceptions import ServiceError
+
+
+def _matches(doc: dict, query: dict) -> bool:
+  """The subset of MongoDB query semantics used by the task queue."""
+  for field, condition in query.items():
+    if field == '$or':
+      if not any(_matches(doc, clause) for clause in condition):
+        return False
+    elif isinstance(condition, dict):
+      value = doc.get(field)
+      if '$in' in condition and value not in condition['$in']:
+        return False
+      if '$lt' in condition and not (value is not None and value < condition['$lt']):
+        return False
+    elif doc.get(field) != condition:
+      return False
+  return True
+
+
+class FakeTasks:
+  """In-memory stand-in for the `tasks` collection."""
+
+  def __init__(self):
+    self.docs = []
+    self.renewals = 0
+
+  def insert_one(self, doc):
+    self.docs.append(dict(doc))
+
+  def count_documents(self, query):
+    return sum(1 for doc in self.docs if _matches(doc, query))
+
+  def delete_one(self, query):
+    for doc in self.docs:
+      if _matches(doc, query):
+        self.docs.remove(doc)
+        return SimpleNamespace(deleted_count=1)
+    return SimpleNamespace(deleted_count=0)
+
+  def update_one(self, query, update):
+    for doc in self.docs:
+      if _matches(doc, query):
+        if set(update['$set']) == {'lease_expires_at'}:
+          self.renewals += 1
+        doc.update(update['$set'])
+        for field in update.get('$unset', {}):
+          doc.pop(field, None)
+        return SimpleNamespace(matched_count=1)
+    return SimpleNamespace(matched_count=0)
+
+  def find_one_and_update(self, query, update, sort=None, return_document=None):
+    candidates = sorted((doc for doc in self.docs if _matches(doc, query)),
+                        key=lambda doc: doc['created_at'])
+    if not candidates:
+      return None
+    candidates[0].update(update['$set'])
+    return dict(candidates[0])
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+  collection = FakeTasks()
+  monkeypatch.setattr(task_queue, '_tasks_collection', lambda: collection)
+  monkeypatch.setattr(task_queue, 'TASK_QUEUE_BACKEND', 'mongo')
+  return collection
+
+
+@pytest.fixture
+def webhooks(monkeypatch):
+  sent = []
+  monkeypatch.setattr(task_queue, '_send_webhook', lambda task: sent.append(task['task_id']))
+  return sent
+
+
+def _queue(tasks, task_id, handler_name='echo'):
+  tasks.insert_one({'task_id': task_id, 'name': handler_name, 'kwargs': {},
+                    'status': task_queue.QUEUED, 'created_at': task_queue._now()})
+
+
+def test_expired_lease_is_taken_over_and_only_the_owner_reports(tasks, webhooks, monkeypatch):
+  monkeypatch.setitem(task_queue.TASK_HANDLERS, 'echo', lambda: 'done')
+  _queue(tasks, 't1')
+  stale = task_queue._claim_next_task('worker-a')
+  assert task_queue._claim_next_task('worker-b') is None  # lease still held
+
+  tasks.docs[0]['lease_expires_at'] = task_queue._now() - timedelta(seconds=1)
+  current = task_queue._claim_next_task('worker-b')
+  assert current['lease_id'] != stale['lease_id']
+
+  task_queue._run_claimed_task(stale)
+  assert tasks.docs[0]['status'] == task_queue.RUNNING and webhooks == []
+  task_queue._run_claimed_task(current)
+  assert tasks.docs[0]['status'] == task_queue.SUCCEEDED
+  assert tasks.docs[0]['result'] == 'done' and webhooks == ['t1']
+
+
+def test_lease_is_renewed_while_the_task_runs(tasks, webhooks, monkeypatch):
+  monkeypatch.setattr(task_queue, 'TASK_LEASE_SECONDS', 0.03)
+  monkeypatch.setitem(task_queue.TASK_HANDLERS, 'echo', lambda: time.sleep(0.1))
+  _queue(tasks, 't1')
+  task_queue._run_claimed_task(task_queue._claim_next_task('worker-a'))
+  assert tasks.renewals >= 2
+  assert 'lease_expires_at' not in tasks.docs[0] and webhooks == ['t1']
+
+
+def test_concurrent_submit_over_the_depth_is_withdrawn(tasks, monkeypatch):
+  monkeypatch.setattr(task_queue, 'TASK_QUEUE_MAX_DEPTH', 2)
+  _queue(tasks, 'queued')
+  insert = tasks.insert_one
+
+  def insert_with_concurrent_submit(doc):
+    insert(doc)
+    insert({'task_id': 'concurrent', 'status': task_queue.QUEUED})  # passed its check meanwhile
+
+  monkeypatch.setattr(tasks, 'insert_one', insert_with_concurrent_submit)
+  with pytest.raises(ServiceError) as rejected:
+    task_queue.enqueue_task('jobs', {'query': 'python'})
+  assert rejected.value.status_code == 429
+  assert [doc['task_id'] for doc in tasks.docs] == ['queued', 'concurrent']
+
+
+def test_submit_within_the_depth_is_queued(tasks, monkeypatch):
+  monkeypatch.setattr(task_queue, 'TASK_QUEUE_MAX_DEPTH', 2)
+  _queue(tasks, 'queued')
+  view = task_queue.enqueue_task('jobs', {'query': 'python'})
+  assert view['status'] == task_queue.QUEUED
+  assert tasks.count_documents({}) == 2
+
+
+@pytest.fixture
+def resolve(monkeypatch):
+  """Resolves every host to the given addresses."""
+  def use(*addresses):
+    monkeypatch.setattr(task_queue.socket, 'getaddrinfo', lambda host, port, proto=0: [
+        (socket.AF_INET, socket.SOCK_STREAM, proto, '', (address, port))
+        for address in addresses])
+  return use
+
+
+@pytest.mark.parametrize('address', [
+    '127.0.0.1', '10.0.0.5', '169.254.169.254', '::1', '::ffff:127.0.0.1', '224.0.0.1',
+])
+def test_callback_to_non_public_address_is_rejected(resolve, address):
+  resolve(address)
+  with pytest.raises(ServiceError) as rejected:
+    task_queue.validate_callback_url('https://hooks.example.com/done')
+  assert rejected.value.status_code == 400
+
+
+def test_callback_with_any_private_address_is_rejected(resolve):
+  resolve('93.184.216.34', '192.168.1.1')
+  with pytest.raises(ServiceError):
+    task_queue.validate_callback_url('https://hooks.example.com/done')
+
+
+@pytest.mark.parametrize('url', ['ftp://hooks.example.com/done', 'https://', 42])
+def test_callback_must_be_an_http_url(resolve, url):
+  resolve('93.184.216.34')
+  with pytest.raises(ServiceError):
+    task_queue.validate_callback_url(url)
+
+
+def test_callback_allowlist(resolve, monkeypatch):
+  resolve('93.184.216.34')
+  monkeypatch.setattr(task_queue, 'TASK_WEBHOOK_ALLOWED_HOSTS', ['example.com'])
+  assert task_queue.validate_callback_url(' https://hooks.example.com/done ') == (
+      'https://hooks.example.com/done')
+  with pytest.raises(ServiceError):
+    task_queue.validate_callback_url('https://example.org/done')
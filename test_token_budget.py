@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Unit tests for prompt-size budgeting in `app/services/token_budget.py` and
+the prompts trimmed with it. Run with `python -m pytest -q`; no Vertex AI
+access is needed.
+"""
+from app.services import ai_service, questions_service
+from app.services.token_budget import (
+    TRUNCATION_MARKER, estimate_tokens, remaining_budget, truncate_to_tokens)
+
+
+def test_estimate_rounds_up_to_whole_tokens():
+  assert [estimate_tokens(text) for text in ('', None, 'abcd', 'abcde')] == [0, 0, 1, 2]
+
+
+def test_text_within_the_budget_is_kept():
+  assert truncate_to_tokens('short answer', 3) == 'short answer'
+  assert truncate_to_tokens(None, 3) == ''
+
+
+def test_truncation_cuts_at_a_word_boundary_within_the_budget():
+  text = 'word ' * 50
+  truncated = truncate_to_tokens(text, 10)
+  assert truncated.endswith(TRUNCATION_MARKER)
+  assert estimate_tokens(truncated) <= 10
+  assert truncated[:-len(TRUNCATION_MARKER)].split(' ') == ['word'] * 5
+
+
+def test_remaining_budget_subtracts_every_part():
+  assert remaining_budget('a' * 40, 'b' * 8, budget=100) == 88
+  assert remaining_budget('a' * 400, budget=10) == -90
+
+
+def test_preamble_caps_the_description(monkeypatch):
+  monkeypatch.setattr(ai_service, 'LLM_DESCRIPTION_TOKEN_BUDGET', 20)
+  preamble = ai_service.build_job_preamble('Data Engineer', 'pipelines ' * 200, [])
+  assert TRUNCATION_MARKER in preamble
+  assert estimate_tokens(preamble) < 60
+
+
+def test_context_questions_are_dropped_once_the_budget_is_spent(monkeypatch):
+  # Room left after the fixed prompt for two shortened context questions
+  monkeypatch.setattr(questions_service, 'remaining_budget', lambda *parts: 120)
+  monkeypatch.setattr(questions_service, 'CONTEXT_ANSWER_TOKEN_LIMIT', 40)
+  questions = [{'question': f'Question {i}?', 'answer': 'long answer ' * 100}
+               for i in range(5)]
+
+  fitted = questions_service._fit_context_questions('Job profile.', 'Dev', questions)
+  assert [q['question'] for q in fitted] == ['Question 0?', 'Question 1?']
+  assert all(q['answer'].endswith(TRUNCATION_MARKER) for q in fitted)
+  assert all(estimate_tokens(q['answer']) <= 40 for q in fitted)
@@ -0,0 +1,22 @@
+"""
+Task queue worker entry point.
+
+Runs long-running AI tasks queued by the API when TASK_QUEUE_BACKEND=mongo.
+Start one or more of these next to the web service:
+    TASK_QUEUE_BACKEND=mongo python worker.py
+"""
+import logging
+from dotenv import load_dotenv
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+  load_dotenv()
+
+  from app.services.task_queue import run_worker
+  run_worker()